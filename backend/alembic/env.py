@@ -17,6 +17,15 @@ if config.config_file_name is not None:
 
 target_metadata = Base.metadata
 
+# Tables managed by hand-written migrations only (need optional Postgres extensions)
+UNMANAGED_TABLES = {"resume_vectors"}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and name in UNMANAGED_TABLES:
+        return False
+    return True
+
 
 def run_migrations_offline() -> None:
     url = config.get_main_option("sqlalchemy.url")
@@ -25,6 +34,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -32,7 +42,11 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
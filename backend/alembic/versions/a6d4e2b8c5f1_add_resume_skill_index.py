@@ -0,0 +1,52 @@
+"""Add resume skill inverted index and experience index
+
+Revision ID: a6d4e2b8c5f1
+Revises: f3b9d1c7a2e5
+Create Date: 2026-10-17 16:41:09.372814
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d4e2b8c5f1'
+down_revision: Union[str, None] = 'f3b9d1c7a2e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'resume_skills',
+        sa.Column('resume_id', sa.Integer(), nullable=False),
+        sa.Column('skill', sa.String(length=100), nullable=False),
+        sa.Column('uploader_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['resume_id'], ['resumes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('resume_id', 'skill')
+    )
+    op.create_index('ix_resume_skills_uploader_skill', 'resume_skills', ['uploader_id', 'skill'], unique=False)
+    op.create_index('ix_resumes_uploader_experience', 'resumes', ['uploader_id', 'experience_years'], unique=False)
+
+    # Backfill from the JSON skill lists (same normalization as normalize_skill)
+    op.execute(
+        """
+        INSERT INTO resume_skills (resume_id, uploader_id, skill)
+        SELECT DISTINCT r.id, r.uploader_id, left(lower(trim(s.value)), 100)
+        FROM resumes r,
+             json_array_elements_text(
+                 CASE WHEN json_typeof(r.skills) = 'array' THEN r.skills ELSE '[]'::json END
+             ) AS s(value)
+        WHERE r.skills IS NOT NULL
+          AND trim(s.value) <> ''
+        ON CONFLICT DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_resumes_uploader_experience', table_name='resumes')
+    op.drop_index('ix_resume_skills_uploader_skill', table_name='resume_skills')
+    op.drop_table('resume_skills')
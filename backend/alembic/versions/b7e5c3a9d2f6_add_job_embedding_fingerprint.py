@@ -0,0 +1,28 @@
+"""Add job embedding fingerprint and chunk embeddings
+
+Revision ID: b7e5c3a9d2f6
+Revises: a6d4e2b8c5f1
+Create Date: 2026-10-17 16:41:08.219734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e5c3a9d2f6'
+down_revision: Union[str, None] = 'a6d4e2b8c5f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('jobs', sa.Column('embedding_fingerprint', sa.String(length=64), nullable=True))
+    op.add_column('jobs', sa.Column('chunk_embeddings', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('jobs', 'chunk_embeddings')
+    op.drop_column('jobs', 'embedding_fingerprint')
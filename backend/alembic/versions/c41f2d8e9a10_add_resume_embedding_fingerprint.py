@@ -0,0 +1,26 @@
+"""Add resume embedding fingerprint
+
+Revision ID: c41f2d8e9a10
+Revises: 7e3573a9d55c
+Create Date: 2026-10-17 09:12:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f2d8e9a10'
+down_revision: Union[str, None] = '7e3573a9d55c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('resumes', sa.Column('embedding_fingerprint', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('resumes', 'embedding_fingerprint')
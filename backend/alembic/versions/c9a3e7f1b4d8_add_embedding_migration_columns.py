@@ -0,0 +1,48 @@
+"""Add pending embedding columns and recruiter embedding versions
+
+Revision ID: c9a3e7f1b4d8
+Revises: b7e5c3a9d2f6
+Create Date: 2026-10-17 17:26:44.901356
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9a3e7f1b4d8'
+down_revision: Union[str, None] = 'b7e5c3a9d2f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PENDING_COLUMNS = (
+    ('pending_embedding', sa.LargeBinary()),
+    ('pending_embedding_model', sa.String(length=100)),
+    ('pending_embedding_fingerprint', sa.String(length=64)),
+    ('pending_chunk_embeddings', sa.LargeBinary()),
+)
+
+
+def upgrade() -> None:
+    for table in ('resumes', 'jobs'):
+        for name, column_type in PENDING_COLUMNS:
+            op.add_column(table, sa.Column(name, column_type, nullable=True))
+
+    op.create_table(
+        'recruiter_embedding_versions',
+        sa.Column('recruiter_id', sa.Integer(), nullable=False),
+        sa.Column('embedding_model', sa.String(length=100), nullable=False),
+        sa.Column('switched_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['recruiter_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('recruiter_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('recruiter_embedding_versions')
+    for table in ('jobs', 'resumes'):
+        for name, _ in reversed(PENDING_COLUMNS):
+            op.drop_column(table, name)
@@ -0,0 +1,27 @@
+"""Add application score fingerprint
+
+Revision ID: d2b8f4a6c1e3
+Revises: c9a3e7f1b4d8
+Create Date: 2026-10-17 19:12:45.308127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b8f4a6c1e3'
+down_revision: Union[str, None] = 'c9a3e7f1b4d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows have no fingerprint, so the first rescoring pass recomputes them once
+    op.add_column('applications', sa.Column('score_fingerprint', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('applications', 'score_fingerprint')
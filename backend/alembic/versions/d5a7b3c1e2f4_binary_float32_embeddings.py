@@ -0,0 +1,74 @@
+"""Store embeddings as binary float32 with a model tag
+
+Revision ID: d5a7b3c1e2f4
+Revises: c41f2d8e9a10
+Create Date: 2026-10-17 11:03:27.551920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a7b3c1e2f4'
+down_revision: Union[str, None] = 'c41f2d8e9a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+TABLES = ('jobs', 'resumes')
+
+
+def _convert_binary_to_json(table_name: str) -> None:
+    bind = op.get_bind()
+    table = sa.table(
+        table_name,
+        sa.column('id', sa.Integer),
+        sa.column('embedding_vector', sa.JSON),
+        sa.column('embedding', sa.LargeBinary),
+    )
+
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, table.c.embedding)
+            .where(table.c.id > last_id)
+            .where(table.c.embedding.isnot(None))
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        bind.execute(
+            table.update()
+            .where(table.c.id == sa.bindparam('row_id'))
+            .values(embedding_vector=sa.bindparam('embedding_vector')),
+            [
+                {'row_id': row.id, 'embedding_vector': np.frombuffer(row.embedding, dtype='<f4').tolist()}
+                for row in rows
+            ]
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    for table_name in TABLES:
+        op.add_column(table_name, sa.Column('embedding', sa.LargeBinary(), nullable=True))
+        op.add_column(table_name, sa.Column('embedding_model', sa.String(length=100), nullable=True))
+        # The JSON vectors aren't converted: they have no text fingerprint or
+        # document version tag, so get_resume_embeddings / get_job_documents
+        # would discard them and re-encode every row anyway. Rows start with
+        # NULL embeddings and are encoded on first use or by /update-embeddings.
+        op.drop_column(table_name, 'embedding_vector')
+
+
+def downgrade() -> None:
+    for table_name in TABLES:
+        op.add_column(table_name, sa.Column('embedding_vector', sa.JSON(), nullable=True))
+        _convert_binary_to_json(table_name)
+        op.drop_column(table_name, 'embedding_model')
+        op.drop_column(table_name, 'embedding')
@@ -0,0 +1,51 @@
+"""Add scoring profiles
+
+Revision ID: e4c6a8b2d0f7
+Revises: d2b8f4a6c1e3
+Create Date: 2026-10-17 20:03:17.552491
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4c6a8b2d0f7'
+down_revision: Union[str, None] = 'd2b8f4a6c1e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scoring_profiles',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recruiter_id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=True),
+        sa.Column('skill_weight', sa.Float(), nullable=False),
+        sa.Column('experience_weight', sa.Float(), nullable=False),
+        sa.Column('semantic_weight', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['recruiter_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_scoring_profiles_id'), 'scoring_profiles', ['id'], unique=False)
+    op.create_index(
+        'ix_scoring_profiles_recruiter_default', 'scoring_profiles', ['recruiter_id'],
+        unique=True, postgresql_where=sa.text('job_id IS NULL')
+    )
+    op.create_index('ix_scoring_profiles_job_id', 'scoring_profiles', ['job_id'], unique=True)
+    # get_job_matches orders and filters by score within a job
+    op.create_index('ix_applications_job_id_match_score', 'applications', ['job_id', 'match_score'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_applications_job_id_match_score', table_name='applications')
+    op.drop_index('ix_scoring_profiles_job_id', table_name='scoring_profiles')
+    op.drop_index('ix_scoring_profiles_recruiter_default', table_name='scoring_profiles')
+    op.drop_index(op.f('ix_scoring_profiles_id'), table_name='scoring_profiles')
+    op.drop_table('scoring_profiles')
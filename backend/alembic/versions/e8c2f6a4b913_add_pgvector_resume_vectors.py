@@ -0,0 +1,56 @@
+"""Add pgvector resume_vectors table (when the extension is available)
+
+Revision ID: e8c2f6a4b913
+Revises: d5a7b3c1e2f4
+Create Date: 2026-10-17 13:45:09.117402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c2f6a4b913'
+down_revision: Union[str, None] = 'd5a7b3c1e2f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EMBEDDING_DIM = 384
+
+
+def _pgvector_available() -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return False
+    result = bind.execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'vector')"
+    ))
+    return bool(result.scalar())
+
+
+def upgrade() -> None:
+    # Environments without pgvector keep using the in-process search backends
+    if not _pgvector_available():
+        print("pgvector extension not available, skipping resume_vectors table")
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.execute(f"""
+        CREATE TABLE resume_vectors (
+            resume_id INTEGER PRIMARY KEY REFERENCES resumes (id) ON DELETE CASCADE,
+            uploader_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            embedding_model VARCHAR(100) NOT NULL,
+            embedding vector({EMBEDDING_DIM}) NOT NULL
+        )
+    """)
+    op.execute("CREATE INDEX ix_resume_vectors_uploader_id ON resume_vectors (uploader_id)")
+    op.execute(
+        "CREATE INDEX ix_resume_vectors_embedding_hnsw ON resume_vectors "
+        "USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS resume_vectors")
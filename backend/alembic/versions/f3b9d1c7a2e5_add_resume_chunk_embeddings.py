@@ -0,0 +1,26 @@
+"""Add resume chunk embeddings
+
+Revision ID: f3b9d1c7a2e5
+Revises: e8c2f6a4b913
+Create Date: 2026-10-17 14:03:27.551902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9d1c7a2e5'
+down_revision: Union[str, None] = 'e8c2f6a4b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('resumes', sa.Column('chunk_embeddings', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('resumes', 'chunk_embeddings')
@@ -0,0 +1,61 @@
+"""Add recruiter index versions bumped by resume triggers
+
+Revision ID: f6d8b0c2e4a9
+Revises: e4c6a8b2d0f7
+Create Date: 2026-10-17 21:47:32.106583
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6d8b0c2e4a9'
+down_revision: Union[str, None] = 'e4c6a8b2d0f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables whose changes alter a recruiter's search results, keyed by uploader_id
+VERSIONED_TABLES = ('resumes', 'resume_skills')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'recruiter_index_versions',
+        sa.Column('recruiter_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('recruiter_id')
+    )
+
+    # Statement-level with transition tables: a bulk UPDATE bumps each recruiter once
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_recruiter_index_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO recruiter_index_versions (recruiter_id, version, updated_at)
+            SELECT DISTINCT uploader_id, 1, now() FROM changed_rows
+            ON CONFLICT (recruiter_id) DO UPDATE
+                SET version = recruiter_index_versions.version + 1, updated_at = now();
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in VERSIONED_TABLES:
+        # Transition tables allow one event per trigger
+        for event, transition in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+            op.execute(f"""
+                CREATE TRIGGER {table}_{event.lower()}_index_version
+                AFTER {event} ON {table}
+                REFERENCING {transition} TABLE AS changed_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION bump_recruiter_index_version()
+            """)
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        for event in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_{event}_index_version ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS bump_recruiter_index_version()")
+    op.drop_table('recruiter_index_versions')
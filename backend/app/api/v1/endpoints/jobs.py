@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 from typing import List
@@ -9,6 +9,7 @@ from app.models.user import User
 from app.models.job import Job
 from app.schemas.job import JobCreate, JobUpdate, JobResponse, JobDetailResponse
 from app.services.job_parser import JobParser
+from app.services.recommendation_service import recommendation_service
 
 router = APIRouter()
 job_parser = JobParser()
@@ -17,6 +18,7 @@ job_parser = JobParser()
 @router.post("/", response_model=JobResponse, status_code=status.HTTP_201_CREATED)
 async def create_job(
     job_create: JobCreate,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -50,6 +52,9 @@ async def create_job(
     current_user.jobs_created_this_month += 1
     await db.commit()
     
+    # Embed off the request path; matching reads the stored vector
+    background_tasks.add_task(recommendation_service.index_job, db_job.id)
+    
     return JobResponse.model_validate(db_job)
 
 
@@ -109,6 +114,7 @@ async def get_job(
 async def update_job(
     job_id: int,
     job_update: JobUpdate,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -152,6 +158,11 @@ async def update_job(
     await db.commit()
     await db.refresh(job)
     
+    # Re-embed only if the embedded text (title, description, requirements, skills) changed
+    job_fingerprint = recommendation_service.text_fingerprint(recommendation_service.build_job_text(job))
+    if job.embedding_fingerprint != job_fingerprint:
+        background_tasks.add_task(recommendation_service.index_job, job.id)
+    
     return JobResponse.model_validate(job)
 
 
@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from typing import List
+from sqlalchemy import select, and_, insert, func
+from typing import List, Optional
 
 from app.db.session import get_db
 from app.api.deps import get_current_active_user
@@ -9,12 +9,29 @@ from app.models.user import User
 from app.models.job import Job
 from app.models.resume import Resume
 from app.models.application import Application
-from app.schemas.application import ApplicationCreate, ApplicationResponse, ApplicationDetailResponse, ApplicationUpdate
-from app.services.matching_service import MatchingService
+from app.schemas.application import (
+    ApplicationCreate, ApplicationResponse, ApplicationDetailResponse, ApplicationUpdate,
+    BulkMatchCreate, BulkMatchResponse, BulkMatchResult, ScoringProfileUpdate, ScoringProfileResponse
+)
+from app.services.matching_service import MatchingService, job_content_hash, resume_content_hash
+from app.services.match_matrix_service import MatchMatrixService
+from app.services.application_rescoring import ApplicationRescoringService
+from app.services.scoring_profiles import (
+    delete_profile, get_profile, normalize_weights, resolve_weights, set_profile, weighted_score_expression
+)
+from app.services.recommendation_service import recommendation_service
 from app.services.genai_service import generate_match_explanation
+from app.utils.vectors import decode_embeddings
 
 router = APIRouter()
 matching_service = MatchingService()
+match_matrix_service = MatchMatrixService(matching_service)
+rescoring_service = ApplicationRescoringService(matching_service)
+
+# Applications scored and created per request
+MAX_BULK_MATCH_SIZE = 4000
+# Bind parameters Postgres accepts per statement; multi-row INSERTs are chunked to stay under it
+MAX_BIND_PARAMS = 32767
 
 
 async def generate_explanation_background(
@@ -114,7 +131,12 @@ async def create_match(
         )
     
     # Calculate match scores
-    match_scores = matching_service.match_resume_to_job(resume, job)
+    space = await recommendation_service.serving_space(db, job.recruiter_id)
+    job_doc = await recommendation_service.generate_job_document(job, db, space)
+    # Encodes and stores the resume vector if missing or stale, like the job's above
+    await recommendation_service.get_resume_embeddings([resume], db, space)
+    weights = (await resolve_weights(db, job.recruiter_id, [job.id]))[job.id]
+    match_scores = await matching_service.match_resume_to_job(resume, job, job_doc, space, weights)
     
     # Create application
     db_application = Application(
@@ -124,6 +146,7 @@ async def create_match(
         skill_match_score=match_scores['skill_match_score'],
         experience_match_score=match_scores['experience_match_score'],
         semantic_similarity_score=match_scores['semantic_similarity_score'],
+        score_fingerprint=match_scores['input_fingerprint'],
     )
     
     db.add(db_application)
@@ -144,16 +167,315 @@ async def create_match(
     return ApplicationResponse.model_validate(db_application)
 
 
+@router.post("/match/bulk", response_model=BulkMatchResponse, status_code=status.HTTP_201_CREATED)
+async def create_bulk_match(
+    bulk_match: BulkMatchCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Score one job against many resumes in a single vectorized pass and create applications"""
+    
+    # Get job
+    job_result = await db.execute(
+        select(Job).filter(Job.id == bulk_match.job_id)
+    )
+    job = job_result.scalars().first()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    # Check job ownership
+    if job.recruiter_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to create matches for this job"
+        )
+    
+    # Checked before the ids are bound into a query; each one is a parameter
+    if bulk_match.resume_ids is not None and len(bulk_match.resume_ids) > MAX_BULK_MATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many resume ids ({len(bulk_match.resume_ids)}). Maximum per request: {MAX_BULK_MATCH_SIZE}"
+        )
+
+    # Resolve candidate ids (only the recruiter's own resumes)
+    candidates_query = select(Resume.id).filter(Resume.uploader_id == current_user.id)
+    if bulk_match.resume_ids is not None:
+        candidates_query = candidates_query.filter(Resume.id.in_(bulk_match.resume_ids))
+    if bulk_match.min_experience_years is not None:
+        candidates_query = candidates_query.filter(Resume.experience_years >= bulk_match.min_experience_years)
+    if bulk_match.uploaded_after is not None:
+        candidates_query = candidates_query.filter(Resume.created_at >= bulk_match.uploaded_after)
+    
+    candidate_ids = (await db.execute(candidates_query)).scalars().all()
+    
+    if len(candidate_ids) > MAX_BULK_MATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many candidates ({len(candidate_ids)}). Maximum per request: {MAX_BULK_MATCH_SIZE}"
+        )
+    
+    # Skip resumes that already have an application for this job
+    existing_result = await db.execute(
+        select(Application.resume_id).filter(
+            and_(
+                Application.job_id == job.id,
+                Application.resume_id.in_(candidate_ids)
+            )
+        )
+    )
+    existing_ids = set(existing_result.scalars().all())
+    new_ids = [resume_id for resume_id in candidate_ids if resume_id not in existing_ids]
+    
+    response = BulkMatchResponse(
+        job_id=job.id,
+        candidates_considered=len(candidate_ids),
+        created_count=0,
+        skipped_existing=len(existing_ids),
+        applications=[]
+    )
+    if not new_ids:
+        return response
+    
+    # Encode only resumes without a usable stored vector, then read the columns we score on
+    space = await recommendation_service.serving_space(db, current_user.id)
+    await recommendation_service.ensure_resume_embeddings(db, current_user.id, new_ids, space)
+    rows_result = await db.execute(
+        select(
+            Resume.id, Resume.skills, Resume.experience_years, Resume.embedding, Resume.chunk_embeddings,
+            func.md5(func.coalesce(Resume.raw_text, '')).label('text_digest')
+        )
+        .filter(
+            Resume.id.in_(new_ids),
+            Resume.embedding.isnot(None),
+            Resume.embedding_model == space.version
+        )
+        .order_by(Resume.id)
+    )
+    rows = rows_result.all()
+    if not rows:
+        return response
+    
+    job_doc = await recommendation_service.generate_job_document(job, db, space)
+    dim = job_doc.vector.shape[-1]
+    resume_embeddings = decode_embeddings((row.embedding for row in rows), dim)
+    # Resumes without stored chunks fall back to their pooled vector as a single chunk
+    resume_chunks = [
+        decode_embeddings([row.chunk_embeddings], dim) if row.chunk_embeddings else resume_embeddings[i:i + 1]
+        for i, row in enumerate(rows)
+    ]
+    
+    scores = matching_service.match_resumes_to_job_bulk(
+        job,
+        [row.skills for row in rows],
+        [row.experience_years for row in rows],
+        resume_embeddings,
+        job_doc.vector,
+        resume_chunks=resume_chunks,
+        job_chunks=job_doc.chunks,
+        weights=(await resolve_weights(db, current_user.id, [job.id]))[job.id]
+    )
+    
+    # Multi-row INSERTs bind one parameter per column and row; chunked below to stay under the limit
+    job_hash = job_content_hash(job)
+    values = [
+        {
+            'job_id': job.id,
+            'resume_id': row.id,
+            'match_score': float(scores['overall_match_score'][i]),
+            'skill_match_score': float(scores['skill_match_score'][i]),
+            'experience_match_score': float(scores['experience_match_score'][i]),
+            'semantic_similarity_score': float(scores['semantic_similarity_score'][i]),
+            'score_fingerprint': matching_service.input_fingerprint(
+                resume_content_hash(row.skills, row.experience_years, row.text_digest), job_hash, space
+            ),
+            'recruiter_status': 'pending',
+        }
+        for i, row in enumerate(rows)
+    ]
+    application_ids = {}
+    rows_per_insert = MAX_BIND_PARAMS // len(values[0])
+    for start in range(0, len(values), rows_per_insert):
+        inserted = await db.execute(
+            insert(Application)
+            .values(values[start:start + rows_per_insert])
+            .returning(Application.id, Application.resume_id)
+        )
+        application_ids.update((resume_id, application_id) for application_id, resume_id in inserted.all())
+    await db.commit()
+    
+    response.created_count = len(application_ids)
+    response.applications = [
+        BulkMatchResult(
+            application_id=application_ids[value['resume_id']],
+            resume_id=value['resume_id'],
+            match_score=value['match_score'],
+            skill_match_score=value['skill_match_score'],
+            experience_match_score=value['experience_match_score'],
+            semantic_similarity_score=value['semantic_similarity_score']
+        )
+        for value in sorted(values, key=lambda v: v['match_score'], reverse=True)
+    ]
+    
+    return response
+
+
+@router.get("/matrix", response_model=dict)
+async def get_match_matrix(
+    top_k: int = Query(10, ge=1, le=100),
+    include_candidate_top_jobs: bool = True,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Score all active jobs against all resumes of the current recruiter.
+
+    Returns the top candidates per job and, optionally, the top jobs per candidate.
+    """
+
+    return await match_matrix_service.compute_match_matrix(
+        db,
+        current_user.id,
+        top_k=top_k,
+        include_candidate_top_jobs=include_candidate_top_jobs
+    )
+
+
+@router.post("/rescore-stale", response_model=dict)
+async def rescore_stale_applications(
+    job_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Recompute scores of applications whose resume, job, scorer version or
+    weights changed since they were scored. Current ones are left untouched.
+    """
+    
+    return await rescoring_service.rescore_stale(db, current_user.id, job_id)
+
+
+async def _check_profile_job(db: AsyncSession, job_id: Optional[int], current_user: User) -> None:
+    if job_id is None:
+        return
+    job_result = await db.execute(
+        select(Job).filter(Job.id == job_id)
+    )
+    job = job_result.scalars().first()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    if job.recruiter_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized"
+        )
+
+
+@router.get("/scoring-profile", response_model=ScoringProfileResponse)
+async def get_scoring_profile(
+    job_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Effective match weights for a job, or the recruiter's default without job_id"""
+    
+    await _check_profile_job(db, job_id, current_user)
+    # Job ids resolve to their own profile, then the default; None to the default
+    weights = (await resolve_weights(db, current_user.id, [job_id]))[job_id]
+    if job_id is not None and await get_profile(db, current_user.id, job_id):
+        source = "job"
+    elif await get_profile(db, current_user.id):
+        source = "recruiter"
+    else:
+        source = "default"
+    
+    return ScoringProfileResponse(job_id=job_id, source=source, **weights)
+
+
+@router.put("/scoring-profile", response_model=ScoringProfileResponse)
+async def update_scoring_profile(
+    profile_update: ScoringProfileUpdate,
+    job_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Set match weights for a job, or the recruiter's default without job_id.
+    
+    Weights are normalized to sum to 1. match_score of every affected
+    application is recomputed from its stored component scores in one UPDATE.
+    """
+    
+    await _check_profile_job(db, job_id, current_user)
+    try:
+        weights = normalize_weights(
+            profile_update.skill_weight, profile_update.experience_weight, profile_update.semantic_weight
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    updated = await set_profile(db, current_user.id, weights, job_id)
+    return ScoringProfileResponse(
+        job_id=job_id,
+        source="recruiter" if job_id is None else "job",
+        applications_rescored=updated,
+        **weights
+    )
+
+
+@router.delete("/scoring-profile", response_model=dict)
+async def delete_scoring_profile(
+    job_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Remove a job's (or the default) weights; affected applications fall back and are re-weighted"""
+    
+    await _check_profile_job(db, job_id, current_user)
+    updated = await delete_profile(db, current_user.id, job_id)
+    return {"job_id": job_id, "applications_rescored": updated}
+
+
 @router.get("/job/{job_id}/matches", response_model=List[ApplicationResponse])
 async def get_job_matches(
     job_id: int,
     min_score: float = 0.0,
     skip: int = 0,
     limit: int = 100,
+    skill_weight: Optional[float] = None,
+    experience_weight: Optional[float] = None,
+    semantic_weight: Optional[float] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all candidate matches for a specific job, ranked by score"""
+    """
+    Get all candidate matches for a specific job, ranked by score.
+    
+    Passing any of the *_weight parameters ranks by an ad-hoc weighting of
+    the stored component scores instead (unset weights count as 0); it is
+    computed in the query and not saved.
+    """
+    
+    adhoc_weights = None
+    if any(weight is not None for weight in (skill_weight, experience_weight, semantic_weight)):
+        try:
+            adhoc_weights = normalize_weights(skill_weight or 0.0, experience_weight or 0.0, semantic_weight or 0.0)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
     
     # Verify job ownership
     job_result = await db.execute(
@@ -173,25 +495,30 @@ async def get_job_matches(
             detail="Not authorized to view matches for this job"
         )
     
+    # Stored score, or the ad-hoc weighting of the stored components
+    score = Application.match_score if adhoc_weights is None else weighted_score_expression(adhoc_weights)
+    
     # Get applications with resumes
-    query = select(Application, Resume).join(
+    query = select(Application, Resume, score.label('score')).join(
         Resume, Application.resume_id == Resume.id
     ).filter(
         and_(
             Application.job_id == job_id,
-            Application.match_score >= min_score
+            score >= min_score
         )
-    ).order_by(Application.match_score.desc()).offset(skip).limit(limit)
+    ).order_by(score.desc(), Application.id).offset(skip).limit(limit)
     
     result = await db.execute(query)
-    app_resume_pairs = result.all()
+    rows = result.all()
     
     # Build response with job/resume info
     responses = []
-    for app, resume in app_resume_pairs:
+    for app, resume, app_score in rows:
         resp = ApplicationResponse.model_validate(app)
         resp.job_title = job.title
         resp.candidate_name = resume.candidate_name if resume else None
+        if adhoc_weights is not None:
+            resp.match_score = float(app_score)
         responses.append(resp)
     
     return responses
@@ -286,6 +613,47 @@ async def update_application(
     return ApplicationResponse.model_validate(application)
 
 
+@router.post("/applications/{application_id}/rescore", response_model=ApplicationResponse)
+async def rescore_application(
+    application_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Recompute an application's scores; a no-op if none of its inputs changed"""
+    
+    result = await db.execute(
+        select(Application).filter(Application.id == application_id)
+    )
+    application = result.scalars().first()
+    
+    if not application:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Application not found"
+        )
+    
+    # Get job and verify ownership
+    job_result = await db.execute(
+        select(Job).filter(Job.id == application.job_id)
+    )
+    job = job_result.scalars().first()
+    
+    if job.recruiter_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized"
+        )
+    
+    resume_result = await db.execute(
+        select(Resume).filter(Resume.id == application.resume_id)
+    )
+    resume = resume_result.scalars().first()
+    
+    await rescoring_service.rescore_application(db, application, job, resume)
+    
+    return ApplicationResponse.model_validate(application)
+
+
 @router.post("/applications/{application_id}/explain", response_model=ApplicationDetailResponse)
 async def regenerate_explanation(
     application_id: int,
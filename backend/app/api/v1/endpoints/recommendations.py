@@ -1,18 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
+import json
 
+from app.core.config import settings
 from app.db.session import get_db
 from app.api.deps import get_current_active_user
 from app.models.user import User
 from app.models.job import Job
 from app.models.resume import Resume
-from app.services.recommendation_service import RecommendationService
+from app.services.candidate_query import QuerySyntaxError
+from app.services.recommendation_service import recommendation_service
+from app.services.recommendation_snapshots import decode_cursor, recommendation_snapshots
 
 router = APIRouter()
-recommendation_service = RecommendationService()
 
 
 class RecommendationResponse(BaseModel):
@@ -24,15 +28,22 @@ class RecommendationResponse(BaseModel):
     experience_years: Optional[float]
     rank: int
     outreach_message: Optional[str] = None
+    lexical_score: Optional[float] = None  # BM25, from /candidates/search
+    fused_score: Optional[float] = None  # reciprocal rank fusion, hybrid search only
 
 
 class BatchRecommendationResponse(BaseModel):
     job_id: int
     job_title: str
     total_candidates_screened: int
+    candidates_scored: int
+    candidates_filtered_out: int = 0
     recommendations_count: int
     top_candidates: List[RecommendationResponse]
     average_match_score: float
+    total_ranked: int = 0  # candidates in the ranked snapshot
+    offset: int = 0
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
 
 
 @router.post("/job/{job_id}/recommend", response_model=BatchRecommendationResponse)
@@ -40,10 +51,20 @@ async def get_candidate_recommendations(
     job_id: int,
     top_k: int = 10,
     generate_messages: bool = False,
+    prefilter: bool = False,
+    cursor: Optional[str] = None,
+    depth: Optional[int] = None,
+    stream: bool = False,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get AI-powered candidate recommendations for a job"""
+    """
+    Get AI-powered candidate recommendations for a job.
+    
+    top_k is the page size. The first call ranks up to depth candidates once;
+    next_cursor pages through that ranking without re-scoring. stream=true
+    returns NDJSON: a summary line, then one line per candidate.
+    """
     
     # Get job
     job_result = await db.execute(
@@ -64,24 +85,61 @@ async def get_candidate_recommendations(
             detail="Not authorized to view recommendations for this job"
         )
     
-    # Get all resumes uploaded by this recruiter
-    resumes_result = await db.execute(
-        select(Resume).filter(Resume.uploader_id == current_user.id)
-    )
-    all_resumes = resumes_result.scalars().all()
-    
-    if not all_resumes:
+    if top_k < 1:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No resumes found. Upload resumes first."
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="top_k must be at least 1"
         )
     
-    # Generate recommendations
-    recommendations = await recommendation_service.generate_batch_recommendations(
-        job=job,
-        all_resumes=all_resumes,
-        top_k=top_k,
-        generate_messages=generate_messages
+    if cursor:
+        # Later page: served from the ranked snapshot
+        try:
+            snapshot_id, offset = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        snapshot = await recommendation_snapshots.get(snapshot_id, current_user.id)
+        if snapshot is None or snapshot.job_id != job.id:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Cursor expired. Request recommendations again without a cursor."
+            )
+    else:
+        # Count resumes uploaded by this recruiter (rows are only loaded for the top hits)
+        count_result = await db.execute(
+            select(func.count(Resume.id)).filter(Resume.uploader_id == current_user.id)
+        )
+        total_candidates = count_result.scalar()
+        
+        if not total_candidates:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No resumes found. Upload resumes first."
+            )
+        
+        # Rank once; this and later pages are slices of the snapshot
+        snapshot = await recommendation_service.create_recommendation_snapshot(
+            db=db,
+            job=job,
+            recruiter_id=current_user.id,
+            total_candidates=total_candidates,
+            depth=max(top_k, depth or settings.RECOMMENDATION_SNAPSHOT_DEPTH),
+            prefilter=prefilter
+        )
+        offset = 0
+    
+    if stream:
+        records = recommendation_service.stream_recommendation_page(
+            job, snapshot, offset, top_k, generate_messages
+        )
+        
+        async def ndjson():
+            async for record in records:
+                yield json.dumps(record) + "\n"
+        
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+    
+    recommendations = await recommendation_service.recommendation_page(
+        db, job, snapshot, offset, top_k, generate_messages
     )
     
     return BatchRecommendationResponse(**recommendations)
@@ -121,11 +179,12 @@ async def generate_outreach_message(
         )
     
     # Calculate similarity score
-    all_resumes = [resume]
     recommendations = await recommendation_service.find_matching_candidates(
+        db=db,
         job=job,
-        all_resumes=all_resumes,
-        top_k=1
+        recruiter_id=current_user.id,
+        top_k=1,
+        candidate_ids=[resume.id]
     )
     
     match_score = recommendations[0]['similarity_score'] if recommendations else 70.0
@@ -152,10 +211,16 @@ async def generate_outreach_message(
 @router.post("/update-embeddings", response_model=dict)
 async def update_all_embeddings(
     background_tasks: BackgroundTasks,
+    batch_size: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Update embeddings for all jobs and resumes (admin only or background task)"""
+    """
+    Re-embed all jobs and resumes with the current model in the background.
+    
+    Searches keep using each recruiter's existing vectors until all of their
+    rows are re-embedded, then switch over; progress is at GET /embedding-migration.
+    """
     
     # Simple permission check (you can make this admin-only)
     if current_user.role != "recruiter":
@@ -164,47 +229,76 @@ async def update_all_embeddings(
             detail="Not authorized"
         )
     
-    # Run in background
-    stats = await recommendation_service.update_embeddings_batch(db)
+    migration_status = await recommendation_service.embedding_migration_status(db)
+    if not migration_status["running"]:
+        background_tasks.add_task(recommendation_service.run_embedding_migration, batch_size)
     
     return {
-        "message": "Embeddings updated successfully",
-        "stats": stats
+        "message": "Embedding migration already running" if migration_status["running"] else "Embedding migration started",
+        "status": migration_status
     }
 
 
-@router.get("/candidates/search", response_model=List[RecommendationResponse])
+@router.get("/embedding-migration", response_model=dict)
+async def get_embedding_migration_status(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Progress of the background re-embedding migration"""
+    
+    if current_user.role != "recruiter":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized"
+        )
+    
+    return await recommendation_service.embedding_migration_status(db)
+
+
+class CandidateSearchExplainResponse(BaseModel):
+    query: str
+    free_text: str
+    plan: List[dict]  # structured clauses in execution order, with estimated matches
+    stages: List[dict]  # parse, plan, each filter and scoring, with timings in ms
+    results: List[RecommendationResponse]
+    cached: bool = False  # served from the result cache; the resume set hasn't changed since
+
+
+@router.get(
+    "/candidates/search",
+    response_model=Union[List[RecommendationResponse], CandidateSearchExplainResponse]
+)
 async def semantic_candidate_search(
     query: str,
     top_k: int = 10,
+    mode: Literal["hybrid", "vector", "lexical"] = "hybrid",
+    explain: bool = False,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Semantic search for candidates using natural language query"""
+    """
+    Search candidates by keywords and meaning (BM25 and embeddings, fused).
     
-    # Get all resumes
-    resumes_result = await db.execute(
-        select(Resume).filter(Resume.uploader_id == current_user.id)
-    )
-    all_resumes = resumes_result.scalars().all()
-    
-    if not all_resumes:
-        return []
-    
-    # Create a temporary "job" from the search query
-    from app.models.job import Job as JobModel
-    temp_job = JobModel(
-        title=query,
-        description=query,
-        company="Search",
-        recruiter_id=current_user.id
-    )
+    Structured clauses filter before scoring: skill:python, exp>=5,
+    exp:3..8, created>=2026-01-01, fraud<=0.3, "exact phrase" and -word
+    to exclude. explain=true returns the filter plan and stage timings.
+    """
     
-    # Find matching candidates
-    recommendations = await recommendation_service.find_matching_candidates(
-        job=temp_job,
-        all_resumes=all_resumes,
-        top_k=top_k
-    )
+    try:
+        search = await recommendation_service.query_candidates(
+            db=db,
+            recruiter_id=current_user.id,
+            query=query,
+            top_k=top_k,
+            mode=mode
+        )
+    except QuerySyntaxError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
-    return [RecommendationResponse(**rec) for rec in recommendations]
+    results = [RecommendationResponse(**rec) for rec in search["results"]]
+    if explain:
+        return CandidateSearchExplainResponse(**dict(search, results=results))
+    return results
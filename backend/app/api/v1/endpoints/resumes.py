@@ -11,6 +11,7 @@ from app.models.user import User
 from app.models.resume import Resume
 from app.schemas.resume import ResumeResponse, ResumeDetailResponse
 from app.services.resume_parser import ResumeParser
+from app.services.recommendation_service import recommendation_service
 from app.core.config import settings
 
 router = APIRouter()
@@ -80,6 +81,12 @@ async def upload_resume(
         current_user.resumes_processed_this_month += 1
         await db.commit()
         
+        # Add the resume to the recruiter's vector index
+        try:
+            await recommendation_service.index_resume(db_resume, db)
+        except Exception as e:
+            print(f"Error indexing resume {db_resume.id}: {e}")
+        
         return ResumeResponse.model_validate(db_resume)
         
     except Exception as e:
@@ -181,4 +188,7 @@ async def delete_resume(
     await db.delete(resume)
     await db.commit()
     
+    # Remove from the recruiter's vector search backend
+    await recommendation_service.remove_resume_from_index(db, current_user.id, resume_id)
+    
     return None
@@ -72,6 +72,61 @@ class Settings(BaseSettings):
     MAX_UPLOAD_SIZE_MB: int = 10
     ALLOWED_EXTENSIONS: str = ".pdf,.docx"
     
+    # ML Models (loaded lazily through the shared model registry)
+    EMBEDDING_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    SPACY_MODEL: str = "en_core_web_sm"
+    WHISPER_MODEL: str = "base"  # good balance of speed and accuracy
+    MODEL_IDLE_UNLOAD_SECONDS: int = 0  # 0 disables idle unloading
+    EMBEDDING_BACKEND: Literal["torch", "onnx"] = "torch"
+    ONNX_MODEL_DIR: str = "models/onnx"  # exported on first use
+    ONNX_QUANTIZE: bool = True  # dynamic int8 weight quantization
+    ONNX_INTRA_OP_THREADS: int = 0  # 0 lets ONNX Runtime decide
+    # Set while moving to a new EMBEDDING_MODEL_NAME: recruiters whose vectors haven't been
+    # re-embedded yet are still served from this model's vector space
+    EMBEDDING_PREVIOUS_MODEL_NAME: Optional[str] = None
+    EMBEDDING_MIGRATION_PAUSE_SECONDS: float = 0.5  # throttle between re-embedding batches
+    
+    # Vector Search
+    VECTOR_SEARCH_BACKEND: Literal["faiss", "pgvector", "numpy"] = "faiss"
+    VECTOR_INDEX_DIR: str = "indexes"
+    PGVECTOR_EF_SEARCH: int = 100  # HNSW candidate list size at query time
+    VECTOR_INDEX_TYPE: Literal["auto", "flat", "hnsw", "sq8", "ivfpq"] = "auto"  # FAISS backend only
+    VECTOR_HNSW_MIN_SIZE: int = 20000  # auto: flat below, HNSW from here
+    VECTOR_IVF_MIN_SIZE: int = 500000  # auto: IVF-PQ from here
+    HNSW_M: int = 32
+    HNSW_EF_CONSTRUCTION: int = 80
+    HNSW_EF_SEARCH: int = 64
+    IVF_NLIST: int = 0  # 0 picks ~4 * sqrt(n) inverted lists
+    IVF_NPROBE: int = 16
+    PQ_SUBQUANTIZERS: int = 48  # 384 dims / 48 = 8 dims per 8-bit code
+    VECTOR_RERANK_FACTOR: int = 4  # exact re-rank of k * factor compressed or projected hits, 0 disables
+    VECTOR_PCA_DIM: int = 0  # FAISS first pass over PCA-projected vectors (e.g. 128), 0 disables
+    VECTOR_PCA_MIN_SIZE: int = 5000  # smaller indexes keep full vectors
+    VECTOR_INDEX_MEMORY_BUDGET_MB: int = 0  # resident FAISS indexes per worker, LRU-evicted to disk; 0 is unlimited
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_MAX_BATCH_SIZE: int = 256  # texts coalesced from concurrent requests
+    EMBEDDING_BATCH_WAIT_MS: float = 5.0  # how long the executor waits for more requests
+    EMBEDDING_CACHE_SIZE: int = 10000  # in-memory LRU entries
+    EMBEDDING_CACHE_DIR: Optional[str] = "cache/embeddings"  # on-disk tier, None disables it
+    EMBEDDING_CHUNK_CHARS: int = 1000  # ~256 word pieces, the MiniLM input limit
+    EMBEDDING_CHUNK_OVERLAP: int = 200
+    SEMANTIC_SCORING: Literal["pooled", "max_sim"] = "pooled"  # max_sim keeps per-chunk vectors
+    
+    # Structured prefilter before semantic scoring
+    PREFILTER_MIN_SKILL_OVERLAP: int = 1  # required skills a candidate must have
+    PREFILTER_EXPERIENCE_TOLERANCE_YEARS: float = 2.0  # how far below experience_years_min to keep
+    PREFILTER_EXACT_SCORING_MAX: int = 5000  # smaller candidate sets skip the ANN index
+    
+    # Hybrid candidate search
+    LEXICAL_INDEX_SYNC_SECONDS: int = 60  # reconcile the in-process BM25 index with the database
+    HYBRID_SEARCH_DEPTH: int = 50  # hits taken from each ranking before fusion
+    
+    # Paginated recommendations
+    RECOMMENDATION_SNAPSHOT_DEPTH: int = 1000  # candidates ranked per search, paged from the snapshot
+    RECOMMENDATION_SNAPSHOT_MAX_DEPTH: int = 10000
+    RECOMMENDATION_SNAPSHOT_TTL_SECONDS: int = 900  # snapshots are kept in Redis (REDIS_URL), shared by all workers
+    SEARCH_RESULT_CACHE_MAX: int = 2048  # cached searches/rankings per worker, invalidated by index version; 0 disables
+    
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     
@@ -95,6 +150,11 @@ class Settings(BaseSettings):
         """Get temp directory as Path object"""
         return Path(self.TEMP_DIR)
     
+    @property
+    def vector_index_dir_path(self) -> Path:
+        """Get vector index directory as Path object"""
+        return Path(self.VECTOR_INDEX_DIR)
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -110,3 +170,4 @@ settings = get_settings()
 # Ensure upload directories exist
 settings.upload_dir_path.mkdir(parents=True, exist_ok=True)
 settings.temp_dir_path.mkdir(parents=True, exist_ok=True)
+settings.vector_index_dir_path.mkdir(parents=True, exist_ok=True)
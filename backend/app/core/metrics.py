@@ -0,0 +1,36 @@
+from typing import Callable, Dict, Iterable, List, Tuple
+
+
+# A collector yields (metric_name, labels, value) samples
+Sample = Tuple[str, Dict[str, str], float]
+Collector = Callable[[], Iterable[Sample]]
+
+_collectors: List[Collector] = []
+
+
+def register_collector(collector: Collector) -> Collector:
+    """Register a callable whose samples are exported on /metrics"""
+    _collectors.append(collector)
+    return collector
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for key, value in sorted(labels.items())
+    )
+    return "{" + pairs + "}"
+
+
+def render_prometheus() -> str:
+    """Render all registered samples in the Prometheus text exposition format"""
+    lines = []
+    for collector in _collectors:
+        try:
+            for name, labels, value in collector():
+                lines.append(f"{name}{_format_labels(labels)} {float(value)}")
+        except Exception as e:
+            print(f"Metrics collector {collector.__name__} failed: {e}")
+    return "\n".join(lines) + "\n"
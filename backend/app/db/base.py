@@ -2,8 +2,12 @@
 from app.db.base_class import Base
 from app.models.user import User
 from app.models.job import Job
-from app.models.resume import Resume
+from app.models.resume import Resume, ResumeSkill
 from app.models.application import Application
+from app.models.embedding_version import RecruiterEmbeddingVersion
+from app.models.scoring_profile import ScoringProfile
+from app.models.index_version import RecruiterIndexVersion
 
 # This ensures all models are imported and relationships can be resolved
-__all__ = ["Base", "User", "Job", "Resume", "Application"]
+__all__ = ["Base", "User", "Job", "Resume", "ResumeSkill", "Application", "RecruiterEmbeddingVersion",
+           "ScoringProfile", "RecruiterIndexVersion"]
@@ -1,9 +1,13 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from app.core.config import settings
 from app.api.v1.api import api_router
+from app.core.metrics import render_prometheus
+from app.services.model_registry import model_registry
 
 # Import all models to ensure they're registered
 from app.db import base  # This ensures all models are loaded
@@ -46,6 +50,32 @@ async def root():
 async def health_check():
     return {"status": "healthy", "genai": settings.GENAI_PROVIDER}
 
+
+@app.get("/health/models")
+async def model_health():
+    """Load state and resident memory of the shared ML models"""
+    return {"models": model_registry.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus-format counters (embedding cache and executor, vector indexes, ...)"""
+    # Import services so their collectors are registered
+    from app.services import (  # noqa: F401
+        embedding_cache, inference_executor, recommendation_snapshots, search_result_cache, vector_index
+    )
+    return render_prometheus()
+
+
+async def unload_idle_models_loop():
+    """Periodically release models that haven't been used recently"""
+    idle_seconds = settings.MODEL_IDLE_UNLOAD_SECONDS
+    while True:
+        await asyncio.sleep(max(idle_seconds / 4, 30))
+        unloaded = model_registry.unload_idle(idle_seconds)
+        if unloaded:
+            print(f"Unloaded idle models: {', '.join(unloaded)}")
+
 @app.on_event("startup")
 async def startup_event():
     """Seed templates on startup if needed"""
@@ -54,4 +84,21 @@ async def startup_event():
         await seed_resume_templates()
     except Exception as e:
         print(f"Template seeding info: {e}")
+    
+    # Memory-map persisted vector indexes instead of rebuilding them
+    from app.services.vector_index import vector_index_store
+    loaded = vector_index_store.load_all()
+    print(f"Loaded {loaded} vector indexes")
+    
+    if settings.MODEL_IDLE_UNLOAD_SECONDS > 0:
+        asyncio.create_task(unload_idle_models_loop())
+
+
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Let the inference worker finish its current batch and close the snapshot store"""
+    from app.services.inference_executor import shutdown_executors
+    from app.services.recommendation_snapshots import recommendation_snapshots
+    await asyncio.to_thread(shutdown_executors)
+    await recommendation_snapshots.close()
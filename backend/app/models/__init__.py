@@ -1,6 +1,9 @@
 from app.models.user import User
-from app.models.resume import Resume
+from app.models.resume import Resume, ResumeSkill
 from app.models.job import Job
 from app.models.application import Application
+from app.models.embedding_version import RecruiterEmbeddingVersion
+from app.models.scoring_profile import ScoringProfile
+from app.models.index_version import RecruiterIndexVersion
 from app.models.interview import Interview  # ADDED THIS LINE
 from app.models.resume_builder import ResumeTemplate, GeneratedResume
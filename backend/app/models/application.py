@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
@@ -6,6 +6,10 @@ from app.db.base_class import Base
 
 class Application(Base):
     __tablename__ = "applications"
+    __table_args__ = (
+        # Ranking within a job, and the set-based re-weighting
+        Index("ix_applications_job_id_match_score", "job_id", "match_score"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False)
@@ -16,6 +20,8 @@ class Application(Base):
     skill_match_score = Column(Float, nullable=True)
     experience_match_score = Column(Float, nullable=True)
     semantic_similarity_score = Column(Float, nullable=True)
+    # sha256 of the scoring inputs (resume, job, scorer version, weights); unchanged means the scores are current
+    score_fingerprint = Column(String(64), nullable=True)
     
     # GenAI explanation
     explanation = Column(Text, nullable=True)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+
+class RecruiterEmbeddingVersion(Base):
+    """Vector space a recruiter's searches use, recorded when a re-embedding migration switches them over"""
+    __tablename__ = "recruiter_embedding_versions"
+    
+    recruiter_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    embedding_model = Column(String(100), nullable=False)  # Version tag, as in Resume.embedding_model
+    switched_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
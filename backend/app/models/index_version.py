@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+
+class RecruiterIndexVersion(Base):
+    """
+    Counter bumped by database triggers whenever a recruiter's resumes or
+    resume skills are inserted, updated (including re-embedding) or deleted.
+    Search result caches key on it.
+    """
+    __tablename__ = "recruiter_index_versions"
+    
+    # No foreign key: the triggers also fire while a user's resumes are cascade-deleted
+    recruiter_id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
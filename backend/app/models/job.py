@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Boolean, LargeBinary
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
@@ -22,7 +22,16 @@ class Job(Base):
     experience_years_max = Column(Integer, nullable=True)
     
     # Vector embedding for semantic search
-    embedding_vector = Column(JSON, nullable=True)  # Will store as JSON, FAISS for search
+    embedding = Column(LargeBinary, nullable=True)  # L2-normalized little-endian float32, see app.utils.vectors
+    embedding_model = Column(String(100), nullable=True)  # Model that produced the embedding
+    embedding_fingerprint = Column(String(64), nullable=True)  # sha256 of the embedded text
+    chunk_embeddings = Column(LargeBinary, nullable=True)  # (n_chunks, dim) float32, only kept for max-sim scoring
+    
+    # Written by the re-embedding migration; moved into the columns above when the recruiter switches over
+    pending_embedding = Column(LargeBinary, nullable=True)
+    pending_embedding_model = Column(String(100), nullable=True)
+    pending_embedding_fingerprint = Column(String(64), nullable=True)
+    pending_chunk_embeddings = Column(LargeBinary, nullable=True)
     
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Float, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Float, Boolean, LargeBinary, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
@@ -6,6 +6,10 @@ from app.db.base_class import Base
 
 class Resume(Base):
     __tablename__ = "resumes"
+    __table_args__ = (
+        # Experience-range prefilter within one recruiter's pool
+        Index("ix_resumes_uploader_experience", "uploader_id", "experience_years"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     uploader_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -32,7 +36,16 @@ class Resume(Base):
     fraud_flags = Column(JSON, nullable=True)  # List of detected issues
     
     # Vector embedding
-    embedding_vector = Column(JSON, nullable=True)
+    embedding = Column(LargeBinary, nullable=True)  # L2-normalized little-endian float32, see app.utils.vectors
+    embedding_model = Column(String(100), nullable=True)  # Model that produced the embedding
+    embedding_fingerprint = Column(String(64), nullable=True)  # sha256 of the embedded text
+    chunk_embeddings = Column(LargeBinary, nullable=True)  # (n_chunks, dim) float32, only kept for max-sim scoring
+    
+    # Written by the re-embedding migration; moved into the columns above when the recruiter switches over
+    pending_embedding = Column(LargeBinary, nullable=True)
+    pending_embedding_model = Column(String(100), nullable=True)
+    pending_embedding_fingerprint = Column(String(64), nullable=True)
+    pending_chunk_embeddings = Column(LargeBinary, nullable=True)
     
     processing_status = Column(String, default="pending")  # pending, processing, completed, failed
     processing_error = Column(Text, nullable=True)
@@ -43,3 +56,15 @@ class Resume(Base):
     # Relationships - use string references
     uploader = relationship("User", back_populates="resumes", lazy="selectin")
     applications = relationship("Application", back_populates="resume", cascade="all, delete-orphan", lazy="selectin")
+
+
+class ResumeSkill(Base):
+    """Skill inverted index: one row per resume and lower-cased skill"""
+    __tablename__ = "resume_skills"
+    __table_args__ = (
+        Index("ix_resume_skills_uploader_skill", "uploader_id", "skill"),
+    )
+    
+    resume_id = Column(Integer, ForeignKey("resumes.id", ondelete="CASCADE"), primary_key=True)
+    skill = Column(String(100), primary_key=True)
+    uploader_id = Column(Integer, nullable=False)  # Denormalized so lookups stay within one recruiter
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index, text
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+
+class ScoringProfile(Base):
+    """Overall match weights for a recruiter (job_id NULL) or one of their jobs"""
+    __tablename__ = "scoring_profiles"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    recruiter_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), nullable=True)
+    
+    # Normalized to sum to 1, so match_score stays on the 0-100 scale
+    skill_weight = Column(Float, nullable=False)
+    experience_weight = Column(Float, nullable=False)
+    semantic_weight = Column(Float, nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (
+        # One default profile per recruiter and at most one per job
+        Index(
+            "ix_scoring_profiles_recruiter_default", "recruiter_id",
+            unique=True, postgresql_where=text("job_id IS NULL")
+        ),
+        Index("ix_scoring_profiles_job_id", "job_id", unique=True),
+    )
@@ -8,6 +8,47 @@ class ApplicationCreate(BaseModel):
     resume_id: int
 
 
+class BulkMatchCreate(BaseModel):
+    job_id: int
+    # Explicit resume ids, or None to match every resume passing the filters
+    resume_ids: Optional[List[int]] = None
+    min_experience_years: Optional[float] = None
+    uploaded_after: Optional[datetime] = None
+
+
+class BulkMatchResult(BaseModel):
+    application_id: int
+    resume_id: int
+    match_score: float
+    skill_match_score: float
+    experience_match_score: float
+    semantic_similarity_score: float
+
+
+class BulkMatchResponse(BaseModel):
+    job_id: int
+    candidates_considered: int
+    created_count: int
+    skipped_existing: int
+    applications: List[BulkMatchResult]
+
+
+class ScoringProfileUpdate(BaseModel):
+    # Relative weights; normalized to sum to 1
+    skill_weight: float
+    experience_weight: float
+    semantic_weight: float
+
+
+class ScoringProfileResponse(BaseModel):
+    job_id: Optional[int]
+    source: str  # job, recruiter or default
+    skill: float
+    experience: float
+    semantic: float
+    applications_rescored: Optional[int] = None
+
+
 class ApplicationUpdate(BaseModel):
     recruiter_status: Optional[str] = None
     recruiter_notes: Optional[str] = None
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 
+from app.utils.vectors import decode_embedding
+
 
 class JobBase(BaseModel):
     title: str
@@ -38,4 +40,12 @@ class JobResponse(JobBase):
 
 
 class JobDetailResponse(JobResponse):
-    embedding_vector: Optional[List[float]]
+    embedding_vector: Optional[List[float]] = Field(default=None, validation_alias="embedding")
+    embedding_model: Optional[str] = None
+    
+    @field_validator("embedding_vector", mode="before")
+    @classmethod
+    def decode_embedding(cls, value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return decode_embedding(bytes(value)).tolist()
+        return value
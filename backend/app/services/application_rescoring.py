@@ -0,0 +1,157 @@
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.application import Application
+from app.models.job import Job
+from app.models.resume import Resume
+from app.services.document_embeddings import EmbeddingSpace, stored_document
+from app.services.matching_service import MatchingService, job_content_hash, resume_content_hash
+from app.services.recommendation_service import recommendation_service
+from app.services.scoring_profiles import resolve_weights, reweight_applications
+
+
+class ApplicationRescoringService:
+    """Recompute stored application scores whose inputs changed, and only those"""
+
+    def __init__(self, matching_service: MatchingService, batch_size: int = 1000):
+        self.matching_service = matching_service
+        self.batch_size = batch_size
+
+    async def rescore_application(
+        self,
+        db: AsyncSession,
+        application: Application,
+        job: Job,
+        resume: Resume
+    ) -> bool:
+        """Rescore one application; a no-op (False) if its input fingerprint is unchanged"""
+        space = await recommendation_service.serving_space(db, job.recruiter_id)
+        fingerprint = self.matching_service.resume_job_fingerprint(resume, job, space)
+        if application.score_fingerprint == fingerprint:
+            return False
+
+        job_doc = await recommendation_service.generate_job_document(job, db, space)
+        await recommendation_service.get_resume_embeddings([resume], db, space)
+        weights = (await resolve_weights(db, job.recruiter_id, [job.id]))[job.id]
+        scores = await self.matching_service.match_resume_to_job(resume, job, job_doc, space, weights)
+        application.match_score = scores['overall_match_score']
+        application.skill_match_score = scores['skill_match_score']
+        application.experience_match_score = scores['experience_match_score']
+        application.semantic_similarity_score = scores['semantic_similarity_score']
+        application.score_fingerprint = scores['input_fingerprint']
+        await db.commit()
+        return True
+
+    async def _score_stale(
+        self,
+        db: AsyncSession,
+        job: Job,
+        stale: List[tuple],
+        space: EmbeddingSpace,
+        weights: Dict[str, float]
+    ) -> List[Dict]:
+        """Bulk-score (application row, fingerprint) pairs against one job; returns update rows"""
+        resumes_result = await db.execute(select(Resume).filter(Resume.id.in_([row.resume_id for row, _ in stale])))
+        # Re-encodes resumes whose text changed since their vector was stored
+        _, resumes = await recommendation_service.get_resume_embeddings(resumes_result.scalars().all(), db, space)
+        documents = {
+            resume.id: stored_document(resume.embedding, resume.chunk_embeddings, resume.embedding_model, space)
+            for resume in resumes
+        }
+        scorable = [(row, fingerprint) for row, fingerprint in stale if documents.get(row.resume_id) is not None]
+        if not scorable:
+            return []
+
+        resumes_by_id = {resume.id: resume for resume in resumes}
+        scorable_resumes = [resumes_by_id[row.resume_id] for row, _ in scorable]
+        job_doc = await recommendation_service.generate_job_document(job, db, space)
+        scores = self.matching_service.match_resumes_to_job_bulk(
+            job,
+            [resume.skills for resume in scorable_resumes],
+            [resume.experience_years for resume in scorable_resumes],
+            np.vstack([documents[resume.id].vector for resume in scorable_resumes]),
+            job_doc.vector,
+            resume_chunks=[documents[resume.id].chunks for resume in scorable_resumes],
+            job_chunks=job_doc.chunks,
+            weights=weights
+        )
+
+        return [
+            {
+                'id': row.id,
+                'match_score': float(scores['overall_match_score'][i]),
+                'skill_match_score': float(scores['skill_match_score'][i]),
+                'experience_match_score': float(scores['experience_match_score'][i]),
+                'semantic_similarity_score': float(scores['semantic_similarity_score'][i]),
+                'score_fingerprint': fingerprint,
+            }
+            for i, (row, fingerprint) in enumerate(scorable)
+        ]
+
+    async def rescore_stale(self, db: AsyncSession, recruiter_id: int, job_id: Optional[int] = None) -> Dict:
+        """
+        Rescore the recruiter's applications whose input fingerprint changed.
+
+        Fingerprints are computed from small columns (the resume text is
+        hashed by the database), so unchanged applications cost a row read;
+        only stale ones are embedded, scored in bulk and updated. match_score
+        of the rest is brought in line with the current weights in SQL.
+        """
+        started = time.perf_counter()
+        space = await recommendation_service.serving_space(db, recruiter_id)
+
+        jobs_query = select(Job).filter(Job.recruiter_id == recruiter_id).order_by(Job.id)
+        if job_id is not None:
+            jobs_query = jobs_query.filter(Job.id == job_id)
+        jobs = (await db.execute(jobs_query)).scalars().all()
+        weights_by_job = await resolve_weights(db, recruiter_id, [job.id for job in jobs])
+
+        report = {'jobs': len(jobs), 'checked': 0, 'rescored': 0, 'unchanged': 0, 'unscorable': 0}
+        for job in jobs:
+            job_hash = job_content_hash(job)
+            last_id = 0
+            while True:
+                rows = (await db.execute(
+                    select(
+                        Application.id,
+                        Application.resume_id,
+                        Application.score_fingerprint,
+                        Resume.skills,
+                        Resume.experience_years,
+                        func.md5(func.coalesce(Resume.raw_text, '')).label('text_digest')
+                    )
+                    .join(Resume, Application.resume_id == Resume.id)
+                    .filter(Application.job_id == job.id, Application.id > last_id)
+                    .order_by(Application.id)
+                    .limit(self.batch_size)
+                )).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                report['checked'] += len(rows)
+
+                stale = []
+                for row in rows:
+                    fingerprint = self.matching_service.input_fingerprint(
+                        resume_content_hash(row.skills, row.experience_years, row.text_digest), job_hash, space
+                    )
+                    if fingerprint != row.score_fingerprint:
+                        stale.append((row, fingerprint))
+                report['unchanged'] += len(rows) - len(stale)
+                if not stale:
+                    continue
+
+                updates = await self._score_stale(db, job, stale, space, weights_by_job[job.id])
+                if updates:
+                    await db.execute(update(Application), updates)
+                    await db.commit()
+                report['rescored'] += len(updates)
+                report['unscorable'] += len(stale) - len(updates)
+
+        report['reweighted'] = await reweight_applications(db, recruiter_id, job_id)
+        report['seconds'] = round(time.perf_counter() - started, 3)
+        return report
@@ -0,0 +1,70 @@
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.job import Job
+from app.models.resume import Resume, ResumeSkill
+from app.utils.sql import id_in
+
+
+def normalize_skill(skill: str) -> str:
+    """Key used in the skill index; matches the lower-cased comparison in MatchingService"""
+    return (skill or "").strip().lower()[:100]
+
+
+async def index_resume_skills(db: AsyncSession, resume: Resume) -> None:
+    """Replace a resume's rows in the skill inverted index (caller commits)"""
+    await db.execute(delete(ResumeSkill).filter(ResumeSkill.resume_id == resume.id))
+    skills = sorted({normalize_skill(skill) for skill in resume.skills or []} - {""})
+    if skills:
+        await db.execute(
+            insert(ResumeSkill),
+            [{"resume_id": resume.id, "uploader_id": resume.uploader_id, "skill": skill} for skill in skills]
+        )
+
+
+async def prefilter_candidates(
+    db: AsyncSession,
+    job: Job,
+    recruiter_id: int,
+    candidate_ids: Optional[List[int]] = None
+) -> Optional[List[int]]:
+    """
+    Resume ids worth scoring semantically for a job, or candidate_ids
+    unchanged (None: everyone) if the job has no skill or experience
+    requirement to filter on.
+
+    A candidate must share at least PREFILTER_MIN_SKILL_OVERLAP of the job's
+    required skills (via the resume_skills index) and be at most
+    PREFILTER_EXPERIENCE_TOLERANCE_YEARS below experience_years_min. Both
+    checks are index lookups, so the cost follows the survivors, not the pool.
+    """
+    skills = sorted({normalize_skill(skill) for skill in job.required_skills or []} - {""})
+    if not skills and job.experience_years_min is None:
+        return candidate_ids
+
+    query = select(Resume.id).filter(Resume.uploader_id == recruiter_id)
+    if candidate_ids is not None:
+        query = query.filter(id_in(Resume.id, candidate_ids))
+
+    if skills:
+        overlap = min(settings.PREFILTER_MIN_SKILL_OVERLAP, len(skills))
+        with_skills = (
+            select(ResumeSkill.resume_id)
+            .filter(ResumeSkill.uploader_id == recruiter_id, ResumeSkill.skill.in_(skills))
+            .group_by(ResumeSkill.resume_id)
+            .having(func.count() >= overlap)
+        )
+        query = query.filter(Resume.id.in_(with_skills))
+
+    if job.experience_years_min is not None:
+        # Unknown experience gets a neutral match score, so it isn't filtered out
+        query = query.filter(or_(
+            Resume.experience_years.is_(None),
+            Resume.experience_years >= job.experience_years_min - settings.PREFILTER_EXPERIENCE_TOLERANCE_YEARS
+        ))
+
+    result = await db.execute(query.order_by(Resume.id))
+    return list(result.scalars().all())
@@ -0,0 +1,262 @@
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import Boolean, and_, false, func, not_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.resume import Resume, ResumeSkill
+from app.services.candidate_prefilter import normalize_skill
+from app.services.lexical_index import lexical_index_store, tokenize
+from app.utils.sql import id_in
+
+
+# -word and -"phrase" negate; quoted phrases keep their spaces
+CLAUSE_PATTERN = re.compile(r'(-?)(?:"([^"]*)"|(\S+))')
+COMPARISON_PATTERN = re.compile(r"^(exp|experience|created|fraud)(>=|<=|>|<|=|:)(.+)$", re.IGNORECASE)
+SKILL_PATTERN = re.compile(r"^skills?:(.+)$", re.IGNORECASE)
+
+# Larger keyword-filtered sets aren't shipped to Postgres; the SQL filters run per recruiter and are intersected here
+MAX_BOUND_IDS = 5000
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+@dataclass
+class CandidateFilter:
+    """One structured clause: positive filters narrow the candidate set, negated ones remove from it"""
+    label: str
+    source: str  # "sql" (indexed column or resume_skills) or "lexical" (BM25 posting lists)
+    negated: bool = False
+    condition: Any = None  # sql: boolean expression over Resume
+    terms: List[str] = field(default_factory=list)  # lexical: documents must contain every term
+    estimate: Optional[int] = None
+
+
+@dataclass
+class CandidateQuery:
+    text: List[str]  # free-text words and phrases, scored by vector/lexical search
+    filters: List[CandidateFilter]
+
+    @property
+    def free_text(self) -> str:
+        return " ".join(self.text)
+
+
+def _number(value: str, clause: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        raise QuerySyntaxError(f"Expected a number in '{clause}'")
+
+
+def _date(value: str, clause: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise QuerySyntaxError(f"Expected a date like 2026-01-31 in '{clause}'")
+    # created_at is timestamptz; dates without an offset are UTC
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _compare(column, op: str, value):
+    return {
+        ">=": column >= value,
+        "<=": column <= value,
+        ">": column > value,
+        "<": column < value,
+        "=": column == value,
+        ":": column == value,
+    }[op]
+
+
+def _comparison_condition(field_name: str, op: str, value: str, clause: str):
+    field_name = field_name.lower()
+
+    if field_name in ("exp", "experience"):
+        if op in (":", "=") and ".." in value:
+            low, high = value.split("..", 1)
+            return Resume.experience_years.between(_number(low, clause), _number(high, clause))
+        return _compare(Resume.experience_years, op, _number(value, clause))
+
+    if field_name == "created":
+        if op in (":", "="):
+            day = _date(value, clause)
+            return Resume.created_at.between(day, day + timedelta(days=1) - timedelta(microseconds=1))
+        return _compare(Resume.created_at, op, _date(value, clause))
+
+    # fraud: a ceiling on inflation_score; unscored resumes aren't suspicious
+    if op not in ("<", "<="):
+        raise QuerySyntaxError(f"fraud only takes a ceiling (fraud<=0.3), got '{clause}'")
+    return or_(Resume.inflation_score.is_(None), _compare(Resume.inflation_score, op, _number(value, clause)))
+
+
+def parse_candidate_query(query: str, recruiter_id: int) -> CandidateQuery:
+    """
+    Parse a search like: python aws exp>=5 "distributed systems" -intern
+
+    skill:x / skills:x,y   has the skill (resume_skills index)
+    exp>=5, exp:3..8       experience_years comparison or range
+    created>=2026-01-01    upload date comparison, created:2026-01-31 for a day
+    fraud<=0.3             inflation_score ceiling
+    "phrase"               must contain every word of the phrase; also scored
+    -clause                excludes matches of any of the above, or of a word
+    other words            free text, scored only
+    """
+    text: List[str] = []
+    filters: List[CandidateFilter] = []
+
+    for match in CLAUSE_PATTERN.finditer(query or ""):
+        negated = match.group(1) == "-"
+        phrase, word = match.group(2), match.group(3)
+        clause = match.group(0)
+
+        if phrase is not None:
+            terms = tokenize(phrase)
+            if not negated:
+                text.append(phrase)
+            if terms:
+                filters.append(CandidateFilter(f'"{phrase}"', "lexical", negated, terms=terms))
+            continue
+
+        skill_match = SKILL_PATTERN.match(word)
+        if skill_match:
+            for skill in filter(None, (normalize_skill(s) for s in skill_match.group(1).split(","))):
+                with_skill = select(ResumeSkill.resume_id).filter(
+                    ResumeSkill.uploader_id == recruiter_id, ResumeSkill.skill == skill
+                )
+                filters.append(CandidateFilter(f"skill:{skill}", "sql", negated, Resume.id.in_(with_skill)))
+            continue
+
+        comparison = COMPARISON_PATTERN.match(word)
+        if comparison:
+            condition = _comparison_condition(*comparison.groups(), clause)
+            filters.append(CandidateFilter(word.lower(), "sql", negated, condition))
+            continue
+
+        if negated:
+            terms = tokenize(word)
+            if terms:
+                filters.append(CandidateFilter(f"-{word}", "lexical", True, terms=terms))
+        else:
+            text.append(word)
+
+    return CandidateQuery(text, filters)
+
+
+async def plan_filters(db: AsyncSession, recruiter_id: int, filters: List[CandidateFilter]) -> List[CandidateFilter]:
+    """
+    Estimate each filter's match count and order them: positive filters most
+    selective first, exclusions last. SQL filters run as one WHERE clause,
+    ordered by Postgres; keyword filters are applied in plan order.
+    """
+    for candidate_filter in filters:
+        if candidate_filter.source == "lexical":
+            # Upper bound of the posting list intersection
+            candidate_filter.estimate = min(
+                lexical_index_store.document_frequency(recruiter_id, term) for term in candidate_filter.terms
+            )
+        else:
+            result = await db.execute(
+                select(func.count(Resume.id)).filter(Resume.uploader_id == recruiter_id, candidate_filter.condition)
+            )
+            candidate_filter.estimate = result.scalar() or 0
+
+    positive = sorted((f for f in filters if not f.negated), key=lambda f: f.estimate)
+    negated = [f for f in filters if f.negated]
+    return positive + negated
+
+
+def sql_condition(plan: List[CandidateFilter]):
+    """The plan's SQL filters as one condition over Resume; None if it has none"""
+    conditions = []
+    for candidate_filter in plan:
+        if candidate_filter.source != "sql":
+            continue
+        if candidate_filter.negated:
+            # Excludes matches only; a NULL comparison (unknown experience) isn't a match
+            conditions.append(not_(func.coalesce(candidate_filter.condition, false(), type_=Boolean)))
+        else:
+            conditions.append(candidate_filter.condition)
+    return and_(*conditions) if conditions else None
+
+
+def _stage(label: str, source: str, negated: bool, estimate: Optional[int], remaining: int, started: float) -> Dict:
+    return {
+        "stage": "filter",
+        "clause": label,
+        "source": source,
+        "negated": negated,
+        "estimate": estimate,
+        "remaining": remaining,
+        "ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+async def apply_filters(
+    db: AsyncSession,
+    recruiter_id: int,
+    plan: List[CandidateFilter],
+    stages: List[Dict]
+) -> Optional[Set[int]]:
+    """
+    Run the planned filters; None if there are none. Appends per-stage stats to stages.
+
+    Keyword filters narrow the set first (posting lists, in memory), then
+    the SQL filters run as one query, restricted to the keyword survivors
+    when there are few enough to bind, then keyword exclusions.
+    """
+    if not plan:
+        return None
+
+    candidates: Optional[Set[int]] = None
+    for candidate_filter in plan:
+        if candidate_filter.source != "lexical" or candidate_filter.negated:
+            continue
+        started = time.perf_counter()
+        matched = lexical_index_store.documents_with_all(recruiter_id, candidate_filter.terms)
+        candidates = set(matched) if candidates is None else candidates & matched
+        stages.append(_stage(
+            candidate_filter.label, "lexical", False, candidate_filter.estimate, len(candidates), started
+        ))
+        if not candidates:
+            return candidates
+
+    condition = sql_condition(plan)
+    if condition is not None:
+        started = time.perf_counter()
+        query = select(Resume.id).filter(Resume.uploader_id == recruiter_id, condition)
+        if candidates is not None and len(candidates) <= MAX_BOUND_IDS:
+            query = query.filter(id_in(Resume.id, sorted(candidates)))
+        matched = set((await db.execute(query)).scalars().all())
+        candidates = matched if candidates is None else candidates & matched
+        sql_filters = [f for f in plan if f.source == "sql"]
+        stages.append(_stage(
+            " ".join(f"-{f.label}" if f.negated else f.label for f in sql_filters),
+            "sql",
+            all(f.negated for f in sql_filters),
+            min((f.estimate for f in sql_filters if not f.negated), default=None),
+            len(candidates),
+            started
+        ))
+
+    for candidate_filter in plan:
+        if candidate_filter.source != "lexical" or not candidate_filter.negated:
+            continue
+        if candidates is not None and not candidates:
+            break
+        started = time.perf_counter()
+        if candidates is None:
+            # Only exclusions: start from all of the recruiter's resumes
+            result = await db.execute(select(Resume.id).filter(Resume.uploader_id == recruiter_id))
+            candidates = set(result.scalars().all())
+        candidates -= lexical_index_store.documents_with_all(recruiter_id, candidate_filter.terms)
+        stages.append(_stage(
+            candidate_filter.label, "lexical", True, candidate_filter.estimate, len(candidates), started
+        ))
+
+    return candidates
@@ -0,0 +1,114 @@
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.job import Job
+from app.models.resume import Resume
+from app.services.embedding_backends import get_embedder
+from app.services.embedding_cache import get_embedding_cache
+from app.utils.text_chunks import chunk_text
+from app.utils.vectors import decode_embedding, decode_embeddings, pool_chunks
+
+
+def document_embedding_version(model_name: Optional[str] = None) -> str:
+    """Tag stored next to document vectors; changing the model or chunking invalidates them"""
+    return (
+        f"{get_embedder(model_name).version}"
+        f"+chunks{settings.EMBEDDING_CHUNK_CHARS}o{settings.EMBEDDING_CHUNK_OVERLAP}"
+    )
+
+
+DOCUMENT_EMBEDDING_VERSION = document_embedding_version()
+
+
+class EmbeddingSpace(NamedTuple):
+    """Model whose vectors a recruiter is served from, and their stored version tag"""
+    model_name: Optional[str]  # None is EMBEDDING_MODEL_NAME
+    version: str
+
+
+def embedding_space(model_name: Optional[str] = None) -> EmbeddingSpace:
+    if model_name == settings.EMBEDDING_MODEL_NAME:
+        model_name = None
+    return EmbeddingSpace(model_name, document_embedding_version(model_name))
+
+
+CURRENT_SPACE = embedding_space()
+
+
+def job_document_text(job: Job) -> str:
+    """All job information, as the text that gets embedded"""
+    job_text = f"{job.title}\n{job.description}"
+    if job.requirements:
+        job_text += f"\n{job.requirements}"
+    if job.required_skills:
+        job_text += f"\nRequired skills: {', '.join(job.required_skills)}"
+    if job.location:
+        job_text += f"\nLocation: {job.location}"
+    return job_text
+
+
+def resume_document_text(resume: Resume) -> str:
+    """Resume information, as the text that gets embedded"""
+    resume_text = ""
+    if resume.candidate_name:
+        resume_text += f"{resume.candidate_name}\n"
+    if resume.raw_text:
+        resume_text += resume.raw_text  # Full text; long resumes are chunked when embedded
+    if resume.skills:
+        resume_text += f"\nSkills: {', '.join(resume.skills)}"
+    if resume.experience_years:
+        resume_text += f"\nExperience: {resume.experience_years} years"
+    return resume_text
+
+
+class DocumentEmbedding(NamedTuple):
+    vector: np.ndarray  # pooled document vector, L2-normalized
+    chunks: np.ndarray  # (n_chunks, dim) chunk vectors, L2-normalized
+
+
+async def embed_documents(texts: List[str], space: EmbeddingSpace = CURRENT_SPACE) -> List[DocumentEmbedding]:
+    """
+    Embed full documents as overlapping chunks pooled into one vector each.
+
+    The chunks of all documents go to the model in a single batch, through
+    the content-hash cache, so unchanged chunks are never encoded twice.
+    """
+    chunk_lists = [
+        chunk_text(text, settings.EMBEDDING_CHUNK_CHARS, settings.EMBEDDING_CHUNK_OVERLAP)
+        for text in texts
+    ]
+    flat = [chunk for chunks in chunk_lists for chunk in chunks]
+    if not flat:
+        return []
+    vectors = await get_embedding_cache(space.model_name).encode(flat)
+
+    documents = []
+    start = 0
+    for chunks in chunk_lists:
+        chunk_vectors = vectors[start:start + len(chunks)]
+        start += len(chunks)
+        # Longer chunks carry more of the document
+        weights = [max(len(chunk), 1) for chunk in chunks]
+        documents.append(DocumentEmbedding(pool_chunks(chunk_vectors, weights), chunk_vectors))
+    return documents
+
+
+async def embed_document(text: str, space: EmbeddingSpace = CURRENT_SPACE) -> DocumentEmbedding:
+    return (await embed_documents([text], space))[0]
+
+
+def stored_document(
+    embedding: Optional[bytes],
+    chunk_embeddings: Optional[bytes],
+    embedding_model: Optional[str],
+    space: EmbeddingSpace = CURRENT_SPACE
+) -> Optional[DocumentEmbedding]:
+    """Document embedding from stored columns, or None if missing or from another model"""
+    if not embedding or embedding_model != space.version:
+        return None
+    vector = decode_embedding(embedding)
+    # Without stored chunks the pooled vector stands in as the only chunk
+    chunks = decode_embeddings([chunk_embeddings], vector.shape[0]) if chunk_embeddings else vector[None, :]
+    return DocumentEmbedding(vector, chunks)
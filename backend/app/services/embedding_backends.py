@@ -0,0 +1,207 @@
+import json
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.model_registry import get_onnx_embedder, get_sentence_transformer
+
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model.int8.onnx"
+ONNX_META_FILE = "embedder.json"
+
+
+class Embedder:
+    """Turns texts into sentence embeddings; vectors are normalized by the caller"""
+
+    name = "base"
+
+    def __init__(self, model_name: Optional[str] = None):
+        # None follows EMBEDDING_MODEL_NAME
+        self._model_name = model_name
+
+    @property
+    def model_name(self) -> str:
+        return self._model_name or settings.EMBEDDING_MODEL_NAME
+
+    @property
+    def version(self) -> str:
+        """Tag stored with every vector this backend produces"""
+        return self.model_name
+
+    def encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        raise NotImplementedError
+
+
+class TorchEmbedder(Embedder):
+    """SentenceTransformer.encode on PyTorch"""
+
+    name = "torch"
+
+    def encode(self, texts, batch_size):
+        return get_sentence_transformer(self._model_name).encode(
+            texts, batch_size=batch_size, convert_to_numpy=True
+        )
+
+
+class OnnxModel(NamedTuple):
+    tokenizer: object
+    session: object
+    input_names: List[str]
+    max_seq_length: int
+    pooling: str
+
+
+def onnx_model_dir(model_name: Optional[str] = None) -> Path:
+    return Path(settings.ONNX_MODEL_DIR) / (model_name or settings.EMBEDDING_MODEL_NAME).replace("/", "_")
+
+
+def export_onnx_model(
+    model_dir: Optional[Path] = None,
+    quantize: bool = True,
+    model_name: Optional[str] = None
+) -> Path:
+    """
+    Export the sentence transformer's encoder to ONNX, plus a dynamically
+    int8-quantized copy. Pooling and normalization are done in NumPy.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model_name = model_name or settings.EMBEDDING_MODEL_NAME
+    model_dir = model_dir or onnx_model_dir(model_name)
+    model_dir.mkdir(parents=True, exist_ok=True)
+
+    # A private copy: the shared registry instance may be serving requests
+    sentence_transformer = SentenceTransformer(model_name, device="cpu")
+    transformer, pooling = sentence_transformer[0], sentence_transformer[1]
+    tokenizer = transformer.tokenizer
+    tokenizer.save_pretrained(str(model_dir))
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class Encoder(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+    fp32_path = model_dir / ONNX_MODEL_FILE
+    torch.onnx.export(
+        Encoder(transformer.auto_model).eval(),
+        tuple(sample[name] for name in input_names),
+        str(fp32_path),
+        input_names=input_names,
+        output_names=["last_hidden_state"],
+        dynamic_axes=dynamic_axes,
+        opset_version=17,
+        dynamo=False
+    )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(fp32_path), str(model_dir / ONNX_INT8_MODEL_FILE), weight_type=QuantType.QInt8)
+
+    meta = {
+        "model": model_name,
+        "max_seq_length": transformer.max_seq_length,
+        "pooling": "cls" if pooling.pooling_mode_cls_token else "mean",
+    }
+    (model_dir / ONNX_META_FILE).write_text(json.dumps(meta))
+    return model_dir
+
+
+def load_onnx_model(model_name: Optional[str] = None) -> OnnxModel:
+    """Tokenizer and ONNX Runtime session, exporting the model on first use"""
+    import onnxruntime
+    from transformers import AutoTokenizer
+
+    model_name = model_name or settings.EMBEDDING_MODEL_NAME
+    model_dir = onnx_model_dir(model_name)
+    model_file = ONNX_INT8_MODEL_FILE if settings.ONNX_QUANTIZE else ONNX_MODEL_FILE
+    if not (model_dir / model_file).exists() or not (model_dir / ONNX_META_FILE).exists():
+        print(f"Exporting {model_name} to ONNX in {model_dir}...")
+        export_onnx_model(model_dir, quantize=settings.ONNX_QUANTIZE, model_name=model_name)
+
+    meta = json.loads((model_dir / ONNX_META_FILE).read_text())
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if settings.ONNX_INTRA_OP_THREADS:
+        options.intra_op_num_threads = settings.ONNX_INTRA_OP_THREADS
+    session = onnxruntime.InferenceSession(
+        str(model_dir / model_file), options, providers=["CPUExecutionProvider"]
+    )
+    return OnnxModel(
+        tokenizer=AutoTokenizer.from_pretrained(str(model_dir)),
+        session=session,
+        input_names=[i.name for i in session.get_inputs()],
+        max_seq_length=meta["max_seq_length"],
+        pooling=meta["pooling"],
+    )
+
+
+class OnnxEmbedder(Embedder):
+    """Exported encoder on ONNX Runtime (CPU), optionally int8 weight-quantized"""
+
+    name = "onnx"
+
+    @property
+    def version(self) -> str:
+        # Quantized vectors differ slightly, so they never mix with PyTorch ones
+        suffix = "onnx-int8" if settings.ONNX_QUANTIZE else "onnx"
+        return f"{self.model_name}+{suffix}"
+
+    def encode(self, texts, batch_size):
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        model = get_onnx_embedder(self._model_name)
+        batches = []
+        # Sorting by length keeps padding per batch small
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            batch = [texts[i] for i in order[start:start + batch_size]]
+            inputs = model.tokenizer(
+                batch,
+                padding=True,
+                truncation=True,
+                max_length=model.max_seq_length,
+                return_tensors="np"
+            )
+            feed = {name: inputs[name].astype(np.int64) for name in model.input_names}
+            hidden = model.session.run(None, feed)[0]
+            if model.pooling == "cls":
+                batches.append(hidden[:, 0])
+            else:
+                mask = inputs["attention_mask"][..., None].astype(np.float32)
+                batches.append((hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9))
+
+        embeddings = np.empty((len(texts), batches[0].shape[-1]), dtype=np.float32)
+        embeddings[order] = np.vstack(batches)
+        return embeddings
+
+
+EMBEDDER_CLASSES = {
+    TorchEmbedder.name: TorchEmbedder,
+    OnnxEmbedder.name: OnnxEmbedder,
+}
+
+EMBEDDERS = {name: embedder_class() for name, embedder_class in EMBEDDER_CLASSES.items()}
+
+# Embedders pinned to another model, e.g. EMBEDDING_PREVIOUS_MODEL_NAME during a migration
+_model_embedders: Dict[Tuple[str, str], Embedder] = {}
+
+
+def get_embedder(model_name: Optional[str] = None) -> Embedder:
+    """Embedding backend selected by EMBEDDING_BACKEND, for EMBEDDING_MODEL_NAME unless model_name is given"""
+    if model_name is None or model_name == settings.EMBEDDING_MODEL_NAME:
+        return EMBEDDERS[settings.EMBEDDING_BACKEND]
+    key = (settings.EMBEDDING_BACKEND, model_name)
+    if key not in _model_embedders:
+        _model_embedders[key] = EMBEDDER_CLASSES[settings.EMBEDDING_BACKEND](model_name)
+    return _model_embedders[key]
@@ -0,0 +1,191 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import register_collector
+from app.services.embedding_backends import get_embedder
+from app.services.inference_executor import MicroBatchingExecutor, embedding_executor, get_embedding_executor
+from app.utils.vectors import EMBEDDING_DTYPE, normalize
+
+
+CacheKey = Tuple[str, str]
+
+
+class EmbeddingCache:
+    """
+    Embedding cache keyed by (model_version, sha256(normalized_text)).
+
+    Lookups go through a bounded in-memory LRU, then a persistent on-disk
+    tier; only texts missing from both are sent to the model, in one batch
+    through the micro-batching executor. Cached vectors are L2-normalized
+    float32.
+    """
+
+    def __init__(
+        self,
+        model_version: str,
+        max_entries: int,
+        cache_dir: Optional[Path] = None,
+        executor: MicroBatchingExecutor = embedding_executor
+    ):
+        self.model_version = model_version
+        self.executor = executor
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._memory: "OrderedDict[CacheKey, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        return re.sub(r"\s+", " ", text or "").strip()
+
+    def key(self, text: str) -> CacheKey:
+        digest = hashlib.sha256(self.normalize_text(text).encode("utf-8")).hexdigest()
+        return self.model_version, digest
+
+    def _disk_path(self, key: CacheKey) -> Path:
+        model_version, digest = key
+        safe_model = re.sub(r"[^A-Za-z0-9_.-]", "_", model_version)
+        return self.cache_dir / safe_model / digest[:2] / f"{digest}.f32"
+
+    def _get_memory(self, key: CacheKey) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+            return vector
+
+    def _put_memory(self, key: CacheKey, vector: np.ndarray) -> None:
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _get_disk(self, key: CacheKey) -> Optional[np.ndarray]:
+        if self.cache_dir is None:
+            return None
+        try:
+            return np.frombuffer(self._disk_path(key).read_bytes(), dtype=EMBEDDING_DTYPE)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _put_disk(self, key: CacheKey, vector: np.ndarray) -> None:
+        if self.cache_dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(vector.astype(EMBEDDING_DTYPE).tobytes())
+            tmp_path.replace(path)
+        except OSError as e:
+            print(f"Embedding cache write failed for {path}: {e}")
+
+    def lookup(self, texts: List[str]) -> Tuple[Dict[int, np.ndarray], List[int]]:
+        """Return cached vectors by position and the positions that missed"""
+        found: Dict[int, np.ndarray] = {}
+        missing: List[int] = []
+        for i, text in enumerate(texts):
+            key = self.key(text)
+            vector = self._get_memory(key)
+            if vector is not None:
+                self.memory_hits += 1
+                found[i] = vector
+                continue
+            vector = self._get_disk(key)
+            if vector is not None:
+                self.disk_hits += 1
+                self._put_memory(key, vector)
+                found[i] = vector
+                continue
+            self.misses += 1
+            missing.append(i)
+        return found, missing
+
+    def store(self, text: str, vector: np.ndarray) -> np.ndarray:
+        key = self.key(text)
+        vector = normalize(vector).astype(EMBEDDING_DTYPE)
+        self._put_memory(key, vector)
+        self._put_disk(key, vector)
+        return vector
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts through the cache; returns an (n, dim) normalized matrix"""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        found, missing = self.lookup(texts)
+        if missing:
+            # Duplicates within one call are encoded once
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            encoded = await self.executor.encode(unique_texts)
+            by_text = {
+                text: self.store(text, vector) for text, vector in zip(unique_texts, encoded)
+            }
+            for i in missing:
+                found[i] = by_text[texts[i]]
+
+        return np.vstack([found[i] for i in range(len(texts))]).astype(np.float32)
+
+    async def encode_one(self, text: str) -> np.ndarray:
+        return (await self.encode([text]))[0]
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "model_version": self.model_version,
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+embedding_cache = EmbeddingCache(
+    model_version=get_embedder().version,
+    max_entries=settings.EMBEDDING_CACHE_SIZE,
+    cache_dir=Path(settings.EMBEDDING_CACHE_DIR) if settings.EMBEDDING_CACHE_DIR else None
+)
+
+_model_caches: Dict[str, EmbeddingCache] = {}
+_model_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model_name: Optional[str] = None) -> EmbeddingCache:
+    """Cache for EMBEDDING_MODEL_NAME, or a separate one (and executor) for another model"""
+    if model_name is None or model_name == settings.EMBEDDING_MODEL_NAME:
+        return embedding_cache
+    with _model_caches_lock:
+        if model_name not in _model_caches:
+            _model_caches[model_name] = EmbeddingCache(
+                model_version=get_embedder(model_name).version,
+                max_entries=settings.EMBEDDING_CACHE_SIZE,
+                cache_dir=embedding_cache.cache_dir,
+                executor=get_embedding_executor(model_name)
+            )
+        return _model_caches[model_name]
+
+
+@register_collector
+def embedding_cache_metrics():
+    labels = {"model": embedding_cache.model_version}
+    yield "embedding_cache_hits_total", {**labels, "tier": "memory"}, embedding_cache.memory_hits
+    yield "embedding_cache_hits_total", {**labels, "tier": "disk"}, embedding_cache.disk_hits
+    yield "embedding_cache_misses_total", labels, embedding_cache.misses
+    yield "embedding_cache_entries", labels, embedding_cache.stats()["entries"]
@@ -0,0 +1,173 @@
+import asyncio
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import register_collector
+from app.services.embedding_backends import get_embedder
+
+
+@dataclass
+class EncodeRequest:
+    texts: List[str]
+    future: asyncio.Future
+    loop: asyncio.AbstractEventLoop
+
+
+def _set_result(future: asyncio.Future, result) -> None:
+    if not future.done():  # the caller may have been cancelled
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, error: BaseException) -> None:
+    if not future.done():
+        future.set_exception(error)
+
+
+class MicroBatchingExecutor:
+    """
+    Runs model inference on one dedicated worker thread.
+
+    Encode requests from concurrent coroutines are queued; the worker takes
+    the first one, waits up to max_wait_ms for more (or until max_batch_size
+    texts are pending), runs a single batched forward pass and resolves each
+    caller's future on its event loop. PyTorch and ONNX Runtime release the
+    GIL while computing, so the event loop keeps serving requests meanwhile.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_batch_size: int,
+        max_wait_ms: float
+    ):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000
+        self._queue: "queue.Queue[Optional[EncodeRequest]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="inference-executor", daemon=True)
+                self._thread.start()
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts without blocking the event loop"""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._ensure_started()
+        self._queue.put(EncodeRequest(list(texts), future, loop))
+        return await future
+
+    def _collect(self, first: EncodeRequest) -> List[EncodeRequest]:
+        """Gather requests that arrive within the wait window, up to max_batch_size texts"""
+        batch = [first]
+        pending = len(first.texts)
+        deadline = time.monotonic() + self.max_wait_seconds
+        while pending < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                # Shutdown: finish this batch, then stop
+                self._queue.put(None)
+                break
+            batch.append(request)
+            pending += len(request.texts)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            texts = [text for request in batch for text in request.texts]
+
+            try:
+                vectors = self.encode_fn(texts)
+            except Exception as e:
+                for request in batch:
+                    request.loop.call_soon_threadsafe(_set_exception, request.future, e)
+                continue
+
+            self.requests += len(batch)
+            self.batches += 1
+            self.texts += len(texts)
+
+            offset = 0
+            for request in batch:
+                result = vectors[offset:offset + len(request.texts)]
+                offset += len(request.texts)
+                request.loop.call_soon_threadsafe(_set_result, request.future, result)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "texts": self.texts,
+            "queued": self._queue.qsize(),
+            "avg_batch_texts": round(self.texts / self.batches, 1) if self.batches else 0.0,
+        }
+
+
+def _embedding_executor(model_name: Optional[str] = None) -> MicroBatchingExecutor:
+    return MicroBatchingExecutor(
+        lambda texts: get_embedder(model_name).encode(texts, batch_size=settings.EMBEDDING_BATCH_SIZE),
+        max_batch_size=settings.EMBEDDING_MAX_BATCH_SIZE,
+        max_wait_ms=settings.EMBEDDING_BATCH_WAIT_MS
+    )
+
+
+embedding_executor = _embedding_executor()
+
+# One worker per other model in use (the previous model while re-embedding)
+_model_executors: Dict[str, MicroBatchingExecutor] = {}
+_model_executors_lock = threading.Lock()
+
+
+def get_embedding_executor(model_name: Optional[str] = None) -> MicroBatchingExecutor:
+    if model_name is None or model_name == settings.EMBEDDING_MODEL_NAME:
+        return embedding_executor
+    with _model_executors_lock:
+        if model_name not in _model_executors:
+            _model_executors[model_name] = _embedding_executor(model_name)
+        return _model_executors[model_name]
+
+
+def shutdown_executors(timeout: float = 5.0) -> None:
+    for executor in [embedding_executor, *_model_executors.values()]:
+        executor.shutdown(timeout)
+
+
+@register_collector
+def embedding_executor_metrics():
+    stats = embedding_executor.stats()
+    yield "embedding_executor_requests_total", {}, stats["requests"]
+    yield "embedding_executor_batches_total", {}, stats["batches"]
+    yield "embedding_executor_texts_total", {}, stats["texts"]
+    yield "embedding_executor_queue_depth", {}, stats["queued"]
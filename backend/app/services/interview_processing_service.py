@@ -2,7 +2,6 @@ import os
 import asyncio
 from pathlib import Path
 from typing import Optional, Dict
-import whisper
 from datetime import datetime
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,25 +9,19 @@ from sqlalchemy import select
 
 from app.models.interview import Interview
 from app.core.config import settings
+from app.services.model_registry import get_whisper_model
 
 
 class InterviewProcessingService:
     """Service for processing interview recordings"""
     
     def __init__(self):
-        self.whisper_model = None
         self.recordings_dir = Path("recordings")
         self.recordings_dir.mkdir(exist_ok=True)
     
     def _load_whisper_model(self):
-        """Lazy load Whisper model"""
-        if self.whisper_model is None:
-            print("Loading Whisper model (this may take a moment)...")
-            # Using 'base' model - good balance of speed and accuracy
-            # Options: tiny, base, small, medium, large
-            self.whisper_model = whisper.load_model("base")
-            print("Whisper model loaded!")
-        return self.whisper_model
+        """Lazy load Whisper model from the shared model registry"""
+        return get_whisper_model()
     
     async def save_recording(
         self,
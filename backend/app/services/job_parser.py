@@ -1,18 +1,13 @@
 import re
 from typing import Dict, List, Optional
-import spacy
+
+from app.services.model_registry import get_spacy_nlp
 
 
 class JobParser:
     """Parse job descriptions and extract structured information"""
     
     def __init__(self):
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            print("Warning: spaCy model not loaded")
-            self.nlp = None
-        
         # Common skill keywords
         self.skill_keywords = {
             'programming': ['python', 'java', 'javascript', 'c++', 'c#', 'ruby', 'php', 'swift', 'kotlin', 'go', 'rust', 'typescript'],
@@ -23,6 +18,15 @@ class JobParser:
             'tools': ['git', 'jenkins', 'jira', 'linux', 'bash', 'agile', 'scrum'],
         }
     
+    @property
+    def nlp(self):
+        # Shared spaCy pipeline, loaded once per process on first use
+        try:
+            return get_spacy_nlp()
+        except OSError:
+            print("Warning: spaCy model not loaded")
+            return None
+    
     def extract_skills(self, text: str) -> List[str]:
         """Extract required skills from job description"""
         text_lower = text.lower()
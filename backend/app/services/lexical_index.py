@@ -0,0 +1,224 @@
+import heapq
+import math
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.resume import Resume
+
+
+# Keeps tech terms like c++, c#, node.js and ci/cd in one token
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or our the to was were will with "
+    "i me my we you your he she they them this that these those".split()
+)
+
+# Single characters that are real skills
+SHORT_TERMS = frozenset({"c", "r"})
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        token for token in TOKEN_PATTERN.findall((text or "").lower())
+        if token not in STOPWORDS and (len(token) > 1 or token in SHORT_TERMS)
+    ]
+
+
+def lexical_text(candidate_name: Optional[str], raw_text: Optional[str], skills: Optional[List[str]]) -> str:
+    """Resume fields that are searchable by keyword"""
+    return "\n".join(part for part in (candidate_name, raw_text, " ".join(skills or [])) if part)
+
+
+class BM25Index:
+    """Okapi BM25 inverted index over one recruiter's resumes, updated in place"""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_terms: Dict[int, Tuple[str, ...]] = {}  # for removal
+        self.doc_lengths: Dict[int, int] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: int, text: str) -> None:
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+        tokens = tokenize(text)
+        counts = Counter(tokens)
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        self.doc_terms[doc_id] = tuple(counts)
+        self.doc_lengths[doc_id] = len(tokens)
+        self.total_length += len(tokens)
+
+    def remove(self, doc_id: int) -> bool:
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return False
+        for term in terms:
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(doc_id, None)
+                if not docs:
+                    del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        return True
+
+    def search(self, query: str, k: int, allowed_ids: Optional[Set[int]] = None) -> List[Tuple[int, float]]:
+        """Top-k (doc_id, bm25 score), best first; only documents containing a query term"""
+        n = len(self.doc_lengths)
+        if n == 0:
+            return []
+        avg_length = self.total_length / n
+
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                if allowed_ids is not None and doc_id not in allowed_ids:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        # Ties by ascending id, like the vector backends
+        return heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+class LexicalIndexStore:
+    """
+    Per-recruiter in-process BM25 indexes.
+
+    An index is built from the database on first use and then kept current by
+    upload/delete hooks; it is reconciled against the database at most every
+    LEXICAL_INDEX_SYNC_SECONDS to pick up changes made by other workers.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[int, BM25Index] = {}
+        self._synced_at: Dict[int, float] = {}
+        # Bumped on every change to an index, so cached results can tell which state they came from
+        self._revisions: Dict[int, int] = {}
+        self._lock = threading.RLock()
+
+    def revision(self, recruiter_id: int) -> int:
+        with self._lock:
+            return self._revisions.get(recruiter_id, 0)
+
+    def _bump(self, recruiter_id: int) -> None:
+        self._revisions[recruiter_id] = self._revisions.get(recruiter_id, 0) + 1
+
+    async def sync(self, db: AsyncSession, recruiter_id: int) -> None:
+        synced_at = self._synced_at.get(recruiter_id)
+        if synced_at is not None and time.monotonic() - synced_at < settings.LEXICAL_INDEX_SYNC_SECONDS:
+            return
+
+        result = await db.execute(select(Resume.id).filter(Resume.uploader_id == recruiter_id))
+        stored_ids = set(result.scalars().all())
+        with self._lock:
+            index = self._indexes.setdefault(recruiter_id, BM25Index())
+            orphans = set(index.doc_lengths) - stored_ids
+            for orphan in orphans:
+                index.remove(orphan)
+            missing = sorted(stored_ids - set(index.doc_lengths))
+            if orphans or missing:
+                self._bump(recruiter_id)
+
+        chunk_size = settings.EMBEDDING_BATCH_SIZE * 16
+        for start in range(0, len(missing), chunk_size):
+            rows = (await db.execute(
+                select(Resume.id, Resume.candidate_name, Resume.raw_text, Resume.skills)
+                .filter(Resume.id.in_(missing[start:start + chunk_size]))
+            )).all()
+            with self._lock:
+                for row in rows:
+                    index.add(row.id, lexical_text(row.candidate_name, row.raw_text, row.skills))
+                self._bump(recruiter_id)
+
+        self._synced_at[recruiter_id] = time.monotonic()
+
+    def add(self, recruiter_id: int, resume_id: int, text: str) -> None:
+        with self._lock:
+            index = self._indexes.get(recruiter_id)
+            # Not loaded yet: the first sync reads it from the database
+            if index is not None:
+                index.add(resume_id, text)
+                self._bump(recruiter_id)
+
+    def remove(self, recruiter_id: int, resume_ids: Iterable[int]) -> None:
+        with self._lock:
+            index = self._indexes.get(recruiter_id)
+            if index is not None:
+                for resume_id in resume_ids:
+                    index.remove(resume_id)
+                self._bump(recruiter_id)
+
+    def document_frequency(self, recruiter_id: int, term: str) -> int:
+        with self._lock:
+            index = self._indexes.get(recruiter_id)
+            return len(index.postings.get(term, ())) if index is not None else 0
+
+    def documents_with_all(self, recruiter_id: int, terms: Iterable[str]) -> Set[int]:
+        """Ids of documents containing every term: an intersection of posting lists, rarest first"""
+        with self._lock:
+            index = self._indexes.get(recruiter_id)
+            if index is None:
+                return set()
+            posting_lists = sorted((index.postings.get(term, {}) for term in set(terms)), key=len)
+            if not posting_lists:
+                return set(index.doc_lengths)
+            result = set(posting_lists[0])
+            for docs in posting_lists[1:]:
+                result.intersection_update(docs)
+                if not result:
+                    break
+            return result
+
+    def documents_with_any(self, recruiter_id: int, terms: Iterable[str]) -> Set[int]:
+        with self._lock:
+            index = self._indexes.get(recruiter_id)
+            if index is None:
+                return set()
+            result: Set[int] = set()
+            for term in set(terms):
+                result.update(index.postings.get(term, ()))
+            return result
+
+    def search(
+        self,
+        recruiter_id: int,
+        query: str,
+        k: int,
+        allowed_ids: Optional[Iterable[int]] = None
+    ) -> List[Tuple[int, float]]:
+        with self._lock:
+            index = self._indexes.get(recruiter_id)
+            if index is None:
+                return []
+            return index.search(query, k, set(allowed_ids) if allowed_ids is not None else None)
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """Fuse ranked id lists: score(d) = sum over lists of 1 / (k + rank of d)"""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+lexical_index_store = LexicalIndexStore()
@@ -0,0 +1,260 @@
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.job import Job
+from app.models.resume import Resume
+from app.services.document_embeddings import EmbeddingSpace
+from app.services.matching_service import MatchingService
+from app.services.recommendation_service import recommendation_service
+from app.services.scoring_profiles import resolve_weights
+from app.utils.vectors import decode_embeddings
+
+
+def _skill_matrix(skill_lists: List[Optional[List[str]]], vocabulary: Dict[str, int]) -> sparse.csr_matrix:
+    """Sparse binary rows x vocabulary matrix of (lower-cased) skills"""
+    rows, columns = [], []
+    for row, skills in enumerate(skill_lists):
+        for column in {vocabulary[s.lower()] for s in skills or [] if s.lower() in vocabulary}:
+            rows.append(row)
+            columns.append(column)
+    return sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+        shape=(len(skill_lists), len(vocabulary))
+    )
+
+
+def _max_sim_matrix(
+    job_chunks: np.ndarray,
+    job_chunk_counts: np.ndarray,
+    resume_chunk_lists: List[np.ndarray],
+    max_entries: int = 1 << 24
+) -> np.ndarray:
+    """
+    (J, B) max-sim scores: per job, the mean over its chunks of the best
+    cosine among each resume's chunks, as utils.vectors.max_sim_bulk does
+    for one job. Resumes are taken in sub-blocks so the chunk-by-chunk
+    product stays under max_entries.
+    """
+    job_offsets = np.concatenate(([0], np.cumsum(job_chunk_counts)[:-1]))
+    max_width = max(max_entries // len(job_chunks), 1)
+    scores = np.empty((len(job_chunk_counts), len(resume_chunk_lists)))
+    start = 0
+    while start < len(resume_chunk_lists):
+        # At least one resume per sub-block, however many chunks it has
+        end, width = start + 1, len(resume_chunk_lists[start])
+        while end < len(resume_chunk_lists) and width + len(resume_chunk_lists[end]) <= max_width:
+            width += len(resume_chunk_lists[end])
+            end += 1
+        counts = np.array([len(chunks) for chunks in resume_chunk_lists[start:end]])
+        resume_offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sims = job_chunks @ np.vstack(resume_chunk_lists[start:end]).T
+        best = np.maximum.reduceat(sims, resume_offsets, axis=1)
+        scores[:, start:end] = np.add.reduceat(best, job_offsets, axis=0) / job_chunk_counts[:, None]
+        start = end
+    return scores
+
+
+def _merge_top_k(scores: np.ndarray, k: int, axis: int) -> np.ndarray:
+    """Indices of the k largest entries along an axis, best first"""
+    k = min(k, scores.shape[axis])
+    part = np.argpartition(-scores, k - 1, axis=axis).take(np.arange(k), axis=axis)
+    order = np.argsort(-np.take_along_axis(scores, part, axis=axis), axis=axis, kind='stable')
+    return np.take_along_axis(part, order, axis=axis)
+
+
+class MatchMatrixService:
+    """Jobs x resumes compatibility report for a recruiter, computed block by block"""
+
+    def __init__(self, matching_service: MatchingService, block_size: int = 4096):
+        self.matching_service = matching_service
+        self.block_size = block_size
+
+    async def _load_jobs(self, db: AsyncSession, recruiter_id: int, space: EmbeddingSpace):
+        result = await db.execute(
+            select(Job).filter(Job.recruiter_id == recruiter_id, Job.is_active == True).order_by(Job.id)
+        )
+        jobs = result.scalars().all()
+
+        # Stored vectors; jobs without a current one are embedded together and written back
+        documents = await recommendation_service.get_job_documents(jobs, db, space)
+        return jobs, documents
+
+    async def compute_match_matrix(
+        self,
+        db: AsyncSession,
+        recruiter_id: int,
+        top_k: int = 10,
+        include_candidate_top_jobs: bool = True
+    ) -> Dict:
+        """
+        Score every active job of the recruiter against every resume.
+
+        Resumes are streamed in blocks; per block the semantic part is one
+        GEMM over stored embeddings and skill overlap is a sparse product.
+        Only running top-k results are kept, never the full matrix. With
+        SEMANTIC_SCORING=max_sim the semantic part uses the stored chunk
+        vectors like single and bulk matching, so scores agree with the
+        stored applications.
+        """
+
+        started = time.perf_counter()
+        weights = self.matching_service.weights
+
+        space = await recommendation_service.serving_space(db, recruiter_id)
+        jobs, job_documents = await self._load_jobs(db, recruiter_id, space)
+        use_max_sim = settings.SEMANTIC_SCORING == "max_sim"
+        weights_by_job = await resolve_weights(db, recruiter_id, [job.id for job in jobs])
+        report = {
+            'recruiter_id': recruiter_id,
+            'jobs_count': len(jobs),
+            'candidates_count': 0,
+            'top_k': top_k,
+            'weights': dict(weights),
+            'semantic_scoring': settings.SEMANTIC_SCORING,
+            # Jobs scored with a scoring profile other than the built-in weights
+            'job_weights': {
+                job_id: job_weights for job_id, job_weights in weights_by_job.items() if job_weights != weights
+            },
+            'top_candidates_per_job': [],
+            'top_jobs_per_candidate': [] if include_candidate_top_jobs else None,
+        }
+        if not jobs:
+            report['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+            return report
+
+        # Job-side matrices are small (J <= a few thousand) and built once
+        job_embeddings = np.vstack([document.vector for document in job_documents]).astype(np.float32)
+        if use_max_sim:
+            job_chunks = np.vstack([document.chunks for document in job_documents]).astype(np.float32)
+            job_chunk_counts = np.array([len(document.chunks) for document in job_documents])
+        vocabulary: Dict[str, int] = {}
+        for job in jobs:
+            for skill in job.required_skills or []:
+                vocabulary.setdefault(skill.lower(), len(vocabulary))
+        job_skills = _skill_matrix([job.required_skills for job in jobs], vocabulary)
+        job_skill_counts = np.array([len(job.required_skills or []) for job in jobs], dtype=np.float64)
+        job_min_years = np.array(
+            [np.nan if job.experience_years_min is None else job.experience_years_min for job in jobs]
+        )
+        job_max_years = np.array(
+            [job.experience_years_max if job.experience_years_max else np.nan for job in jobs]
+        )
+        # (J, 1) columns, so each job's scoring profile applies to its row
+        skill_weights, experience_weights, semantic_weights = (
+            np.array([[weights_by_job[job.id][name]] for job in jobs]) for name in ('skill', 'experience', 'semantic')
+        )
+
+        # Running top-k per job: overall score, components and resume ids
+        n_jobs = len(jobs)
+        best_scores = np.full((n_jobs, 0), -np.inf)
+        best_components = np.zeros((3, n_jobs, 0))
+        best_ids = np.zeros((n_jobs, 0), dtype=np.int64)
+        job_ids = np.array([job.id for job in jobs], dtype=np.int64)
+
+        await recommendation_service.ensure_resume_embeddings(db, recruiter_id, space=space)
+        columns = [Resume.id, Resume.skills, Resume.experience_years, Resume.embedding]
+        if use_max_sim:
+            columns.append(Resume.chunk_embeddings)
+        stream = await db.stream(
+            select(*columns)
+            .filter(
+                Resume.uploader_id == recruiter_id,
+                Resume.embedding.isnot(None),
+                Resume.embedding_model == space.version
+            )
+            .order_by(Resume.id)
+            .execution_options(yield_per=self.block_size)
+        )
+
+        async for rows in stream.partitions(self.block_size):
+            resume_ids = np.array([row.id for row in rows], dtype=np.int64)
+            report['candidates_count'] += len(rows)
+
+            # Semantic: (J, D) @ (D, B) over normalized vectors, or max-sim over chunk vectors
+            dim = job_embeddings.shape[1]
+            resume_embeddings = decode_embeddings((row.embedding for row in rows), dim)
+            if use_max_sim:
+                # Resumes without stored chunks fall back to their pooled vector as a single chunk
+                resume_chunks = [
+                    decode_embeddings([row.chunk_embeddings], dim) if row.chunk_embeddings
+                    else resume_embeddings[i:i + 1]
+                    for i, row in enumerate(rows)
+                ]
+                semantic = _max_sim_matrix(job_chunks, job_chunk_counts, resume_chunks).astype(np.float64) * 100
+            else:
+                semantic = (job_embeddings @ resume_embeddings.T).astype(np.float64) * 100
+
+            # Skills: matched counts from a sparse (J, S) @ (S, B) product
+            if vocabulary:
+                resume_skills = _skill_matrix([row.skills for row in rows], vocabulary)
+                matched = (job_skills @ resume_skills.T).toarray()
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    skill = np.where(
+                        job_skill_counts[:, None] > 0,
+                        np.minimum(matched / job_skill_counts[:, None] * 100, 100.0),
+                        0.0
+                    )
+            else:
+                skill = np.zeros_like(semantic)
+
+            experience = self.matching_service.calculate_experience_match_matrix(
+                np.array([np.nan if row.experience_years is None else row.experience_years for row in rows]),
+                job_min_years,
+                job_max_years
+            )
+
+            overall = (
+                skill * skill_weights +
+                experience * experience_weights +
+                semantic * semantic_weights
+            )
+
+            # Merge this block into the running top-k candidates per job
+            merged_scores = np.concatenate([best_scores, overall], axis=1)
+            merged_components = np.concatenate(
+                [best_components, np.stack([skill, experience, semantic])], axis=2
+            )
+            merged_ids = np.concatenate([best_ids, np.broadcast_to(resume_ids, overall.shape)], axis=1)
+            keep = _merge_top_k(merged_scores, top_k, axis=1)
+            best_scores = np.take_along_axis(merged_scores, keep, axis=1)
+            best_components = np.take_along_axis(merged_components, keep[None, :, :], axis=2)
+            best_ids = np.take_along_axis(merged_ids, keep, axis=1)
+
+            # Every job is in the block, so top-k jobs per candidate are final here
+            if include_candidate_top_jobs:
+                top_jobs = _merge_top_k(overall, top_k, axis=0)
+                top_job_scores = np.take_along_axis(overall, top_jobs, axis=0)
+                for column, resume_id in enumerate(resume_ids):
+                    report['top_jobs_per_candidate'].append({
+                        'resume_id': int(resume_id),
+                        'jobs': [
+                            {'job_id': int(job_ids[top_jobs[r, column]]),
+                             'match_score': round(float(top_job_scores[r, column]), 2)}
+                            for r in range(top_jobs.shape[0])
+                        ]
+                    })
+
+        for j, job in enumerate(jobs):
+            report['top_candidates_per_job'].append({
+                'job_id': job.id,
+                'job_title': job.title,
+                'candidates': [
+                    {
+                        'resume_id': int(best_ids[j, r]),
+                        'match_score': round(float(best_scores[j, r]), 2),
+                        'skill_match_score': round(float(best_components[0, j, r]), 2),
+                        'experience_match_score': round(float(best_components[1, j, r]), 2),
+                        'semantic_similarity_score': round(float(best_components[2, j, r]), 2),
+                    }
+                    for r in range(best_ids.shape[1])
+                ]
+            })
+
+        report['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+        return report
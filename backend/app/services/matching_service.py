@@ -1,16 +1,54 @@
+import hashlib
+import json
 from typing import List, Dict, Optional
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from app.models.job import Job
 from app.models.resume import Resume
+from app.core.config import settings
+from app.services.document_embeddings import (
+    CURRENT_SPACE, DocumentEmbedding, EmbeddingSpace, embed_documents, job_document_text, resume_document_text,
+    stored_document
+)
+from app.utils.vectors import max_sim, max_sim_bulk
+
+
+# Overall match weights: skills 50%, experience 30%, semantic 20%
+SCORE_WEIGHTS = {
+    'skill': 0.5,
+    'experience': 0.3,
+    'semantic': 0.2,
+}
+
+# Part of every application's input fingerprint; bump when scoring logic changes
+# so stored scores are picked up by the stale-application rescoring job
+SCORER_VERSION = "1"
+
+
+def text_digest(text: Optional[str]) -> str:
+    """md5 of the resume text; same value as md5(coalesce(raw_text, '')) in Postgres"""
+    return hashlib.md5((text or "").encode('utf-8')).hexdigest()
+
+
+def resume_content_hash(skills: Optional[List[str]], experience_years: Optional[float], raw_text_digest: str) -> str:
+    """Hash of the resume fields the scorer reads"""
+    content = json.dumps([skills or [], experience_years, raw_text_digest])
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def job_content_hash(job: Job) -> str:
+    """Hash of the job fields the scorer reads, including the embedded text"""
+    content = json.dumps([
+        job.title, job.description, job.requirements, job.required_skills or [],
+        job.experience_years_min, job.experience_years_max, job.location
+    ])
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
 
 
 class MatchingService:
     """Match candidates to jobs using multiple scoring algorithms"""
     
     def __init__(self):
-        # Load sentence transformer model for semantic similarity
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.weights = dict(SCORE_WEIGHTS)
     
     def calculate_skill_match(self, resume_skills: List[str], job_skills: List[str]) -> float:
         """Calculate skill match score (0-100)"""
@@ -58,44 +96,82 @@ class MatchingService:
             penalty = min(shortfall * 20, 80)  # 20% per year short, max 80% penalty
             return max(20.0, 100.0 - penalty)
     
-    def calculate_semantic_similarity(self, resume_text: str, job_text: str) -> float:
+    def calculate_document_similarity(self, resume_doc: DocumentEmbedding, job_doc: DocumentEmbedding) -> float:
+        """Semantic similarity of two chunked document embeddings (0-100)"""
+        if settings.SEMANTIC_SCORING == "max_sim":
+            # Each job chunk is matched against the closest part of the resume
+            similarity = max_sim(job_doc.chunks, resume_doc.chunks)
+        else:
+            similarity = float(np.dot(resume_doc.vector, job_doc.vector))
+        
+        # Convert to 0-100 scale
+        return similarity * 100
+    
+    async def calculate_semantic_similarity(
+        self,
+        resume_text: str,
+        job_text: str,
+        space: EmbeddingSpace = CURRENT_SPACE
+    ) -> float:
         """Calculate semantic similarity using sentence transformers (0-100)"""
         if not resume_text or not job_text:
             return 0.0
         
-        # Truncate texts to avoid memory issues
-        resume_text = resume_text[:5000]
-        job_text = job_text[:5000]
-        
-        # Generate embeddings
-        resume_embedding = self.model.encode(resume_text, convert_to_numpy=True)
-        job_embedding = self.model.encode(job_text, convert_to_numpy=True)
-        
-        # Calculate cosine similarity
-        similarity = np.dot(resume_embedding, job_embedding) / (
-            np.linalg.norm(resume_embedding) * np.linalg.norm(job_embedding)
-        )
-        
-        # Convert to 0-100 scale
-        return float(similarity * 100)
+        # Full texts are chunked, so nothing past the model's input limit is lost
+        resume_doc, job_doc = await embed_documents([resume_text, job_text], space)
+        return self.calculate_document_similarity(resume_doc, job_doc)
     
     def calculate_overall_match(
         self,
         skill_score: float,
         experience_score: float,
-        semantic_score: float
+        semantic_score: float,
+        weights: Optional[Dict[str, float]] = None
     ) -> float:
-        """Calculate weighted overall match score"""
-        # Weights: skills 50%, experience 30%, semantic 20%
+        """Calculate weighted overall match score (weights default to SCORE_WEIGHTS)"""
+        weights = weights or self.weights
         overall_score = (
-            skill_score * 0.5 +
-            experience_score * 0.3 +
-            semantic_score * 0.2
+            skill_score * weights['skill'] +
+            experience_score * weights['experience'] +
+            semantic_score * weights['semantic']
         )
         return round(overall_score, 2)
     
-    def match_resume_to_job(self, resume: Resume, job: Job) -> Dict:
-        """Match a resume to a job and return detailed scores"""
+    def input_fingerprint(self, resume_hash: str, job_hash: str, space: EmbeddingSpace = CURRENT_SPACE) -> str:
+        """
+        Fingerprint of everything the stored component scores depend on:
+        resume and job content, scorer version and the embedding space.
+        
+        Weights are not part of it: match_score is re-derived from the stored
+        components in SQL whenever a scoring profile changes.
+        """
+        content = f"{resume_hash}|{job_hash}|{SCORER_VERSION}|{settings.SEMANTIC_SCORING}|{space.version}"
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+    
+    def resume_job_fingerprint(self, resume: Resume, job: Job, space: EmbeddingSpace = CURRENT_SPACE) -> str:
+        return self.input_fingerprint(
+            resume_content_hash(resume.skills, resume.experience_years, text_digest(resume.raw_text)),
+            job_content_hash(job),
+            space
+        )
+    
+    async def match_resume_to_job(
+        self,
+        resume: Resume,
+        job: Job,
+        job_doc: Optional[DocumentEmbedding] = None,
+        space: EmbeddingSpace = CURRENT_SPACE,
+        weights: Optional[Dict[str, float]] = None
+    ) -> Dict:
+        """
+        Match a resume to a job and return detailed scores.
+        
+        job_doc is the job's stored document embedding in the recruiter's
+        serving space; without it the job text is embedded here. Callers
+        with a session should refresh the resume's stored vector first
+        (get_resume_embeddings) so it is current and written back. weights
+        is the job's scoring profile.
+        """
         
         # Calculate individual scores
         skill_score = self.calculate_skill_match(
@@ -109,26 +185,138 @@ class MatchingService:
             job.experience_years_max
         )
         
-        # Combine job description and requirements for semantic matching
-        job_text = f"{job.title}\n{job.description}"
-        if job.requirements:
-            job_text += f"\n{job.requirements}"
-        
-        semantic_score = self.calculate_semantic_similarity(
-            resume.raw_text or "",
-            job_text
-        )
+        # Resume and job vectors are computed at upload/save; only missing ones are embedded here,
+        # from the same document texts the stored vectors were built from
+        resume_doc = stored_document(resume.embedding, resume.chunk_embeddings, resume.embedding_model, space)
+        if resume_doc is None and job_doc is None:
+            semantic_score = await self.calculate_semantic_similarity(
+                resume_document_text(resume), job_document_text(job), space
+            )
+        else:
+            if resume_doc is None:
+                resume_doc = (await embed_documents([resume_document_text(resume)], space))[0]
+            if job_doc is None:
+                job_doc = (await embed_documents([job_document_text(job)], space))[0]
+            semantic_score = self.calculate_document_similarity(resume_doc, job_doc)
         
         # Calculate overall match
         overall_score = self.calculate_overall_match(
             skill_score,
             experience_score,
-            semantic_score
+            semantic_score,
+            weights
         )
         
         return {
             'skill_match_score': round(skill_score, 2),
             'experience_match_score': round(experience_score, 2),
             'semantic_similarity_score': round(semantic_score, 2),
-            'overall_match_score': overall_score
+            'overall_match_score': overall_score,
+            'input_fingerprint': self.resume_job_fingerprint(resume, job, space)
+        }
+    
+    def calculate_skill_match_bulk(
+        self,
+        resume_skill_lists: List[Optional[List[str]]],
+        job_skills: List[str]
+    ) -> np.ndarray:
+        """Vectorized calculate_skill_match for many resumes against one job"""
+        job_vocabulary = {skill: i for i, skill in enumerate(set(s.lower() for s in job_skills or []))}
+        if not job_vocabulary:
+            return np.zeros(len(resume_skill_lists), dtype=np.float64)
+        
+        # Binary resume x job-skill matrix; matched counts are its row sums
+        matrix = np.zeros((len(resume_skill_lists), len(job_vocabulary)), dtype=np.bool_)
+        for row, skills in enumerate(resume_skill_lists):
+            for skill in skills or []:
+                column = job_vocabulary.get(skill.lower())
+                if column is not None:
+                    matrix[row, column] = True
+        
+        scores = matrix.sum(axis=1) / len(job_skills) * 100
+        return np.minimum(scores, 100.0)
+    
+    def calculate_experience_match_matrix(
+        self,
+        resume_years: np.ndarray,
+        job_min_years: np.ndarray,
+        job_max_years: np.ndarray
+    ) -> np.ndarray:
+        """
+        Vectorized calculate_experience_match for jobs x resumes.
+        
+        Unknown values are NaN: resume_years (R,), job_min_years (J,) and
+        job_max_years (J,). Returns a (J, R) score matrix.
+        """
+        years = np.asarray(resume_years, dtype=np.float64)[None, :]
+        mins = np.asarray(job_min_years, dtype=np.float64)[:, None]
+        maxs = np.asarray(job_max_years, dtype=np.float64)[:, None]
+        
+        # Below minimum: 20% per year short, max 80% penalty
+        below_scores = np.maximum(20.0, 100.0 - np.minimum((mins - years) * 20, 80))
+        # Above maximum: slight penalty for being overqualified, max 20%
+        over_scores = np.maximum(80.0, 100.0 - np.minimum((years - maxs) * 5, 20))
+        
+        overqualified = ~np.isnan(maxs) & (years > maxs)
+        scores = np.where(years >= mins, np.where(overqualified, over_scores, 100.0), below_scores)
+        scores = np.where(np.isnan(mins), 100.0, scores)  # No requirement, perfect match
+        scores = np.where(np.isnan(years), 50.0, scores)  # Neutral score if unknown
+        return scores
+    
+    def calculate_experience_match_bulk(
+        self,
+        resume_years: np.ndarray,
+        job_min_years: Optional[int],
+        job_max_years: Optional[int]
+    ) -> np.ndarray:
+        """Vectorized calculate_experience_match for one job; unknown experience is NaN"""
+        return self.calculate_experience_match_matrix(
+            resume_years,
+            np.array([np.nan if job_min_years is None else job_min_years]),
+            np.array([job_max_years if job_max_years else np.nan])
+        )[0]
+    
+    def match_resumes_to_job_bulk(
+        self,
+        job: Job,
+        resume_skill_lists: List[Optional[List[str]]],
+        resume_years: List[Optional[float]],
+        resume_embeddings: np.ndarray,
+        job_embedding: np.ndarray,
+        resume_chunks: Optional[List[np.ndarray]] = None,
+        job_chunks: Optional[np.ndarray] = None,
+        weights: Optional[Dict[str, float]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Score one job against many resumes in a single vectorized pass.
+        
+        resume_embeddings and job_embedding must be L2-normalized, so the
+        semantic score of every resume is one matrix-vector product. With
+        max-sim scoring, per-chunk vectors are scored in one product instead.
+        """
+        skill_scores = self.calculate_skill_match_bulk(resume_skill_lists, job.required_skills or [])
+        
+        experience_scores = self.calculate_experience_match_bulk(
+            np.array([np.nan if years is None else years for years in resume_years], dtype=np.float64),
+            job.experience_years_min,
+            job.experience_years_max
+        )
+        
+        if settings.SEMANTIC_SCORING == "max_sim" and resume_chunks is not None and job_chunks is not None:
+            semantic_scores = max_sim_bulk(job_chunks, resume_chunks) * 100
+        else:
+            semantic_scores = resume_embeddings.astype(np.float64) @ job_embedding.astype(np.float64) * 100
+        
+        weights = weights or self.weights
+        overall_scores = (
+            skill_scores * weights['skill'] +
+            experience_scores * weights['experience'] +
+            semantic_scores * weights['semantic']
+        )
+        
+        return {
+            'skill_match_score': np.round(skill_scores, 2),
+            'experience_match_score': np.round(experience_scores, 2),
+            'semantic_similarity_score': np.round(semantic_scores, 2),
+            'overall_match_score': np.round(overall_scores, 2)
         }
@@ -0,0 +1,201 @@
+import gc
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+
+SENTENCE_TRANSFORMER = "sentence_transformer"
+SPACY = "spacy"
+WHISPER = "whisper"
+ONNX_EMBEDDER = "onnx_embedder"
+
+
+@dataclass
+class LoadedModel:
+    model: Any
+    loaded_at: float
+    last_used: float
+    load_seconds: float
+    memory_bytes: Optional[int]
+
+
+def _resident_memory_bytes() -> Optional[int]:
+    """Current process RSS (Linux only)"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _tensor_memory_bytes(model: Any) -> Optional[int]:
+    """Exact weight size for torch modules (SentenceTransformer, Whisper)"""
+    if not hasattr(model, "parameters"):
+        return None
+    total = sum(p.numel() * p.element_size() for p in model.parameters())
+    if hasattr(model, "buffers"):
+        total += sum(b.numel() * b.element_size() for b in model.buffers())
+    return total
+
+
+class ModelRegistry:
+    """Process-wide registry that loads each model once, lazily, on first use"""
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, LoadedModel] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        with self._lock:
+            self._loaders[name] = loader
+            self._load_locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str) -> Any:
+        """Return the shared model instance, loading it on first use"""
+        entry = self._models.get(name)
+        if entry is None:
+            if name not in self._loaders:
+                raise KeyError(f"Unknown model: {name}")
+
+            # Per-model lock: concurrent first calls load the weights only once
+            with self._load_locks[name]:
+                entry = self._models.get(name)
+                if entry is None:
+                    entry = self._load(name)
+
+        entry.last_used = time.time()
+        return entry.model
+
+    def _load(self, name: str) -> LoadedModel:
+        print(f"Loading model '{name}'...")
+        rss_before = _resident_memory_bytes()
+        started = time.perf_counter()
+
+        model = self._loaders[name]()
+
+        load_seconds = time.perf_counter() - started
+        memory_bytes = _tensor_memory_bytes(model)
+        if memory_bytes is None:
+            rss_after = _resident_memory_bytes()
+            if rss_before is not None and rss_after is not None:
+                memory_bytes = max(rss_after - rss_before, 0)
+
+        now = time.time()
+        entry = LoadedModel(
+            model=model,
+            loaded_at=now,
+            last_used=now,
+            load_seconds=load_seconds,
+            memory_bytes=memory_bytes
+        )
+        with self._lock:
+            self._models[name] = entry
+        print(f"Model '{name}' loaded in {load_seconds:.1f}s")
+        return entry
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._loaders
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def unload(self, name: str) -> bool:
+        """Drop a model so its memory can be reclaimed; it reloads on next use"""
+        with self._lock:
+            entry = self._models.pop(name, None)
+        if entry is None:
+            return False
+
+        del entry
+        gc.collect()
+        return True
+
+    def unload_idle(self, max_idle_seconds: float) -> List[str]:
+        """Unload every model that hasn't been used for max_idle_seconds"""
+        cutoff = time.time() - max_idle_seconds
+        idle = [name for name, entry in list(self._models.items()) if entry.last_used < cutoff]
+        return [name for name in idle if self.unload(name)]
+
+    def stats(self) -> Dict[str, Dict]:
+        """Load state and resident memory per registered model"""
+        now = time.time()
+        stats = {}
+        for name in self._loaders:
+            entry = self._models.get(name)
+            if entry is None:
+                stats[name] = {"loaded": False}
+                continue
+            stats[name] = {
+                "loaded": True,
+                "memory_mb": round(entry.memory_bytes / (1024 * 1024), 1) if entry.memory_bytes is not None else None,
+                "load_seconds": round(entry.load_seconds, 2),
+                "idle_seconds": round(now - entry.last_used, 1),
+            }
+        return stats
+
+
+def _load_sentence_transformer(model_name: Optional[str] = None):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name or settings.EMBEDDING_MODEL_NAME)
+
+
+def _load_spacy():
+    import spacy
+    try:
+        return spacy.load(settings.SPACY_MODEL)
+    except OSError:
+        print("Downloading spaCy model...")
+        import subprocess
+        subprocess.run(["python", "-m", "spacy", "download", settings.SPACY_MODEL])
+        return spacy.load(settings.SPACY_MODEL)
+
+
+def _load_whisper():
+    import whisper
+    # Options: tiny, base, small, medium, large
+    return whisper.load_model(settings.WHISPER_MODEL)
+
+
+def _load_onnx_embedder(model_name: Optional[str] = None):
+    from app.services.embedding_backends import load_onnx_model
+    return load_onnx_model(model_name)
+
+
+model_registry = ModelRegistry()
+model_registry.register(SENTENCE_TRANSFORMER, _load_sentence_transformer)
+model_registry.register(SPACY, _load_spacy)
+model_registry.register(WHISPER, _load_whisper)
+model_registry.register(ONNX_EMBEDDER, _load_onnx_embedder)
+
+
+def _embedding_model_entry(kind: str, loader: Callable[[Optional[str]], Any], model_name: Optional[str]) -> str:
+    """Registry name for an embedding model other than EMBEDDING_MODEL_NAME, registered on first use"""
+    if model_name is None or model_name == settings.EMBEDDING_MODEL_NAME:
+        return kind
+    name = f"{kind}:{model_name}"
+    if not model_registry.is_registered(name):
+        model_registry.register(name, lambda: loader(model_name))
+    return name
+
+
+def get_sentence_transformer(model_name: Optional[str] = None):
+    return model_registry.get(_embedding_model_entry(SENTENCE_TRANSFORMER, _load_sentence_transformer, model_name))
+
+
+def get_spacy_nlp():
+    return model_registry.get(SPACY)
+
+
+def get_whisper_model():
+    return model_registry.get(WHISPER)
+
+
+def get_onnx_embedder(model_name: Optional[str] = None):
+    return model_registry.get(_embedding_model_entry(ONNX_EMBEDDER, _load_onnx_embedder, model_name))
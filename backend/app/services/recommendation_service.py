@@ -1,128 +1,518 @@
+import asyncio
+import hashlib
+import time
 import numpy as np
-import faiss
-from typing import List, Dict, Optional, Tuple
+from typing import AsyncIterator, Callable, List, Dict, Optional, Set, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sentence_transformers import SentenceTransformer
+from sqlalchemy import select, text, update, func, or_
 
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, engine
 from app.models.job import Job
 from app.models.resume import Resume
+from app.models.embedding_version import RecruiterEmbeddingVersion
+from app.services.document_embeddings import (
+    CURRENT_SPACE, DOCUMENT_EMBEDDING_VERSION, DocumentEmbedding, EmbeddingSpace,
+    embed_document, embed_documents, embedding_space, job_document_text, resume_document_text, stored_document
+)
+from app.services.candidate_prefilter import index_resume_skills, prefilter_candidates
+from app.services.candidate_query import (
+    QuerySyntaxError, apply_filters, parse_candidate_query, plan_filters, sql_condition
+)
 from app.services.genai_service import GenAIService
+from app.services.matching_service import job_content_hash
+from app.services.lexical_index import lexical_index_store, lexical_text, reciprocal_rank_fusion
+from app.services.recommendation_snapshots import Ranking, RankedSnapshot, encode_cursor, recommendation_snapshots
+from app.services.search_result_cache import index_version, normalize_query, search_result_cache
+from app.services.vector_search import get_vector_backend, numpy_backend
+from app.utils.sql import id_in
+from app.utils.vectors import encode_embedding, encode_embeddings, decode_embedding
 import json
 
 
+# Passes over the tables per migration run; rows added meanwhile wait for the next run
+MIGRATION_MAX_PASSES = 3
+
+# Postgres advisory lock key held for a whole migration run, so only one worker migrates
+EMBEDDING_MIGRATION_LOCK_KEY = 0x656D6267
+
+
 class RecommendationService:
     """AI-powered candidate recommendation engine"""
     
     def __init__(self):
-        # Load sentence transformer for embeddings
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
         self.embedding_dim = 384  # Dimension for all-MiniLM-L6-v2
+        self.encode_batch_size = settings.EMBEDDING_BATCH_SIZE
+        self.model_version = DOCUMENT_EMBEDDING_VERSION
+        self.keep_chunk_embeddings = settings.SEMANTIC_SCORING == "max_sim"
+        self.refresh_checkpoint_path = settings.vector_index_dir_path / "embedding_refresh_checkpoint.json"
+    
+    def build_job_text(self, job: Job) -> str:
+        """Combine all job information into the text that gets embedded"""
+        return job_document_text(job)
+    
+    def build_resume_text(self, resume: Resume) -> str:
+        """Combine resume information into the text that gets embedded"""
+        return resume_document_text(resume)
+    
+    @staticmethod
+    def text_fingerprint(text: str) -> str:
+        """Content hash used to detect stale stored embeddings"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
     
-    def generate_job_embedding(self, job: Job) -> np.ndarray:
-        """Generate embedding vector for a job"""
+    async def serving_space(self, db: AsyncSession, recruiter_id: int) -> EmbeddingSpace:
+        """
+        Vector space a recruiter's searches run in.
+        
+        While EMBEDDING_PREVIOUS_MODEL_NAME is set, a recruiter stays on the
+        previous model until the re-embedding migration has covered all of
+        their rows and switched them over.
+        """
+        if not settings.EMBEDDING_PREVIOUS_MODEL_NAME:
+            return CURRENT_SPACE
+        result = await db.execute(
+            select(RecruiterEmbeddingVersion.embedding_model)
+            .filter(RecruiterEmbeddingVersion.recruiter_id == recruiter_id)
+        )
+        if result.scalar() == self.model_version:
+            return CURRENT_SPACE
+        return embedding_space(settings.EMBEDDING_PREVIOUS_MODEL_NAME)
+    
+    async def get_job_documents(
+        self,
+        jobs: List[Job],
+        db: Optional[AsyncSession] = None,
+        space: Optional[EmbeddingSpace] = None
+    ) -> List[DocumentEmbedding]:
+        """
+        Document embeddings for the given jobs (all from one recruiter).
+        
+        Vectors are computed when a job is created or edited and stored with
+        a fingerprint of the job text; only missing or stale ones are encoded
+        here (in one batch) and written back to the job rows. space defaults
+        to the recruiter's serving space.
+        """
+        
+        if space is None:
+            space = await self.serving_space(db, jobs[0].recruiter_id) if db is not None and jobs else CURRENT_SPACE
         
-        # Combine all job information into a single text
-        job_text = f"{job.title}\n{job.description}"
-        if job.requirements:
-            job_text += f"\n{job.requirements}"
-        if job.required_skills:
-            job_text += f"\nRequired skills: {', '.join(job.required_skills)}"
-        if job.location:
-            job_text += f"\nLocation: {job.location}"
+        documents: List[Optional[DocumentEmbedding]] = []
+        stale: List[Tuple[int, str, str]] = []
         
-        # Generate embedding
-        embedding = self.model.encode(job_text, convert_to_numpy=True)
-        return embedding
+        for i, job in enumerate(jobs):
+            job_text = self.build_job_text(job)
+            fingerprint = self.text_fingerprint(job_text)
+            document = None
+            if job.embedding_fingerprint == fingerprint:
+                document = stored_document(job.embedding, job.chunk_embeddings, job.embedding_model, space)
+            documents.append(document)
+            if document is None:
+                stale.append((i, job_text, fingerprint))
+        
+        if stale:
+            encoded = await embed_documents([job_text for _, job_text, _ in stale], space)
+            for (i, _, fingerprint), document in zip(stale, encoded):
+                job = jobs[i]
+                job.embedding = encode_embedding(document.vector)
+                job.chunk_embeddings = encode_embeddings(document.chunks) if self.keep_chunk_embeddings else None
+                job.embedding_model = space.version
+                job.embedding_fingerprint = fingerprint
+                documents[i] = document
+            
+            if db is not None:
+                await db.commit()
+        
+        return documents
+    
+    async def generate_job_document(
+        self,
+        job: Job,
+        db: Optional[AsyncSession] = None,
+        space: Optional[EmbeddingSpace] = None
+    ) -> DocumentEmbedding:
+        """Pooled and per-chunk embeddings for a job, from the stored vector when current"""
+        return (await self.get_job_documents([job], db, space))[0]
+    
+    async def generate_job_embedding(
+        self,
+        job: Job,
+        db: Optional[AsyncSession] = None,
+        space: Optional[EmbeddingSpace] = None
+    ) -> np.ndarray:
+        """Embedding vector for a job"""
+        return (await self.generate_job_document(job, db, space)).vector
+    
+    async def index_job(self, job_id: int) -> None:
+        """Background task: embed a created or edited job so requests read a stored vector"""
+        async with AsyncSessionLocal() as db:
+            try:
+                result = await db.execute(select(Job).filter(Job.id == job_id))
+                job = result.scalars().first()
+                if job is not None:
+                    await self.get_job_documents([job], db)
+            except Exception as e:
+                await db.rollback()
+                print(f"Error embedding job {job_id}: {e}")
     
-    def generate_resume_embedding(self, resume: Resume) -> np.ndarray:
+    async def generate_resume_embedding(self, resume: Resume) -> np.ndarray:
         """Generate embedding vector for a resume"""
+        return (await embed_document(self.build_resume_text(resume))).vector
+    
+    async def get_resume_embeddings(
+        self,
+        resumes: List[Resume],
+        db: Optional[AsyncSession] = None,
+        space: EmbeddingSpace = CURRENT_SPACE
+    ) -> Tuple[np.ndarray, List[Resume]]:
+        """
+        Return an embedding matrix for the given resumes.
+        
+        Stored vectors are reused when their fingerprint matches the current
+        resume text; only missing or stale vectors are encoded (in one batch)
+        and written back to the resume rows.
+        """
+        
+        embeddings: Dict[int, np.ndarray] = {}
+        stale: List[Tuple[Resume, str, str]] = []
+        
+        for resume in resumes:
+            resume_text = self.build_resume_text(resume)
+            fingerprint = self.text_fingerprint(resume_text)
+            
+            if (
+                resume.embedding
+                and resume.embedding_model == space.version
+                and resume.embedding_fingerprint == fingerprint
+            ):
+                embeddings[resume.id] = decode_embedding(resume.embedding)
+            else:
+                stale.append((resume, resume_text, fingerprint))
+        
+        if stale:
+            try:
+                documents = await embed_documents([resume_text for _, resume_text, _ in stale], space)
+                for (resume, _, fingerprint), document in zip(stale, documents):
+                    resume.embedding = encode_embedding(document.vector)
+                    resume.chunk_embeddings = (
+                        encode_embeddings(document.chunks) if self.keep_chunk_embeddings else None
+                    )
+                    resume.embedding_model = space.version
+                    resume.embedding_fingerprint = fingerprint
+                    embeddings[resume.id] = document.vector
+                
+                if db is not None:
+                    await db.commit()
+            except Exception as e:
+                print(f"Error generating embeddings for {len(stale)} resumes: {e}")
+        
+        valid_resumes = [resume for resume in resumes if resume.id in embeddings]
+        if not valid_resumes:
+            return np.empty((0, self.embedding_dim), dtype='float32'), []
         
-        # Combine resume information
-        resume_text = ""
-        if resume.candidate_name:
-            resume_text += f"{resume.candidate_name}\n"
-        if resume.raw_text:
-            resume_text += resume.raw_text[:2000]  # First 2000 chars
-        if resume.skills:
-            resume_text += f"\nSkills: {', '.join(resume.skills)}"
-        if resume.experience_years:
-            resume_text += f"\nExperience: {resume.experience_years} years"
-        
-        # Generate embedding
-        embedding = self.model.encode(resume_text, convert_to_numpy=True)
-        return embedding
+        matrix = np.vstack([embeddings[resume.id] for resume in valid_resumes]).astype('float32')
+        return matrix, valid_resumes
+    
+    async def index_resume(self, resume: Resume, db: AsyncSession) -> None:
+        """Embed a resume and make it searchable for its uploader"""
+        await index_resume_skills(db, resume)
+        await db.commit()
+        lexical_index_store.add(
+            resume.uploader_id, resume.id, lexical_text(resume.candidate_name, resume.raw_text, resume.skills)
+        )
+        
+        space = await self.serving_space(db, resume.uploader_id)
+        matrix, valid_resumes = await self.get_resume_embeddings([resume], db, space)
+        if valid_resumes:
+            backend = await get_vector_backend(db)
+            await backend.add(db, resume.uploader_id, [resume.id], matrix, space.version)
+            await db.commit()
+    
+    async def remove_resume_from_index(self, db: AsyncSession, recruiter_id: int, resume_id: int) -> None:
+        """Drop a deleted resume from its uploader's search indexes"""
+        lexical_index_store.remove(recruiter_id, [resume_id])
+        backend = await get_vector_backend(db)
+        await backend.remove(db, recruiter_id, [resume_id])
+    
+    async def ensure_resume_embeddings(
+        self,
+        db: AsyncSession,
+        recruiter_id: int,
+        candidate_ids: Optional[List[int]] = None,
+        space: Optional[EmbeddingSpace] = None
+    ) -> int:
+        """Encode resumes whose stored vector is missing or not in the recruiter's serving space"""
+        space = space or await self.serving_space(db, recruiter_id)
+        query = select(Resume).filter(
+            Resume.uploader_id == recruiter_id,
+            or_(
+                Resume.embedding.is_(None),
+                Resume.embedding_model.is_distinct_from(space.version)
+            )
+        )
+        if candidate_ids is not None:
+            query = query.filter(id_in(Resume.id, candidate_ids))
+        
+        result = await db.execute(query)
+        missing = result.scalars().all()
+        if missing:
+            await self.get_resume_embeddings(missing, db, space)
+        return len(missing)
+    
+    async def rank_candidates(
+        self,
+        db: AsyncSession,
+        job: Job,
+        recruiter_id: int,
+        top_k: int = 10,
+        min_score: float = 0.5,
+        candidate_ids: Optional[List[int]] = None,
+        prefilter: bool = False
+    ) -> Ranking:
+        """
+        Rank the recruiter's resumes against a job without loading resume rows.
+        
+        With prefilter, candidates are first narrowed by the skill and
+        experience indexes. Top-k similarity runs in the configured vector
+        search backend, or exactly over the stored vectors when the candidate
+        set is small. Returns (resume_id, match percentage) pairs, best first.
+        """
+        
+        if prefilter:
+            candidate_ids = await prefilter_candidates(db, job, recruiter_id, candidate_ids)
+        if candidate_ids is not None and not candidate_ids:
+            return []
+        
+        space = await self.serving_space(db, recruiter_id)
+        await self.ensure_resume_embeddings(db, recruiter_id, candidate_ids, space)
+        
+        if candidate_ids is not None and len(candidate_ids) <= settings.PREFILTER_EXACT_SCORING_MAX:
+            # Reads only the candidates' vectors, so cost follows the candidate count
+            backend = numpy_backend
+        else:
+            backend = await get_vector_backend(db)
+            await backend.sync(db, recruiter_id, space.version)
+        
+        # Stored at job create/update; only encoded here if missing or stale
+        job_embedding = await self.generate_job_embedding(job, db, space)
+        
+        hits = await backend.search(
+            db, recruiter_id, job_embedding, top_k, space.version, candidate_ids
+        )
+        
+        # Convert cosine similarity to percentage (0-100), scaled from [-1,1]
+        ranking = [(resume_id, (similarity_score + 1) * 50) for resume_id, similarity_score in hits]
+        return [(resume_id, score) for resume_id, score in ranking if score >= min_score * 100]
+    
+    async def load_candidate_entries(self, db: AsyncSession, ranking: Ranking, first_rank: int = 1) -> List[Dict]:
+        """Candidate entries for a slice of a ranking; resumes deleted since ranking are skipped"""
+        if not ranking:
+            return []
+        
+        resumes_result = await db.execute(
+            select(Resume).filter(Resume.id.in_([resume_id for resume_id, _ in ranking]))
+        )
+        resumes_by_id = {resume.id: resume for resume in resumes_result.scalars().all()}
+        
+        return [
+            self._candidate_entry(resumes_by_id[resume_id], score, first_rank + i)
+            for i, (resume_id, score) in enumerate(ranking)
+            if resume_id in resumes_by_id
+        ]
     
     async def find_matching_candidates(
         self,
+        db: AsyncSession,
         job: Job,
-        all_resumes: List[Resume],
+        recruiter_id: int,
         top_k: int = 10,
-        min_score: float = 0.5
+        min_score: float = 0.5,
+        candidate_ids: Optional[List[int]] = None,
+        prefilter: bool = False
     ) -> List[Dict]:
-        """Find top matching candidates for a job using FAISS similarity search"""
+        """Find top matching candidates for a job; only the resumes that make the cut are loaded"""
+        ranking = await self.rank_candidates(db, job, recruiter_id, top_k, min_score, candidate_ids, prefilter)
+        return await self.load_candidate_entries(db, ranking)
+    
+    @staticmethod
+    def _candidate_entry(resume: Resume, score: float, rank: int) -> Dict:
+        return {
+            'resume_id': resume.id,
+            'candidate_name': resume.candidate_name,
+            'candidate_email': resume.candidate_email,
+            'similarity_score': round(score, 2),
+            'skills': resume.skills or [],
+            'experience_years': resume.experience_years,
+            'rank': rank
+        }
+    
+    async def search_candidates(
+        self,
+        db: AsyncSession,
+        recruiter_id: int,
+        query: str,
+        top_k: int = 10,
+        mode: str = "hybrid",
+        candidate_ids: Optional[List[int]] = None
+    ) -> List[Dict]:
+        """
+        Free-text candidate search, optionally within candidate_ids.
         
-        if not all_resumes:
-            return []
+        lexical: BM25 over resume text only, no model call; similarity_score
+        is relative to the best hit. vector: embedding search. hybrid: both
+        rankings fused with reciprocal rank fusion.
+        """
+        depth = max(settings.HYBRID_SEARCH_DEPTH, top_k)
         
-        # Generate job embedding
-        job_embedding = self.generate_job_embedding(job)
+        lexical_hits = []
+        if mode != "vector":
+            await lexical_index_store.sync(db, recruiter_id)
+            lexical_hits = lexical_index_store.search(
+                recruiter_id, query, depth if mode == "hybrid" else top_k, candidate_ids
+            )
         
-        # Generate embeddings for all resumes
-        resume_embeddings = []
-        valid_resumes = []
+        if mode == "lexical":
+            if not lexical_hits:
+                return []
+            resumes_result = await db.execute(
+                select(Resume).filter(Resume.id.in_([resume_id for resume_id, _ in lexical_hits]))
+            )
+            resumes_by_id = {resume.id: resume for resume in resumes_result.scalars().all()}
+            best_score = lexical_hits[0][1]
+            results = []
+            for resume_id, score in lexical_hits:
+                if resume_id in resumes_by_id:
+                    entry = self._candidate_entry(resumes_by_id[resume_id], score / best_score * 100, len(results) + 1)
+                    entry['lexical_score'] = round(score, 3)
+                    results.append(entry)
+            return results
         
-        for resume in all_resumes:
-            try:
-                embedding = self.generate_resume_embedding(resume)
-                resume_embeddings.append(embedding)
-                valid_resumes.append(resume)
-            except Exception as e:
-                print(f"Error generating embedding for resume {resume.id}: {e}")
+        # The query stands in for a job description
+        query_job = Job(title=query, description=query, company="Search", recruiter_id=recruiter_id)
+        if mode == "vector":
+            return await self.find_matching_candidates(
+                db, query_job, recruiter_id, top_k=top_k, candidate_ids=candidate_ids
+            )
+        vector_hits = await self.find_matching_candidates(
+            db, query_job, recruiter_id, top_k=depth, min_score=0.0, candidate_ids=candidate_ids
+        )
+        
+        # Keyword-only hits still get a semantic score; they are few, so it's an exact lookup
+        vector_ids = {hit['resume_id'] for hit in vector_hits}
+        extra_ids = [resume_id for resume_id, _ in lexical_hits if resume_id not in vector_ids]
+        if extra_ids:
+            vector_hits += await self.find_matching_candidates(
+                db, query_job, recruiter_id, top_k=len(extra_ids), min_score=0.0, candidate_ids=extra_ids
+            )
+        
+        hits_by_id = {hit['resume_id']: hit for hit in vector_hits}
+        vector_ranking = [hit['resume_id'] for hit in sorted(vector_hits, key=lambda hit: -hit['similarity_score'])]
+        lexical_scores = dict(lexical_hits)
+        fused = reciprocal_rank_fusion([vector_ranking, [resume_id for resume_id, _ in lexical_hits]])
+        
+        results = []
+        for resume_id, fused_score in fused:
+            if resume_id not in hits_by_id:
                 continue
+            entry = dict(hits_by_id[resume_id], rank=len(results) + 1)
+            entry['lexical_score'] = round(lexical_scores.get(resume_id, 0.0), 3)
+            entry['fused_score'] = round(fused_score, 5)
+            results.append(entry)
+            if len(results) == top_k:
+                break
+        return results
+    
+    async def query_candidates(
+        self,
+        db: AsyncSession,
+        recruiter_id: int,
+        query: str,
+        top_k: int = 10,
+        mode: str = "hybrid"
+    ) -> Dict:
+        """
+        Candidate search with the query language of parse_candidate_query.
         
-        if not resume_embeddings:
-            return []
+        Structured clauses are planned (most selective first) and run as one
+        indexed SQL query plus posting-list filters; the free text is then
+        scored by search_candidates within the survivors only. Survivor ids
+        go back to Postgres as a single array parameter, and a filters-only
+        query over SQL clauses never materializes them at all. Returns the results with
+        the plan and per-stage timings.
         
-        # Create FAISS index
-        resume_embeddings_array = np.array(resume_embeddings).astype('float32')
+        Results are cached per normalized query until the recruiter's index
+        version (or the lexical index) changes.
+        """
+        stages: List[Dict] = []
         
-        # Normalize vectors for cosine similarity
-        faiss.normalize_L2(resume_embeddings_array)
+        started = time.perf_counter()
+        parsed = parse_candidate_query(query, recruiter_id)
+        if not parsed.text and not parsed.filters:
+            raise QuerySyntaxError("Empty query")
+        stages.append({"stage": "parse", "ms": round((time.perf_counter() - started) * 1000, 2)})
         
-        # Build index
-        index = faiss.IndexFlatIP(self.embedding_dim)  # Inner Product for cosine similarity
-        index.add(resume_embeddings_array)
+        started = time.perf_counter()
+        await lexical_index_store.sync(db, recruiter_id)
+        space = await self.serving_space(db, recruiter_id)
+        cache_key = (
+            "search", recruiter_id, normalize_query(query), top_k, mode, space.version,
+            await index_version(db, recruiter_id), lexical_index_store.revision(recruiter_id)
+        )
+        cached = search_result_cache.get(cache_key)
+        stages.append({
+            "stage": "cache",
+            "hit": cached is not None,
+            "ms": round((time.perf_counter() - started) * 1000, 2),
+        })
+        if cached is not None:
+            return dict(cached, query=query, stages=stages, cached=True)
         
-        # Search for similar resumes
-        job_embedding_normalized = job_embedding.reshape(1, -1).astype('float32')
-        faiss.normalize_L2(job_embedding_normalized)
+        started = time.perf_counter()
+        plan = await plan_filters(db, recruiter_id, parsed.filters)
+        stages.append({"stage": "plan", "ms": round((time.perf_counter() - started) * 1000, 2)})
         
-        # Get top_k results
-        k = min(top_k, len(valid_resumes))
-        distances, indices = index.search(job_embedding_normalized, k)
+        if not parsed.free_text and all(f.source == "sql" for f in plan):
+            # Filters only, all SQL: matched and ordered in one query, no id set is built
+            candidate_ids = None
+            survivors = sql_condition(plan)
+        else:
+            candidates = await apply_filters(db, recruiter_id, plan, stages)
+            candidate_ids = sorted(candidates) if candidates is not None else None
+            survivors = id_in(Resume.id, candidate_ids) if candidate_ids is not None else None
         
-        # Prepare results
-        recommendations = []
-        for i, idx in enumerate(indices[0]):
-            similarity_score = float(distances[0][i])
-            
-            # Convert cosine similarity to percentage (0-100)
-            match_percentage = (similarity_score + 1) * 50  # Scale from [-1,1] to [0,100]
-            
-            if match_percentage >= (min_score * 100):
-                resume = valid_resumes[idx]
-                recommendations.append({
-                    'resume_id': resume.id,
-                    'candidate_name': resume.candidate_name,
-                    'candidate_email': resume.candidate_email,
-                    'similarity_score': round(match_percentage, 2),
-                    'skills': resume.skills or [],
-                    'experience_years': resume.experience_years,
-                    'rank': i + 1
-                })
-        
-        return recommendations
+        started = time.perf_counter()
+        if candidate_ids is not None and not candidate_ids:
+            results = []
+        elif parsed.free_text:
+            results = await self.search_candidates(db, recruiter_id, parsed.free_text, top_k, mode, candidate_ids)
+        else:
+            # Filters only: every survivor matches equally, newest first
+            newest = await db.execute(
+                select(Resume.id)
+                .filter(Resume.uploader_id == recruiter_id, survivors)
+                .order_by(Resume.created_at.desc(), Resume.id.desc())
+                .limit(top_k)
+            )
+            results = await self.load_candidate_entries(db, [(resume_id, 100.0) for resume_id in newest.scalars()])
+        stages.append({
+            "stage": "score",
+            "mode": mode if parsed.free_text else "filters_only",
+            "candidates": len(candidate_ids) if candidate_ids is not None else None,
+            "ms": round((time.perf_counter() - started) * 1000, 2),
+        })
+        
+        search = {
+            "query": query,
+            "free_text": parsed.free_text,
+            "plan": [
+                {"clause": f.label, "source": f.source, "negated": f.negated, "estimate": f.estimate}
+                for f in plan
+            ],
+            "stages": stages,
+            "results": results,
+            "cached": False,
+        }
+        search_result_cache.put(cache_key, search)
+        return search
     
     async def generate_outreach_message(
         self,
@@ -180,37 +570,117 @@ Best regards"""
     
     async def generate_batch_recommendations(
         self,
+        db: AsyncSession,
         job: Job,
-        all_resumes: List[Resume],
+        recruiter_id: int,
+        total_candidates: int,
         top_k: int = 10,
+        generate_messages: bool = False,
+        prefilter: bool = False,
+        depth: Optional[int] = None
+    ) -> Dict:
+        """
+        Generate a recommendation report for the first top_k candidates.
+        
+        Up to depth candidates are ranked once and kept as a snapshot; the
+        report's next_cursor pages through it without re-scoring.
+        """
+        
+        depth = max(top_k, depth or settings.RECOMMENDATION_SNAPSHOT_DEPTH)
+        snapshot = await self.create_recommendation_snapshot(
+            db, job, recruiter_id, total_candidates, depth, prefilter
+        )
+        return await self.recommendation_page(db, job, snapshot, 0, top_k, generate_messages)
+    
+    async def create_recommendation_snapshot(
+        self,
+        db: AsyncSession,
+        job: Job,
+        recruiter_id: int,
+        total_candidates: int,
+        depth: int,
+        prefilter: bool = False
+    ) -> RankedSnapshot:
+        """Rank up to depth candidates and store the ranking for cursor pagination"""
+        
+        depth = min(depth, settings.RECOMMENDATION_SNAPSHOT_MAX_DEPTH)
+        
+        # Unchanged job content and resume set: reuse the earlier ranking
+        space = await self.serving_space(db, recruiter_id)
+        cache_key = (
+            "recommend", recruiter_id, job.id, job_content_hash(job), depth, prefilter, space.version,
+            await index_version(db, recruiter_id)
+        )
+        cached = search_result_cache.get(cache_key)
+        if cached is not None:
+            ranking, candidates_scored = cached
+        else:
+            # Narrow the pool by skills/experience before any vector scoring
+            candidate_ids = None
+            if prefilter:
+                candidate_ids = await prefilter_candidates(db, job, recruiter_id)
+            candidates_scored = len(candidate_ids) if candidate_ids is not None else total_candidates
+            
+            ranking = await self.rank_candidates(
+                db=db,
+                job=job,
+                recruiter_id=recruiter_id,
+                top_k=depth,
+                candidate_ids=candidate_ids
+            )
+            search_result_cache.put(cache_key, (ranking, candidates_scored))
+        
+        return await recommendation_snapshots.create(recruiter_id, job.id, ranking, {
+            'total_candidates_screened': total_candidates,
+            'candidates_scored': candidates_scored,
+            'candidates_filtered_out': total_candidates - candidates_scored,
+        })
+    
+    def _page_summary(self, job: Job, snapshot: RankedSnapshot, offset: int, limit: int) -> Dict:
+        next_offset = offset + limit
+        return {
+            'job_id': job.id,
+            'job_title': job.title,
+            **snapshot.summary,
+            'total_ranked': len(snapshot.ranking),
+            'offset': offset,
+            'next_cursor': (
+                encode_cursor(snapshot.snapshot_id, next_offset) if next_offset < len(snapshot.ranking) else None
+            ),
+        }
+    
+    async def _add_outreach_message(self, job: Job, rec: Dict) -> None:
+        rec['outreach_message'] = await self.generate_outreach_message(
+            job_title=job.title,
+            company=job.company,
+            candidate_name=rec['candidate_name'] or "there",
+            candidate_skills=rec['skills'],
+            match_score=rec['similarity_score'],
+            job_description=job.description
+        )
+    
+    async def recommendation_page(
+        self,
+        db: AsyncSession,
+        job: Job,
+        snapshot: RankedSnapshot,
+        offset: int,
+        limit: int,
         generate_messages: bool = False
     ) -> Dict:
-        """Generate complete recommendation report with optional outreach messages"""
+        """One page of a ranked snapshot; only the page's resume rows are read"""
         
-        # Find matching candidates
-        recommendations = await self.find_matching_candidates(
-            job=job,
-            all_resumes=all_resumes,
-            top_k=top_k
+        recommendations = await self.load_candidate_entries(
+            db, snapshot.ranking[offset:offset + limit], first_rank=offset + 1
         )
         
         # Generate outreach messages if requested
         if generate_messages:
             for rec in recommendations:
-                message = await self.generate_outreach_message(
-                    job_title=job.title,
-                    company=job.company,
-                    candidate_name=rec['candidate_name'] or "there",
-                    candidate_skills=rec['skills'],
-                    match_score=rec['similarity_score'],
-                    job_description=job.description
-                )
-                rec['outreach_message'] = message
+                await self._add_outreach_message(job, rec)
         
         return {
-            'job_id': job.id,
-            'job_title': job.title,
-            'total_candidates_screened': len(all_resumes),
+            **self._page_summary(job, snapshot, offset, limit),
             'recommendations_count': len(recommendations),
             'top_candidates': recommendations,
             'average_match_score': round(
@@ -218,51 +688,349 @@ Best regards"""
             ) if recommendations else 0
         }
     
+    async def stream_recommendation_page(
+        self,
+        job: Job,
+        snapshot: RankedSnapshot,
+        offset: int,
+        limit: int,
+        generate_messages: bool = False,
+        chunk_size: int = 50
+    ) -> AsyncIterator[Dict]:
+        """
+        A page as a summary record followed by one record per candidate.
+        
+        Resume rows are read chunk_size at a time, so the first candidates go
+        out before later ones are loaded. Uses its own session: the request's
+        is closed once a streaming response starts.
+        """
+        
+        page = snapshot.ranking[offset:offset + limit]
+        summary = self._page_summary(job, snapshot, offset, limit)
+        summary['average_match_score'] = round(sum(score for _, score in page) / len(page), 2) if page else 0
+        yield {'type': 'summary', **summary}
+        
+        async with AsyncSessionLocal() as db:
+            for start in range(0, len(page), chunk_size):
+                entries = await self.load_candidate_entries(
+                    db, page[start:start + chunk_size], first_rank=offset + start + 1
+                )
+                for rec in entries:
+                    if generate_messages:
+                        await self._add_outreach_message(job, rec)
+                    yield {'type': 'candidate', **rec}
+    
+    def _load_refresh_checkpoint(self) -> Dict[str, int]:
+        """Last committed id per table from an interrupted embedding refresh"""
+        try:
+            with open(self.refresh_checkpoint_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+    
+    def _save_refresh_checkpoint(self, checkpoint: Dict[str, int]) -> None:
+        tmp_path = self.refresh_checkpoint_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        tmp_path.replace(self.refresh_checkpoint_path)
+    
+    async def _refresh_table_embeddings(
+        self,
+        db: AsyncSession,
+        model,
+        columns: List,
+        build_text: Callable,
+        label: str,
+        batch_size: int,
+        checkpoint: Dict[str, int],
+        stats: Dict,
+        progress_callback: Optional[Callable[[str, int, int], None]] = None
+    ) -> None:
+        """Stream one table through a server-side cursor and fill its pending vectors chunk by chunk"""
+        
+        last_id = checkpoint.get(label, 0)
+        # Rows with neither a stored nor a pending vector from the current model
+        needs_embedding = (
+            model.id > last_id,
+            model.embedding_model.is_distinct_from(self.model_version),
+            model.pending_embedding_model.is_distinct_from(self.model_version),
+        )
+        total_result = await db.execute(
+            select(func.count(model.id)).filter(*needs_embedding)
+        )
+        total = total_result.scalar() or 0
+        done = 0
+        
+        # Only the columns needed to build the text are read, never whole ORM rows
+        stream = await db.stream(
+            select(model.id, *columns)
+            .filter(*needs_embedding)
+            .order_by(model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        
+        # Writes go through a separate session so per-chunk commits don't close the cursor
+        async with AsyncSessionLocal() as write_db:
+            async for rows in stream.partitions(batch_size):
+                texts = [build_text(row) for row in rows]
+                try:
+                    documents = await embed_documents(texts)
+                    values = [
+                        {
+                            'id': row.id,
+                            'pending_embedding': encode_embedding(document.vector),
+                            'pending_embedding_model': self.model_version,
+                            'pending_embedding_fingerprint': self.text_fingerprint(text),
+                            'pending_chunk_embeddings': (
+                                encode_embeddings(document.chunks) if self.keep_chunk_embeddings else None
+                            ),
+                        }
+                        for row, text, document in zip(rows, texts, documents)
+                    ]
+                    
+                    # Stored vectors stay untouched, so searches keep working on the old space
+                    await write_db.execute(update(model), values)
+                    await write_db.commit()
+                    
+                    stats[f'{label}_updated'] += len(rows)
+                except Exception as e:
+                    await write_db.rollback()
+                    stats['errors'].append(
+                        f"{label.capitalize()} {rows[0].id}-{rows[-1].id}: {str(e)}"
+                    )
+                
+                # Resume point after a crash: everything up to here is committed
+                checkpoint[label] = rows[-1].id
+                self._save_refresh_checkpoint(checkpoint)
+                
+                done += len(rows)
+                if progress_callback:
+                    progress_callback(label, done, total)
+                else:
+                    print(f"Embedding refresh: {label} {done}/{total}")
+                
+                # Leave the model and the database to live requests between chunks
+                await asyncio.sleep(settings.EMBEDDING_MIGRATION_PAUSE_SECONDS)
+    
+    async def _unmigrated_recruiters(self, db: AsyncSession) -> Set[int]:
+        """Recruiters that still have rows without a vector from the current model"""
+        recruiters: Set[int] = set()
+        for model, owner in ((Resume, Resume.uploader_id), (Job, Job.recruiter_id)):
+            result = await db.execute(
+                select(owner).filter(
+                    model.embedding_model.is_distinct_from(self.model_version),
+                    model.pending_embedding_model.is_distinct_from(self.model_version)
+                ).distinct()
+            )
+            recruiters.update(result.scalars().all())
+        return recruiters
+    
+    async def _promote_pending(self, db: AsyncSession, model, owner, recruiter_id: int) -> int:
+        """
+        Move one recruiter's pending vectors into the stored columns (SET
+        reads the old row); returns rows promoted. A stored vector already
+        from the current model was encoded after the pending one, so it is
+        kept and only the pending columns are cleared.
+        """
+        cleared = dict(
+            pending_embedding=None,
+            pending_embedding_model=None,
+            pending_embedding_fingerprint=None,
+            pending_chunk_embeddings=None
+        )
+        result = await db.execute(
+            update(model)
+            .where(
+                owner == recruiter_id,
+                model.pending_embedding_model == self.model_version,
+                model.embedding_model.is_distinct_from(self.model_version)
+            )
+            .values(
+                embedding=model.pending_embedding,
+                embedding_model=model.pending_embedding_model,
+                embedding_fingerprint=model.pending_embedding_fingerprint,
+                chunk_embeddings=model.pending_chunk_embeddings,
+                **cleared
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            update(model)
+            .where(owner == recruiter_id, model.pending_embedding_model.isnot(None))
+            .values(**cleared)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+    
+    async def _switch_over_recruiters(self, db: AsyncSession) -> List[int]:
+        """
+        Switch every fully covered recruiter to the current model, one
+        transaction per recruiter; vector indexes follow on their next sync.
+        """
+        owners: Set[int] = set()
+        for owner in (Resume.uploader_id, Job.recruiter_id):
+            owners.update((await db.execute(select(owner).distinct())).scalars().all())
+        switched_result = await db.execute(
+            select(RecruiterEmbeddingVersion.recruiter_id)
+            .filter(RecruiterEmbeddingVersion.embedding_model == self.model_version)
+        )
+        ready = owners - await self._unmigrated_recruiters(db) - set(switched_result.scalars().all())
+        
+        switched = []
+        for recruiter_id in sorted(ready):
+            try:
+                await self._promote_pending(db, Resume, Resume.uploader_id, recruiter_id)
+                await self._promote_pending(db, Job, Job.recruiter_id, recruiter_id)
+                await db.merge(RecruiterEmbeddingVersion(recruiter_id=recruiter_id, embedding_model=self.model_version))
+                await db.commit()
+                switched.append(recruiter_id)
+            except Exception as e:
+                await db.rollback()
+                print(f"Embedding switchover failed for recruiter {recruiter_id}: {e}")
+        return switched
+    
+    async def _promote_switched_pending(self, db: AsyncSession) -> int:
+        """
+        Promote pending vectors written after their recruiter switched over,
+        e.g. by a chunk that was in flight during the switch. Such rows
+        would otherwise stay stranded until a lazy re-embed reached them.
+        """
+        promoted = 0
+        for model, owner in ((Resume, Resume.uploader_id), (Job, Job.recruiter_id)):
+            result = await db.execute(
+                select(owner)
+                .join(RecruiterEmbeddingVersion, RecruiterEmbeddingVersion.recruiter_id == owner)
+                .filter(
+                    RecruiterEmbeddingVersion.embedding_model == self.model_version,
+                    model.pending_embedding_model.isnot(None)
+                )
+                .distinct()
+            )
+            for recruiter_id in result.scalars().all():
+                try:
+                    promoted += await self._promote_pending(db, model, owner, recruiter_id)
+                    await db.commit()
+                except Exception as e:
+                    await db.rollback()
+                    print(f"Promoting pending vectors failed for recruiter {recruiter_id}: {e}")
+        return promoted
+    
     async def update_embeddings_batch(
         self,
         db: AsyncSession,
-        batch_size: int = 50
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[str, int, int], None]] = None
     ) -> Dict:
-        """Batch update embeddings for all jobs and resumes"""
+        """
+        Re-embed jobs and resumes into the current model's space, online.
+        
+        Rows without a current-model vector are streamed in id order, encoded
+        in chunks of batch_size into the pending columns and committed per
+        chunk, pausing EMBEDDING_MIGRATION_PAUSE_SECONDS in between. Progress
+        is checkpointed after every chunk; a run that crashed resumes after
+        the last committed id. Searches keep using the stored vectors until a
+        recruiter's rows are all covered, then that recruiter switches over.
+        """
         
+        batch_size = batch_size or self.encode_batch_size
         stats = {
             'jobs_updated': 0,
             'resumes_updated': 0,
+            'recruiters_switched': 0,
+            'late_rows_promoted': 0,
             'errors': []
         }
         
-        # Update job embeddings
-        try:
-            jobs_result = await db.execute(select(Job))
-            jobs = jobs_result.scalars().all()
-            
-            for job in jobs:
-                try:
-                    embedding = self.generate_job_embedding(job)
-                    job.embedding_vector = embedding.tolist()
-                    stats['jobs_updated'] += 1
-                except Exception as e:
-                    stats['errors'].append(f"Job {job.id}: {str(e)}")
-            
-            await db.commit()
-        except Exception as e:
-            stats['errors'].append(f"Job batch update failed: {str(e)}")
+        checkpoint = self._load_refresh_checkpoint()
+        if checkpoint:
+            stats['resumed_from'] = dict(checkpoint)
         
-        # Update resume embeddings
-        try:
-            resumes_result = await db.execute(select(Resume))
-            resumes = resumes_result.scalars().all()
-            
-            for resume in resumes:
+        tables = (
+            (Job, [Job.title, Job.description, Job.requirements, Job.required_skills, Job.location],
+             self.build_job_text, 'jobs'),
+            (Resume, [Resume.candidate_name, Resume.raw_text, Resume.skills, Resume.experience_years],
+             self.build_resume_text, 'resumes'),
+        )
+        
+        # Rows uploaded with the previous model during a pass are picked up by the next one
+        for _ in range(MIGRATION_MAX_PASSES):
+            for model, columns, build_text, label in tables:
                 try:
-                    embedding = self.generate_resume_embedding(resume)
-                    resume.embedding_vector = embedding.tolist()
-                    stats['resumes_updated'] += 1
+                    await self._refresh_table_embeddings(
+                        db, model, columns, build_text, label,
+                        batch_size, checkpoint, stats, progress_callback
+                    )
                 except Exception as e:
-                    stats['errors'].append(f"Resume {resume.id}: {str(e)}")
+                    stats['errors'].append(f"{label.capitalize()} batch update failed: {str(e)}")
+                    return stats
             
-            await db.commit()
-        except Exception as e:
-            stats['errors'].append(f"Resume batch update failed: {str(e)}")
+            # Completed pass: the next one starts from the beginning
+            checkpoint = {}
+            self.refresh_checkpoint_path.unlink(missing_ok=True)
+            
+            stats['recruiters_switched'] += len(await self._switch_over_recruiters(db))
+            stats['late_rows_promoted'] += await self._promote_switched_pending(db)
+            if not await self._unmigrated_recruiters(db):
+                break
+        
+        stats['recruiters_pending'] = len(await self._unmigrated_recruiters(db))
+        return stats
+    
+    async def run_embedding_migration(self, batch_size: Optional[int] = None) -> Optional[Dict]:
+        """
+        Background task around update_embeddings_batch.
         
+        The run holds a session-level advisory lock on a connection of its
+        own, so starting one while any worker is migrating is a no-op and the
+        checkpoint has a single writer. The lock is released with the
+        connection if the worker dies.
+        """
+        async with engine.connect() as lock_conn:
+            result = await lock_conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": EMBEDDING_MIGRATION_LOCK_KEY}
+            )
+            acquired = result.scalar()
+            # The lock outlives the transaction; don't stay idle in one for the whole run
+            await lock_conn.commit()
+            if not acquired:
+                return None
+            try:
+                async with AsyncSessionLocal() as db:
+                    stats = await self.update_embeddings_batch(db, batch_size=batch_size)
+            finally:
+                await lock_conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": EMBEDDING_MIGRATION_LOCK_KEY}
+                )
+                await lock_conn.commit()
+        print(f"Embedding migration finished: {stats}")
         return stats
+    
+    async def embedding_migration_running(self, db: AsyncSession) -> bool:
+        """Whether a worker, in any process, holds the migration lock"""
+        # A bigint key appears in pg_locks split into classid (high half) and objid (low half), objsubid 1
+        result = await db.execute(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND granted "
+                "AND database = (SELECT oid FROM pg_database WHERE datname = current_database()) "
+                "AND classid = :high AND objid = :low AND objsubid = 1)"
+            ),
+            {"high": EMBEDDING_MIGRATION_LOCK_KEY >> 32, "low": EMBEDDING_MIGRATION_LOCK_KEY & 0xFFFFFFFF}
+        )
+        return bool(result.scalar())
+    
+    async def embedding_migration_status(self, db: AsyncSession) -> Dict:
+        switched_result = await db.execute(
+            select(func.count(RecruiterEmbeddingVersion.recruiter_id))
+            .filter(RecruiterEmbeddingVersion.embedding_model == self.model_version)
+        )
+        return {
+            'model_version': self.model_version,
+            'previous_model': settings.EMBEDDING_PREVIOUS_MODEL_NAME,
+            'running': await self.embedding_migration_running(db),
+            'checkpoint': self._load_refresh_checkpoint(),
+            'recruiters_switched': switched_result.scalar() or 0,
+            'recruiters_pending': len(await self._unmigrated_recruiters(db)),
+        }
+
+
+recommendation_service = RecommendationService()
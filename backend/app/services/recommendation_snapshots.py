@@ -0,0 +1,119 @@
+import base64
+import json
+import secrets
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.metrics import register_collector
+
+
+# (resume_id, match percentage), best first
+Ranking = List[Tuple[int, float]]
+
+
+@dataclass
+class RankedSnapshot:
+    snapshot_id: str
+    recruiter_id: int
+    job_id: int
+    ranking: Ranking
+    summary: Dict  # screened/scored/filtered counts of the run that produced the ranking
+    created_at: float = field(default_factory=time.time)
+
+
+def encode_cursor(snapshot_id: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{snapshot_id}:{offset}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Snapshot id and offset from a cursor token; ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        snapshot_id, offset = raw.rsplit(":", 1)
+        offset = int(offset)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed cursor: {cursor!r}") from e
+    if offset < 0:
+        raise ValueError(f"Malformed cursor: {cursor!r}")
+    return snapshot_id, offset
+
+
+class RecommendationSnapshotStore:
+    """
+    Ranked recommendation lists kept in Redis for cursor pagination.
+
+    A search ranks once and stores (resume_id, score) pairs; later pages
+    are sliced from the snapshot, so only the page's resume rows are read.
+    Snapshots live in Redis rather than worker memory, so a cursor works
+    on any API worker; Redis expires them after
+    RECOMMENDATION_SNAPSHOT_TTL_SECONDS.
+    """
+
+    key_prefix = "recommendation_snapshot:"
+
+    def __init__(self, redis_url: str, ttl_seconds: int):
+        self.redis_url = redis_url
+        self.ttl_seconds = ttl_seconds
+        self._client: Optional[redis.Redis] = None
+        self.created = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def client(self) -> redis.Redis:
+        # Created on first use; the pool connects lazily as well
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.redis_url)
+        return self._client
+
+    async def create(self, recruiter_id: int, job_id: int, ranking: Ranking, summary: Dict) -> RankedSnapshot:
+        snapshot = RankedSnapshot(secrets.token_urlsafe(12), recruiter_id, job_id, ranking, summary)
+        payload = json.dumps({
+            "recruiter_id": recruiter_id,
+            "job_id": job_id,
+            "ranking": ranking,
+            "summary": summary,
+            "created_at": snapshot.created_at,
+        })
+        await self.client.set(self.key_prefix + snapshot.snapshot_id, payload, ex=self.ttl_seconds)
+        self.created += 1
+        return snapshot
+
+    async def get(self, snapshot_id: str, recruiter_id: int) -> Optional[RankedSnapshot]:
+        """The snapshot if it exists, hasn't expired and belongs to the recruiter"""
+        payload = await self.client.get(self.key_prefix + snapshot_id)
+        data = json.loads(payload) if payload is not None else None
+        if data is None or data["recruiter_id"] != recruiter_id:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return RankedSnapshot(
+            snapshot_id=snapshot_id,
+            recruiter_id=data["recruiter_id"],
+            job_id=data["job_id"],
+            ranking=[(resume_id, score) for resume_id, score in data["ranking"]],
+            summary=data["summary"],
+            created_at=data["created_at"]
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+recommendation_snapshots = RecommendationSnapshotStore(
+    redis_url=settings.REDIS_URL,
+    ttl_seconds=settings.RECOMMENDATION_SNAPSHOT_TTL_SECONDS
+)
+
+
+@register_collector
+def recommendation_snapshot_metrics():
+    yield "recommendation_snapshots_created_total", {}, recommendation_snapshots.created
+    yield "recommendation_snapshot_lookups_total", {"result": "hit"}, recommendation_snapshots.hits
+    yield "recommendation_snapshot_lookups_total", {"result": "miss"}, recommendation_snapshots.misses
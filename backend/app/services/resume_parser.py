@@ -3,23 +3,15 @@ from pathlib import Path
 from typing import Dict, List, Optional
 import PyPDF2
 import docx
-import spacy
 from datetime import datetime
 
+from app.services.model_registry import get_spacy_nlp
+
 
 class ResumeParser:
     """Parse resumes and extract structured information"""
     
     def __init__(self):
-        # Load spaCy model for NLP
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            print("Downloading spaCy model...")
-            import subprocess
-            subprocess.run(["python", "-m", "spacy", "download", "en_core_web_sm"])
-            self.nlp = spacy.load("en_core_web_sm")
-        
         # Common skill keywords
         self.skill_keywords = {
             'programming': ['python', 'java', 'javascript', 'c++', 'c#', 'ruby', 'php', 'swift', 'kotlin', 'go', 'rust', 'typescript'],
@@ -30,6 +22,11 @@ class ResumeParser:
             'tools': ['git', 'jenkins', 'jira', 'linux', 'bash', 'agile', 'scrum'],
         }
     
+    @property
+    def nlp(self):
+        # Shared spaCy pipeline, loaded once per process on first use
+        return get_spacy_nlp()
+    
     def extract_text_from_pdf(self, file_path: Path) -> str:
         """Extract text from PDF file"""
         try:
@@ -0,0 +1,139 @@
+from typing import Dict, List, Optional
+
+from sqlalchemy import Numeric, and_, cast, delete, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.application import Application
+from app.models.job import Job
+from app.models.scoring_profile import ScoringProfile
+from app.services.matching_service import SCORE_WEIGHTS
+
+
+def normalize_weights(skill: float, experience: float, semantic: float) -> Dict[str, float]:
+    """Weights scaled to sum to 1; raises ValueError for negative or all-zero weights"""
+    if min(skill, experience, semantic) < 0:
+        raise ValueError("Weights must not be negative")
+    total = skill + experience + semantic
+    if total <= 0:
+        raise ValueError("At least one weight must be positive")
+    return {
+        'skill': skill / total,
+        'experience': experience / total,
+        'semantic': semantic / total,
+    }
+
+
+def _profile_weights(profile: ScoringProfile) -> Dict[str, float]:
+    return {
+        'skill': profile.skill_weight,
+        'experience': profile.experience_weight,
+        'semantic': profile.semantic_weight,
+    }
+
+
+def weighted_score_expression(weights: Dict) -> object:
+    """
+    SQL for the overall match score from an application's stored components,
+    rounded like calculate_overall_match. Weights are floats or SQL columns.
+    """
+    total = (
+        func.coalesce(Application.skill_match_score, 0) * weights['skill'] +
+        func.coalesce(Application.experience_match_score, 0) * weights['experience'] +
+        func.coalesce(Application.semantic_similarity_score, 0) * weights['semantic']
+    )
+    return func.round(cast(total, Numeric), 2)
+
+
+async def get_profile(db: AsyncSession, recruiter_id: int, job_id: Optional[int] = None) -> Optional[ScoringProfile]:
+    """The recruiter's default profile (job_id None) or a job's own profile"""
+    query = select(ScoringProfile).filter(ScoringProfile.recruiter_id == recruiter_id)
+    query = query.filter(ScoringProfile.job_id.is_(None) if job_id is None else ScoringProfile.job_id == job_id)
+    return (await db.execute(query)).scalars().first()
+
+
+async def resolve_weights(db: AsyncSession, recruiter_id: int, job_ids: List[int]) -> Dict[int, Dict[str, float]]:
+    """Effective weights per job: the job's profile, else the recruiter's default, else SCORE_WEIGHTS"""
+    result = await db.execute(
+        select(ScoringProfile).filter(
+            ScoringProfile.recruiter_id == recruiter_id,
+            (ScoringProfile.job_id.is_(None)) | (ScoringProfile.job_id.in_(job_ids))
+        )
+    )
+    profiles = {profile.job_id: _profile_weights(profile) for profile in result.scalars().all()}
+    default = profiles.get(None, dict(SCORE_WEIGHTS))
+    return {job_id: profiles.get(job_id, default) for job_id in job_ids}
+
+
+async def reweight_applications(db: AsyncSession, recruiter_id: int, job_id: Optional[int] = None) -> int:
+    """
+    Recompute match_score of the recruiter's applications (or one job's) from
+    their stored component scores, in one set-based UPDATE.
+
+    Each job's weights are resolved in SQL (job profile, recruiter default,
+    built-in defaults); rows whose score doesn't change are not written.
+    Returns the number of applications updated.
+    """
+    job_profile = aliased(ScoringProfile)
+    default_profile = aliased(ScoringProfile)
+    weights = (
+        select(
+            Job.id.label('job_id'),
+            func.coalesce(
+                job_profile.skill_weight, default_profile.skill_weight, literal(SCORE_WEIGHTS['skill'])
+            ).label('skill'),
+            func.coalesce(
+                job_profile.experience_weight, default_profile.experience_weight, literal(SCORE_WEIGHTS['experience'])
+            ).label('experience'),
+            func.coalesce(
+                job_profile.semantic_weight, default_profile.semantic_weight, literal(SCORE_WEIGHTS['semantic'])
+            ).label('semantic'),
+        )
+        .outerjoin(job_profile, job_profile.job_id == Job.id)
+        .outerjoin(
+            default_profile,
+            and_(default_profile.recruiter_id == Job.recruiter_id, default_profile.job_id.is_(None))
+        )
+        .filter(Job.recruiter_id == recruiter_id)
+    )
+    if job_id is not None:
+        weights = weights.filter(Job.id == job_id)
+    weights = weights.subquery()
+
+    score = weighted_score_expression(weights.c)
+    result = await db.execute(
+        update(Application)
+        .where(Application.job_id == weights.c.job_id, Application.match_score.is_distinct_from(score))
+        .values(match_score=score)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def set_profile(
+    db: AsyncSession,
+    recruiter_id: int,
+    weights: Dict[str, float],
+    job_id: Optional[int] = None
+) -> int:
+    """Create or replace a profile and re-weight the affected applications; returns rows updated"""
+    profile = await get_profile(db, recruiter_id, job_id)
+    if profile is None:
+        profile = ScoringProfile(recruiter_id=recruiter_id, job_id=job_id)
+        db.add(profile)
+    profile.skill_weight = weights['skill']
+    profile.experience_weight = weights['experience']
+    profile.semantic_weight = weights['semantic']
+    await db.flush()
+    # A default profile affects every job without its own
+    return await reweight_applications(db, recruiter_id, job_id)
+
+
+async def delete_profile(db: AsyncSession, recruiter_id: int, job_id: Optional[int] = None) -> int:
+    """Remove a profile, falling back to the next level, and re-weight; returns rows updated"""
+    query = delete(ScoringProfile).where(ScoringProfile.recruiter_id == recruiter_id)
+    query = query.where(ScoringProfile.job_id.is_(None) if job_id is None else ScoringProfile.job_id == job_id)
+    await db.execute(query)
+    await db.flush()
+    return await reweight_applications(db, recruiter_id, job_id)
@@ -0,0 +1,72 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import register_collector
+from app.models.index_version import RecruiterIndexVersion
+
+
+async def index_version(db: AsyncSession, recruiter_id: int) -> int:
+    """Current version of the recruiter's resume set; 0 before its first change"""
+    result = await db.execute(
+        select(RecruiterIndexVersion.version).filter(RecruiterIndexVersion.recruiter_id == recruiter_id)
+    )
+    return result.scalar() or 0
+
+
+def normalize_query(query: str) -> str:
+    """Case and whitespace don't change a search (tokenizer and embedding model are uncased)"""
+    return " ".join((query or "").lower().split())
+
+
+class SearchResultCache:
+    """
+    In-process LRU of search and recommendation results.
+
+    Keys include the recruiter's index version, which database triggers bump
+    on every resume change, so an entry can never be served once its inputs
+    change; there is no TTL, superseded entries just age out.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+search_result_cache = SearchResultCache(max_entries=settings.SEARCH_RESULT_CACHE_MAX)
+
+
+@register_collector
+def search_result_cache_metrics():
+    yield "search_result_cache_entries", {}, len(search_result_cache)
+    yield "search_result_cache_lookups_total", {"result": "hit"}, search_result_cache.hits
+    yield "search_result_cache_lookups_total", {"result": "miss"}, search_result_cache.misses
@@ -0,0 +1,770 @@
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+import faiss
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import register_collector
+
+
+INDEX_AUTO = "auto"
+INDEX_FLAT = "flat"
+INDEX_HNSW = "hnsw"
+INDEX_SQ8 = "sq8"
+INDEX_IVFPQ = "ivfpq"
+
+# Below these sizes a flat index is small and exact, and the quantizers can't be trained well
+MIN_TRAINING_SIZE = {
+    INDEX_FLAT: 0,
+    INDEX_HNSW: 0,
+    INDEX_SQ8: 1000,
+    INDEX_IVFPQ: 10000,
+}
+
+# Tiers used by VECTOR_INDEX_TYPE=auto, smallest collections first
+AUTO_TIERS = (INDEX_FLAT, INDEX_HNSW, INDEX_IVFPQ)
+
+# A shrinking collection keeps its tier until it is 20% below the boundary
+AUTO_HYSTERESIS = 0.8
+
+# Tombstoned + replaced HNSW entries that trigger a compacting rebuild
+MAX_STALE_FRACTION = 0.1
+
+# Vectors a PCA projection is fitted on; more adds little to a 384x384 covariance
+PCA_TRAINING_SAMPLE = 100000
+
+RECALL_SAMPLE_QUERIES = 100
+RECALL_K = 10
+LATENCY_WINDOW = 1000
+
+
+def ivf_nlist(n: int) -> int:
+    """Number of inverted lists for n vectors, keeping ~39 training points per list"""
+    nlist = settings.IVF_NLIST or int(4 * math.sqrt(n))
+    return max(1, min(nlist, n // 39))
+
+
+def build_index(
+    kind: str,
+    embedding_dim: int,
+    training_vectors: Optional[np.ndarray] = None,
+    nlist: Optional[int] = None,
+    pq_subquantizers: Optional[int] = None
+) -> faiss.IndexIDMap:
+    """Empty ID-mapped inner-product index of the given kind, trained if it needs it"""
+    if kind == INDEX_FLAT:
+        inner = faiss.IndexFlatIP(embedding_dim)
+    elif kind == INDEX_HNSW:
+        # Graph over full float32 vectors; no training, but no removal either
+        inner = faiss.IndexHNSWFlat(embedding_dim, settings.HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        inner.hnsw.efConstruction = settings.HNSW_EF_CONSTRUCTION
+    elif kind == INDEX_SQ8:
+        # 1 byte per dimension, trained on per-dimension value ranges
+        inner = faiss.IndexScalarQuantizer(
+            embedding_dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+        )
+    elif kind == INDEX_IVFPQ:
+        # pq_subquantizers bytes per vector, searched in nprobe of nlist clusters
+        inner = faiss.IndexIVFPQ(
+            faiss.IndexFlatIP(embedding_dim),
+            embedding_dim,
+            nlist or ivf_nlist(len(training_vectors)),
+            pq_subquantizers or settings.PQ_SUBQUANTIZERS,
+            8,
+            faiss.METRIC_INNER_PRODUCT
+        )
+        inner.nprobe = settings.IVF_NPROBE
+    else:
+        raise ValueError(f"Unknown vector index type: {kind}")
+
+    if not inner.is_trained:
+        inner.train(np.ascontiguousarray(training_vectors, dtype='float32'))
+    return faiss.IndexIDMap(inner)
+
+
+def fit_projection(vectors: np.ndarray, dim: int) -> Tuple[np.ndarray, float]:
+    """
+    (embedding_dim, dim) orthonormal projection onto the top principal
+    directions of the vectors, and the fraction of their energy it keeps.
+
+    Uncentered PCA (eigenvectors of X^T X): projected inner products then
+    approximate the original cosine scores directly, with no mean term.
+    """
+    if len(vectors) > PCA_TRAINING_SAMPLE:
+        rng = np.random.default_rng(0)
+        vectors = vectors[rng.choice(len(vectors), PCA_TRAINING_SAMPLE, replace=False)]
+    sample = np.asarray(vectors, dtype=np.float64)
+    eigenvalues, eigenvectors = np.linalg.eigh(sample.T @ sample)
+    top = np.argsort(eigenvalues)[::-1][:dim]
+    retained = float(eigenvalues[top].sum() / max(eigenvalues.sum(), 1e-12))
+    return np.ascontiguousarray(eigenvectors[:, top], dtype='float32'), retained
+
+
+def estimate_index_bytes(index: faiss.IndexIDMap, kind: str) -> int:
+    """Approximate resident size of an index: its codes or vectors, graph links and id map"""
+    n, d = index.ntotal, index.d
+    if kind == INDEX_IVFPQ:
+        inner = faiss.downcast_index(index.index)
+        per_vector = inner.code_size + 8  # codes plus the inverted list id
+        fixed = inner.nlist * d * 4  # coarse centroids
+    elif kind == INDEX_SQ8:
+        per_vector, fixed = d, 0
+    elif kind == INDEX_HNSW:
+        # Base layer links dominate the graph (2 * M neighbors per node)
+        per_vector, fixed = d * 4 + settings.HNSW_M * 2 * 4, 0
+    else:
+        per_vector, fixed = d * 4, 0
+    return n * (per_vector + 8) + fixed
+
+
+def index_kind(index: faiss.IndexIDMap) -> str:
+    inner = faiss.downcast_index(index.index)
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return INDEX_IVFPQ
+    if isinstance(inner, faiss.IndexScalarQuantizer):
+        return INDEX_SQ8
+    if isinstance(inner, faiss.IndexHNSW):
+        return INDEX_HNSW
+    return INDEX_FLAT
+
+
+def search_params(kind: str, k: int) -> faiss.SearchParameters:
+    """Query-time parameters for an index kind"""
+    if kind == INDEX_IVFPQ:
+        return faiss.SearchParametersIVF(nprobe=settings.IVF_NPROBE)
+    if kind == INDEX_HNSW:
+        return faiss.SearchParametersHNSW(efSearch=max(settings.HNSW_EF_SEARCH, k))
+    return faiss.SearchParameters()
+
+
+def measure_recall(
+    index: faiss.IndexIDMap,
+    kind: str,
+    vectors: np.ndarray,
+    resume_ids: np.ndarray,
+    projection: Optional[np.ndarray] = None
+) -> float:
+    """
+    recall@10 of the index against exact search, on a sample of its own
+    vectors. With a projection, this is the first-pass recall before re-ranking.
+    """
+    if (kind == INDEX_FLAT and projection is None) or len(vectors) == 0:
+        return 1.0
+    k = min(RECALL_K, len(vectors))
+    rng = np.random.default_rng(0)
+    queries = vectors[rng.choice(len(vectors), min(RECALL_SAMPLE_QUERIES, len(vectors)), replace=False)]
+    _, exact = faiss.knn(queries, vectors, k, metric=faiss.METRIC_INNER_PRODUCT)
+    if projection is not None:
+        queries = np.ascontiguousarray(queries @ projection)
+    _, found = index.search(queries, k, params=search_params(kind, k))
+    hits = sum(len(set(resume_ids[e]) & set(f)) for e, f in zip(exact, found))
+    return hits / exact.size
+
+
+class VectorIndexStore:
+    """
+    Persistent per-recruiter FAISS indexes keyed by Resume.id.
+
+    With VECTOR_INDEX_MEMORY_BUDGET_MB set, only the most recently used
+    indexes stay resident: cold ones are saved and dropped in LRU order and
+    loaded back from disk when next searched.
+    """
+
+    def __init__(self, index_dir: Path, embedding_dim: int = 384):
+        self.index_dir = index_dir
+        self.embedding_dim = embedding_dim
+        self._indexes: Dict[int, faiss.IndexIDMap] = {}
+        self._ids: Dict[int, Set[int]] = {}
+        self._read_only: Set[int] = set()
+        self._kinds: Dict[int, str] = {}
+        # HNSW can't remove vectors: deleted ids are filtered out, replaced ones counted
+        self._tombstones: Dict[int, Set[int]] = {}
+        self._replaced: Dict[int, int] = {}
+        # Changes made while a background build runs, replayed on swap
+        self._journals: Dict[int, List[Tuple[List[int], Optional[np.ndarray]]]] = {}
+        self._build_stats: Dict[int, Dict] = {}
+        # Embedding version of the vectors in each index, kept next to the index file
+        self._versions: Dict[int, str] = {}
+        # PCA projection (embedding_dim, reduced_dim) the index stores vectors in, if any
+        self._projections: Dict[int, np.ndarray] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+        # Resident indexes, least recently used first; unsaved ones are written out before eviction
+        self._lru: "OrderedDict[int, None]" = OrderedDict()
+        self._dirty: Set[int] = set()
+        self._loading: Dict[int, asyncio.Future] = {}
+        self._cache_stats = {"hits": 0, "misses": 0, "coalesced_loads": 0, "evictions": 0}
+        self._load_latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.RLock()
+
+    def _index_path(self, recruiter_id: int) -> Path:
+        return self.index_dir / f"recruiter_{recruiter_id}.faiss"
+
+    def _version_path(self, recruiter_id: int) -> Path:
+        return self.index_dir / f"recruiter_{recruiter_id}.version"
+
+    def _projection_path(self, recruiter_id: int) -> Path:
+        return self.index_dir / f"recruiter_{recruiter_id}.pca.npy"
+
+    def _stale_path(self, recruiter_id: int) -> Path:
+        """HNSW tombstones and replacement count, which the graph itself can't record"""
+        return self.index_dir / f"recruiter_{recruiter_id}.hnsw.json"
+
+    def _project(self, recruiter_id: int, vectors: np.ndarray) -> np.ndarray:
+        """Vectors in the index's space: full normalized vectors, or their PCA projection"""
+        projection = self._projections.get(recruiter_id)
+        if projection is None:
+            return vectors
+        return np.ascontiguousarray(vectors @ projection, dtype='float32')
+
+    def _new_index(self) -> faiss.IndexIDMap:
+        # Inner product on L2-normalized vectors == cosine similarity
+        return build_index(INDEX_FLAT, self.embedding_dim)
+
+    def _register(self, recruiter_id: int, index: faiss.IndexIDMap, read_only: bool) -> None:
+        self._indexes[recruiter_id] = index
+        self._lru[recruiter_id] = None
+        self._lru.move_to_end(recruiter_id)
+        self._kinds[recruiter_id] = index_kind(index)
+        self._ids[recruiter_id] = set(int(i) for i in faiss.vector_to_array(index.id_map))
+        self._tombstones[recruiter_id] = set()
+        self._replaced[recruiter_id] = 0
+        if read_only:
+            self._read_only.add(recruiter_id)
+        else:
+            self._read_only.discard(recruiter_id)
+
+    @staticmethod
+    def memory_budget_bytes() -> int:
+        return settings.VECTOR_INDEX_MEMORY_BUDGET_MB * 1024 * 1024
+
+    def _read(self, recruiter_id: int) -> Tuple[faiss.IndexIDMap, Optional[np.ndarray], Dict]:
+        index = faiss.read_index(
+            str(self._index_path(recruiter_id)),
+            faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        )
+        projection_path = self._projection_path(recruiter_id)
+        stale_path = self._stale_path(recruiter_id)
+        return (
+            index,
+            np.load(projection_path) if projection_path.exists() else None,
+            json.loads(stale_path.read_text()) if stale_path.exists() else {},
+        )
+
+    def _install(
+        self,
+        recruiter_id: int,
+        index: faiss.IndexIDMap,
+        projection: Optional[np.ndarray],
+        stale: Dict
+    ) -> None:
+        self._register(recruiter_id, index, read_only=True)
+        if projection is None:
+            self._projections.pop(recruiter_id, None)
+        else:
+            self._projections[recruiter_id] = projection
+        # Deleted ids are still in the graph's id map
+        tombstones = set(stale.get("tombstones", ()))
+        self._tombstones[recruiter_id] = tombstones
+        self._replaced[recruiter_id] = int(stale.get("replaced", 0))
+        self._ids[recruiter_id].difference_update(tombstones)
+
+    def load_all(self) -> int:
+        """
+        Memory-map persisted indexes so a restart doesn't trigger a rebuild.
+
+        Under a memory budget, the most recently written indexes are loaded
+        until it is reached; the rest are loaded on first use.
+        """
+        loaded = 0
+        budget = self.memory_budget_bytes()
+        paths = sorted(self.index_dir.glob("recruiter_*.faiss"), key=lambda p: p.stat().st_mtime, reverse=True)
+        with self._lock:
+            for path in paths:
+                try:
+                    recruiter_id = int(path.stem.split("_", 1)[1])
+                    version_path = self._version_path(recruiter_id)
+                    if version_path.exists():
+                        self._versions[recruiter_id] = version_path.read_text().strip()
+                    if budget and self._resident_bytes() >= budget:
+                        continue
+                    self._install(recruiter_id, *self._read(recruiter_id))
+                    loaded += 1
+                except Exception as e:
+                    print(f"Error loading vector index {path}: {e}")
+            # Loaded newest first; the oldest should be evicted first
+            for recruiter_id in reversed(list(self._lru)):
+                self._lru.move_to_end(recruiter_id)
+        return loaded
+
+    def is_resident(self, recruiter_id: int) -> bool:
+        with self._lock:
+            return recruiter_id in self._indexes
+
+    def load(self, recruiter_id: int) -> bool:
+        """
+        Make a recruiter's index resident, reading it from disk if it was
+        evicted. False if it has never been persisted.
+        """
+        with self._lock:
+            if recruiter_id in self._indexes:
+                self._cache_stats["hits"] += 1
+                self._lru.move_to_end(recruiter_id)
+                return True
+        if not self._index_path(recruiter_id).exists():
+            return False
+
+        started = time.perf_counter()
+        index, projection, stale = self._read(recruiter_id)
+        with self._lock:
+            if recruiter_id not in self._indexes:
+                self._install(recruiter_id, index, projection, stale)
+                self._cache_stats["misses"] += 1
+                self._load_latencies.append(time.perf_counter() - started)
+                self._enforce_budget(keep=recruiter_id)
+        return True
+
+    async def ensure_loaded(self, recruiter_id: int) -> None:
+        """load() off the event loop; concurrent callers for one recruiter share a single read"""
+        if self.is_resident(recruiter_id):
+            self.load(recruiter_id)  # counts the hit and refreshes recency
+            return
+        future = self._loading.get(recruiter_id)
+        if future is None:
+            future = asyncio.ensure_future(asyncio.to_thread(self.load, recruiter_id))
+            self._loading[recruiter_id] = future
+            future.add_done_callback(lambda _: self._loading.pop(recruiter_id, None))
+        else:
+            with self._lock:
+                self._cache_stats["coalesced_loads"] += 1
+        await asyncio.shield(future)
+
+    def _resident_bytes(self) -> int:
+        return sum(
+            estimate_index_bytes(index, self._kinds[recruiter_id])
+            + (self._projections[recruiter_id].nbytes if recruiter_id in self._projections else 0)
+            for recruiter_id, index in self._indexes.items()
+        )
+
+    def _evict(self, recruiter_id: int) -> None:
+        if recruiter_id in self._dirty:
+            self.save(recruiter_id)
+        for state in (self._indexes, self._kinds, self._ids, self._tombstones, self._replaced, self._projections):
+            state.pop(recruiter_id, None)
+        self._read_only.discard(recruiter_id)
+        self._lru.pop(recruiter_id, None)
+        self._cache_stats["evictions"] += 1
+
+    def _enforce_budget(self, keep: Optional[int] = None) -> None:
+        """Evict least recently used indexes until the resident ones fit the memory budget"""
+        budget = self.memory_budget_bytes()
+        if budget <= 0:
+            return
+        resident = self._resident_bytes()
+        for recruiter_id in list(self._lru):
+            if resident <= budget:
+                break
+            # Building indexes are about to be swapped
+            if recruiter_id == keep or recruiter_id in self._journals:
+                continue
+            resident -= estimate_index_bytes(self._indexes[recruiter_id], self._kinds[recruiter_id])
+            if recruiter_id in self._projections:
+                resident -= self._projections[recruiter_id].nbytes
+            self._evict(recruiter_id)
+
+    def _get_writable(self, recruiter_id: int) -> faiss.IndexIDMap:
+        """Return an in-memory index, copying a memory-mapped one on first write"""
+        if recruiter_id not in self._indexes:
+            # Evicted since the last sync: reload rather than start an empty index over it
+            self.load(recruiter_id)
+        index = self._indexes.get(recruiter_id)
+        if index is None:
+            index = self._new_index()
+            self._register(recruiter_id, index, read_only=False)
+        elif recruiter_id in self._read_only:
+            index = faiss.clone_index(index)
+            self._indexes[recruiter_id] = index
+            self._read_only.discard(recruiter_id)
+        return index
+
+    def save(self, recruiter_id: int) -> None:
+        """Persist a recruiter index atomically"""
+        with self._lock:
+            index = self._indexes.get(recruiter_id)
+            if index is None:
+                return
+            # The projection is written first: an index file is never paired with a stale one
+            projection = self._projections.get(recruiter_id)
+            projection_path = self._projection_path(recruiter_id)
+            if projection is not None:
+                tmp_projection_path = projection_path.with_suffix(".tmp.npy")
+                np.save(tmp_projection_path, projection)
+                tmp_projection_path.replace(projection_path)
+
+            # Likewise the HNSW tombstones: extra ones for an older index only hide deleted ids
+            tombstones = self._tombstones.get(recruiter_id)
+            replaced = self._replaced.get(recruiter_id, 0)
+            stale_path = self._stale_path(recruiter_id)
+            if tombstones or replaced:
+                tmp_stale_path = stale_path.with_suffix(".tmp")
+                tmp_stale_path.write_text(json.dumps({"tombstones": sorted(tombstones or ()), "replaced": replaced}))
+                tmp_stale_path.replace(stale_path)
+
+            path = self._index_path(recruiter_id)
+            tmp_path = path.with_suffix(".faiss.tmp")
+            faiss.write_index(index, str(tmp_path))
+            tmp_path.replace(path)
+            self._dirty.discard(recruiter_id)
+
+            if projection is None:
+                projection_path.unlink(missing_ok=True)
+            if not (tombstones or replaced):
+                stale_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def target_kind(n: int, current: Optional[str] = None) -> str:
+        """Index type for a collection of n vectors"""
+        kind = settings.VECTOR_INDEX_TYPE
+        if kind != INDEX_AUTO:
+            return kind if n >= MIN_TRAINING_SIZE[kind] else INDEX_FLAT
+
+        def tier(size: float) -> str:
+            if size >= settings.VECTOR_IVF_MIN_SIZE:
+                return INDEX_IVFPQ
+            if size >= settings.VECTOR_HNSW_MIN_SIZE:
+                return INDEX_HNSW
+            return INDEX_FLAT
+
+        target = tier(n)
+        if (
+            current in AUTO_TIERS
+            and AUTO_TIERS.index(current) > AUTO_TIERS.index(target)
+            and tier(n / AUTO_HYSTERESIS) == current
+        ):
+            return current
+        return target
+
+    @staticmethod
+    def target_pca_dim(n: int, current: int = 0) -> int:
+        """Reduced dimension for a collection of n vectors; 0 keeps full vectors"""
+        dim = settings.VECTOR_PCA_DIM
+        if dim <= 0:
+            return 0
+        # Keep an existing projection until the collection is 20% below the threshold
+        threshold = settings.VECTOR_PCA_MIN_SIZE * (AUTO_HYSTERESIS if current == dim else 1)
+        return dim if n >= threshold else 0
+
+    def kind(self, recruiter_id: int) -> str:
+        with self._lock:
+            return self._kinds.get(recruiter_id, INDEX_FLAT)
+
+    def pca_dim(self, recruiter_id: int) -> int:
+        with self._lock:
+            projection = self._projections.get(recruiter_id)
+            return 0 if projection is None else projection.shape[1]
+
+    def is_compressed(self, recruiter_id: int) -> bool:
+        return self.kind(recruiter_id) in (INDEX_SQ8, INDEX_IVFPQ)
+
+    def is_approximate(self, recruiter_id: int) -> bool:
+        """
+        Index scores are approximate, so hits need re-ranking: quantized
+        codes, projected vectors, or an HNSW graph still holding replaced
+        vectors, whose stale score may be the one kept for an id.
+        """
+        with self._lock:
+            stale_hnsw = self._kinds.get(recruiter_id) == INDEX_HNSW and self._replaced.get(recruiter_id, 0) > 0
+        return stale_hnsw or self.is_compressed(recruiter_id) or self.pca_dim(recruiter_id) > 0
+
+    def needs_rebuild(self, recruiter_id: int, n: int) -> bool:
+        with self._lock:
+            kind = self._kinds.get(recruiter_id, INDEX_FLAT)
+            if kind != self.target_kind(n, kind):
+                return True
+            pca_dim = self.pca_dim(recruiter_id)
+            if pca_dim != self.target_pca_dim(n, pca_dim):
+                return True
+            stale = len(self._tombstones.get(recruiter_id, ())) + self._replaced.get(recruiter_id, 0)
+            return stale > MAX_STALE_FRACTION * max(n, 1)
+
+    def is_building(self, recruiter_id: int) -> bool:
+        with self._lock:
+            return recruiter_id in self._journals
+
+    def begin_build(self, recruiter_id: int) -> bool:
+        """Start journaling changes for a build; False if one is already running"""
+        with self._lock:
+            if recruiter_id in self._journals:
+                return False
+            self._journals[recruiter_id] = []
+            return True
+
+    def abort_build(self, recruiter_id: int) -> None:
+        with self._lock:
+            self._journals.pop(recruiter_id, None)
+
+    def build(
+        self,
+        recruiter_id: int,
+        resume_ids: List[int],
+        vectors: np.ndarray,
+        persist: bool = True
+    ) -> str:
+        """
+        Replace a recruiter's index with one of the target type built from all vectors.
+
+        Training and insertion run without the lock, so searches keep using the
+        old index; changes journaled since begin_build are replayed on the new
+        one before it is swapped in. Large collections (VECTOR_PCA_DIM) get a
+        PCA projection fitted on their own vectors; the index then holds the
+        projected vectors and search re-ranks its hits at full dimension.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype='float32').reshape(len(resume_ids), -1)
+        faiss.normalize_L2(vectors)
+        ids = np.asarray(resume_ids, dtype='int64')
+        kind = self.target_kind(len(resume_ids), self.kind(recruiter_id))
+        pca_dim = self.target_pca_dim(len(resume_ids), self.pca_dim(recruiter_id))
+
+        started = time.perf_counter()
+        projection, pca_energy = None, None
+        indexed_vectors = vectors
+        if pca_dim:
+            projection, pca_energy = fit_projection(vectors, pca_dim)
+            indexed_vectors = np.ascontiguousarray(vectors @ projection, dtype='float32')
+        index = build_index(kind, pca_dim or self.embedding_dim, indexed_vectors)
+        if resume_ids:
+            index.add_with_ids(indexed_vectors, ids)
+        build_seconds = time.perf_counter() - started
+        recall = measure_recall(index, kind, vectors, ids, projection)
+
+        with self._lock:
+            journal = self._journals.pop(recruiter_id, [])
+            self._register(recruiter_id, index, read_only=False)
+            if projection is None:
+                self._projections.pop(recruiter_id, None)
+            else:
+                self._projections[recruiter_id] = projection
+            for changed_ids, changed_vectors in journal:
+                if changed_vectors is None:
+                    self._delete(recruiter_id, index, changed_ids)
+                else:
+                    self._insert(recruiter_id, index, changed_ids, changed_vectors)
+            self._build_stats[recruiter_id] = {
+                "kind": kind,
+                "vectors": len(resume_ids),
+                "build_seconds": build_seconds,
+                "recall": recall,
+                "pca_dim": pca_dim,
+                "pca_energy": pca_energy,
+                "built_at": time.time(),
+            }
+            if persist:
+                self.save(recruiter_id)
+            else:
+                self._dirty.add(recruiter_id)
+            self._enforce_budget(keep=recruiter_id)
+        return kind
+
+    def version(self, recruiter_id: int) -> Optional[str]:
+        """Embedding version the recruiter's index was built from; None for indexes predating versioning"""
+        with self._lock:
+            return self._versions.get(recruiter_id)
+
+    def set_version(self, recruiter_id: int, version: str) -> None:
+        with self._lock:
+            self._versions[recruiter_id] = version
+            path = self._version_path(recruiter_id)
+            tmp_path = path.with_suffix(".version.tmp")
+            tmp_path.write_text(version)
+            tmp_path.replace(path)
+
+    def indexed_ids(self, recruiter_id: int) -> Set[int]:
+        with self._lock:
+            return set(self._ids.get(recruiter_id, ()))
+
+    def size(self, recruiter_id: int) -> int:
+        with self._lock:
+            return len(self._ids.get(recruiter_id, ()))
+
+    def _delete(self, recruiter_id: int, index: faiss.IndexIDMap, resume_ids: List[int]) -> int:
+        if self._kinds[recruiter_id] == INDEX_HNSW:
+            self._tombstones[recruiter_id].update(resume_ids)
+            removed = len(resume_ids)
+        else:
+            removed = int(index.remove_ids(faiss.IDSelectorBatch(np.asarray(resume_ids, dtype='int64'))))
+        self._ids[recruiter_id].difference_update(resume_ids)
+        return removed
+
+    def _insert(self, recruiter_id: int, index: faiss.IndexIDMap, resume_ids: List[int], vectors: np.ndarray) -> None:
+        existing = self._ids[recruiter_id]
+        replaced = [i for i in resume_ids if i in existing]
+        if self._kinds[recruiter_id] == INDEX_HNSW:
+            # The old vector stays in the graph; search keeps the best hit per id and re-ranks
+            self._replaced[recruiter_id] += len(replaced)
+            self._tombstones[recruiter_id].difference_update(resume_ids)
+        elif replaced:
+            index.remove_ids(faiss.IDSelectorBatch(np.asarray(replaced, dtype='int64')))
+        index.add_with_ids(self._project(recruiter_id, vectors), np.asarray(resume_ids, dtype='int64'))
+        existing.update(int(i) for i in resume_ids)
+
+    def add(
+        self,
+        recruiter_id: int,
+        resume_ids: List[int],
+        vectors: np.ndarray,
+        persist: bool = True
+    ) -> None:
+        """Add (or replace) resume vectors in a recruiter's index"""
+        if not resume_ids:
+            return
+
+        vectors = np.ascontiguousarray(vectors, dtype='float32').reshape(len(resume_ids), -1)
+        faiss.normalize_L2(vectors)
+        resume_ids = [int(i) for i in resume_ids]
+
+        with self._lock:
+            index = self._get_writable(recruiter_id)
+            self._insert(recruiter_id, index, resume_ids, vectors)
+            if recruiter_id in self._journals:
+                self._journals[recruiter_id].append((resume_ids, vectors.copy()))
+            if persist:
+                self.save(recruiter_id)
+            else:
+                self._dirty.add(recruiter_id)
+            self._enforce_budget(keep=recruiter_id)
+
+    def remove(self, recruiter_id: int, resume_ids: Iterable[int], persist: bool = True) -> int:
+        """Remove resume vectors from a recruiter's index"""
+        with self._lock:
+            if recruiter_id not in self._indexes:
+                self.load(recruiter_id)
+            existing = self._ids.get(recruiter_id)
+            to_remove = [int(i) for i in resume_ids if existing and int(i) in existing]
+            if recruiter_id in self._journals:
+                self._journals[recruiter_id].append(([int(i) for i in resume_ids], None))
+            if not to_remove:
+                return 0
+
+            index = self._get_writable(recruiter_id)
+            removed = self._delete(recruiter_id, index, to_remove)
+            if persist:
+                self.save(recruiter_id)
+            else:
+                self._dirty.add(recruiter_id)
+            return removed
+
+    def search(
+        self,
+        recruiter_id: int,
+        query: np.ndarray,
+        k: int,
+        allowed_ids: Optional[Iterable[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Return (resume_id, cosine similarity) pairs, best first.
+
+        Scores are approximate for compressed or PCA-projected indexes.
+        """
+        query = np.ascontiguousarray(query, dtype='float32').reshape(1, -1)
+        faiss.normalize_L2(query)
+
+        with self._lock:
+            if recruiter_id not in self._indexes:
+                self.load(recruiter_id)
+            index = self._indexes.get(recruiter_id)
+            if index is None or index.ntotal == 0:
+                return []
+            self._lru.move_to_end(recruiter_id)
+            query = self._project(recruiter_id, query)
+
+            kind = self._kinds[recruiter_id]
+            tombstones = self._tombstones[recruiter_id]
+            params = search_params(kind, k)
+
+            # Keep references: params.sel doesn't own the selector
+            selector = None
+            if allowed_ids is not None:
+                allowed = np.fromiter((i for i in allowed_ids if i not in tombstones), dtype='int64')
+                if allowed.size == 0:
+                    return []
+                selector = faiss.IDSelectorBatch(allowed)
+                k = min(k, int(allowed.size))
+            elif tombstones:
+                excluded = faiss.IDSelectorBatch(np.fromiter(tombstones, dtype='int64'))
+                selector = faiss.IDSelectorNot(excluded)
+            if selector is not None:
+                params.sel = selector
+
+            # Replaced HNSW entries may return an id twice
+            fetch = min(k + self._replaced[recruiter_id], index.ntotal)
+            started = time.perf_counter()
+            distances, ids = index.search(query, fetch, params=params)
+            self._latencies.setdefault(kind, deque(maxlen=LATENCY_WINDOW)).append(
+                time.perf_counter() - started
+            )
+
+        hits: Dict[int, float] = {}
+        for resume_id, distance in zip(ids[0], distances[0]):
+            if resume_id != -1 and int(resume_id) not in hits:
+                hits[int(resume_id)] = float(distance)
+        return list(hits.items())[:k]
+
+    def stats(self) -> Dict:
+        """Per-recruiter index state and per-kind query latency for /metrics"""
+        with self._lock:
+            recruiters = {
+                recruiter_id: {
+                    "kind": self._kinds[recruiter_id],
+                    "vectors": len(self._ids[recruiter_id]),
+                    "building": recruiter_id in self._journals,
+                    "pca_dim": self.pca_dim(recruiter_id),
+                    **{
+                        key: value for key, value in self._build_stats.get(recruiter_id, {}).items()
+                        if key in ("build_seconds", "recall", "pca_energy") and value is not None
+                    },
+                }
+                for recruiter_id in self._indexes
+            }
+            latency_p99 = {
+                kind: float(np.percentile(np.fromiter(samples, dtype=np.float64), 99))
+                for kind, samples in self._latencies.items() if samples
+            }
+            load_latencies = np.fromiter(self._load_latencies, dtype=np.float64)
+            lookups = self._cache_stats["hits"] + self._cache_stats["misses"]
+            cache = {
+                **self._cache_stats,
+                "hit_rate": self._cache_stats["hits"] / lookups if lookups else 1.0,
+                "resident_indexes": len(self._indexes),
+                "resident_bytes": self._resident_bytes(),
+                "budget_bytes": self.memory_budget_bytes(),
+                "load_latency_p99_seconds": float(np.percentile(load_latencies, 99)) if load_latencies.size else 0.0,
+            }
+        return {"recruiters": recruiters, "query_latency_p99_seconds": latency_p99, "cache": cache}
+
+
+vector_index_store = VectorIndexStore(settings.vector_index_dir_path)
+
+
+@register_collector
+def vector_index_metrics():
+    stats = vector_index_store.stats()
+    for recruiter_id, index_stats in stats["recruiters"].items():
+        labels = {"recruiter_id": str(recruiter_id), "kind": index_stats["kind"]}
+        yield "vector_index_vectors", labels, index_stats["vectors"]
+        yield "vector_index_building", labels, int(index_stats["building"])
+        yield "vector_index_pca_dim", labels, index_stats["pca_dim"]
+        if "pca_energy" in index_stats:
+            yield "vector_index_pca_energy_retained", labels, index_stats["pca_energy"]
+        if "build_seconds" in index_stats:
+            yield "vector_index_build_seconds", labels, index_stats["build_seconds"]
+            yield "vector_index_recall_at_10", labels, index_stats["recall"]
+    for kind, p99 in stats["query_latency_p99_seconds"].items():
+        yield "vector_index_query_latency_p99_seconds", {"kind": kind}, p99
+    for key, value in stats["cache"].items():
+        yield f"vector_index_cache_{key}", {}, value
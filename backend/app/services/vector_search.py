@@ -0,0 +1,363 @@
+import asyncio
+from typing import Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.resume import Resume
+from app.services.vector_index import VectorIndexStore, vector_index_store
+from app.utils.sql import id_in
+from app.utils.vectors import decode_embeddings
+
+
+# (resume_id, cosine similarity), best first
+SearchHits = List[Tuple[int, float]]
+
+# pgvector rejects hnsw.ef_search outside 1..1000
+PGVECTOR_MAX_EF_SEARCH = 1000
+
+
+def rank_by_similarity(resume_ids: np.ndarray, scores: np.ndarray, k: int) -> SearchHits:
+    """Top-k by descending score, ties broken by ascending resume id"""
+    order = np.lexsort((resume_ids, -scores))[:k]
+    return [(int(resume_ids[i]), float(scores[i])) for i in order]
+
+
+def score_rows(rows, query: np.ndarray, k: int) -> SearchHits:
+    """Exact cosine top-k over (id, embedding) rows"""
+    if not rows:
+        return []
+    resume_ids = np.fromiter((row.id for row in rows), dtype=np.int64, count=len(rows))
+    matrix = decode_embeddings((row.embedding for row in rows), query.shape[-1])
+    scores = matrix.astype(np.float64) @ np.asarray(query, dtype=np.float64).reshape(-1)
+    return rank_by_similarity(resume_ids, scores, k)
+
+
+class VectorSearchBackend:
+    """Top-k cosine search over a recruiter's stored resume embeddings"""
+
+    name = "base"
+
+    async def sync(self, db: AsyncSession, recruiter_id: int, model_version: str) -> None:
+        """Make every stored resume embedding of the recruiter searchable"""
+
+    async def search(
+        self,
+        db: AsyncSession,
+        recruiter_id: int,
+        query: np.ndarray,
+        k: int,
+        model_version: str,
+        candidate_ids: Optional[List[int]] = None
+    ) -> SearchHits:
+        raise NotImplementedError
+
+    async def add(
+        self,
+        db: AsyncSession,
+        recruiter_id: int,
+        resume_ids: List[int],
+        vectors: np.ndarray,
+        model_version: str,
+        persist: bool = True
+    ) -> None:
+        """Add or replace resume vectors"""
+
+    async def remove(self, db: AsyncSession, recruiter_id: int, resume_ids: Iterable[int]) -> None:
+        """Drop resume vectors"""
+
+    async def flush(self, recruiter_id: int) -> None:
+        """Persist changes made with persist=False"""
+
+
+class NumpyBackend(VectorSearchBackend):
+    """Exact in-process scan; reads only ids and embedding blobs, never raw_text"""
+
+    name = "numpy"
+
+    async def search(self, db, recruiter_id, query, k, model_version, candidate_ids=None):
+        stmt = select(Resume.id, Resume.embedding).filter(
+            Resume.uploader_id == recruiter_id,
+            Resume.embedding.isnot(None),
+            Resume.embedding_model == model_version
+        )
+        if candidate_ids is not None:
+            stmt = stmt.filter(id_in(Resume.id, candidate_ids))
+
+        rows = (await db.execute(stmt)).all()
+        return score_rows(rows, query, k)
+
+
+class FaissBackend(VectorSearchBackend):
+    """
+    Persistent per-recruiter FAISS IndexIDMap.
+
+    The index structure follows the collection size (VECTOR_INDEX_TYPE);
+    crossing a boundary rebuilds it in the background while queries keep
+    using the current one. Compressed codes and PCA-projected vectors only
+    shortlist candidates, which are then re-ranked exactly against the
+    stored full-dimension float32 vectors.
+    """
+
+    name = "faiss"
+
+    def __init__(self, store: VectorIndexStore):
+        self.store = store
+        self._rebuild_tasks: Set[asyncio.Task] = set()
+
+    def _schedule_rebuild(self, recruiter_id: int, model_version: str) -> None:
+        if not self.store.begin_build(recruiter_id):
+            return
+        task = asyncio.create_task(self._rebuild(recruiter_id, model_version))
+        self._rebuild_tasks.add(task)
+        task.add_done_callback(self._rebuild_tasks.discard)
+
+    async def _rebuild(self, recruiter_id: int, model_version: str) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(Resume.id).filter(
+                        Resume.uploader_id == recruiter_id,
+                        Resume.embedding.isnot(None),
+                        Resume.embedding_model == model_version
+                    )
+                )
+                ids, vectors = await self._load_vectors(db, sorted(result.scalars().all()))
+            # Training is CPU-bound; keep it off the event loop
+            kind = await asyncio.to_thread(self.store.build, recruiter_id, ids, vectors)
+            self.store.set_version(recruiter_id, model_version)
+            print(f"Rebuilt vector index for recruiter {recruiter_id}: {kind}, {len(ids)} vectors")
+        except Exception as e:
+            self.store.abort_build(recruiter_id)
+            print(f"Vector index rebuild failed for recruiter {recruiter_id}: {e}")
+
+    async def _load_vectors(self, db: AsyncSession, resume_ids: List[int]) -> Tuple[List[int], np.ndarray]:
+        chunk_size = settings.EMBEDDING_BATCH_SIZE * 16
+        ids, blobs = [], []
+        for start in range(0, len(resume_ids), chunk_size):
+            rows = (await db.execute(
+                select(Resume.id, Resume.embedding).filter(Resume.id.in_(resume_ids[start:start + chunk_size]))
+            )).all()
+            ids.extend(row.id for row in rows)
+            blobs.extend(row.embedding for row in rows)
+        return ids, decode_embeddings(blobs, self.store.embedding_dim)
+
+    async def sync(self, db, recruiter_id, model_version):
+        if self.store.version(recruiter_id) not in (None, model_version):
+            # Recruiter switched embedding models: the index holds the old space
+            self._schedule_rebuild(recruiter_id, model_version)
+            return
+
+        # Evicted under the memory budget: read it back before reconciling
+        await self.store.ensure_loaded(recruiter_id)
+
+        result = await db.execute(
+            select(Resume.id).filter(
+                Resume.uploader_id == recruiter_id,
+                Resume.embedding.isnot(None),
+                Resume.embedding_model == model_version
+            )
+        )
+        stored_ids = set(result.scalars().all())
+
+        # Size crossed a tier boundary: build the new structure, keep serving from this one
+        if self.store.needs_rebuild(recruiter_id, len(stored_ids)):
+            self._schedule_rebuild(recruiter_id, model_version)
+
+        indexed_ids = self.store.indexed_ids(recruiter_id)
+
+        # Resumes deleted outside delete_resume
+        orphaned = indexed_ids - stored_ids
+        if orphaned:
+            self.store.remove(recruiter_id, orphaned, persist=False)
+
+        missing = sorted(stored_ids - indexed_ids)
+        if missing:
+            ids, vectors = await self._load_vectors(db, missing)
+            self.store.add(recruiter_id, ids, vectors, persist=False)
+
+        if orphaned or missing:
+            self.store.save(recruiter_id)
+        if self.store.version(recruiter_id) is None:
+            self.store.set_version(recruiter_id, model_version)
+
+    async def search(self, db, recruiter_id, query, k, model_version, candidate_ids=None):
+        if self.store.version(recruiter_id) not in (None, model_version):
+            # Until the rebuild for a new embedding model lands, scan the stored vectors
+            return await numpy_backend.search(db, recruiter_id, query, k, model_version, candidate_ids)
+
+        if not self.store.is_approximate(recruiter_id) or settings.VECTOR_RERANK_FACTOR <= 0:
+            return self.store.search(recruiter_id, query, k, candidate_ids)
+
+        # Quantized or projected scores only pick the shortlist; the final order uses exact vectors
+        shortlist = self.store.search(
+            recruiter_id, query, k * settings.VECTOR_RERANK_FACTOR, candidate_ids
+        )
+        if not shortlist:
+            return []
+        rows = (await db.execute(
+            select(Resume.id, Resume.embedding).filter(
+                id_in(Resume.id, [resume_id for resume_id, _ in shortlist]),
+                Resume.embedding.isnot(None)
+            )
+        )).all()
+        return score_rows(rows, query, k)
+
+    async def add(self, db, recruiter_id, resume_ids, vectors, model_version, persist=True):
+        self.store.add(recruiter_id, resume_ids, vectors, persist=persist)
+
+    async def remove(self, db, recruiter_id, resume_ids):
+        self.store.remove(recruiter_id, resume_ids)
+
+    async def flush(self, recruiter_id):
+        self.store.save(recruiter_id)
+
+
+class PgVectorBackend(VectorSearchBackend):
+    """
+    Postgres-side search over the resume_vectors table (pgvector, HNSW).
+
+    Top-k and the uploader_id filter run in the database, so only the
+    winning resume rows are ever loaded into Python. Results are
+    approximate (HNSW recall), not identical to the NumPy scan. The
+    uploader and candidate filters apply to rows the graph scan returns,
+    so on pgvector 0.8+ the scan continues iteratively until k rows pass;
+    a search that still comes back short is re-run as an exact scan.
+    """
+
+    name = "pgvector"
+
+    def __init__(self):
+        self._available: Optional[bool] = None
+        self._iterative_scan = False
+
+    async def is_available(self, db: AsyncSession) -> bool:
+        if self._available is None:
+            try:
+                result = await db.execute(text(
+                    "SELECT extversion FROM pg_extension "
+                    "WHERE extname = 'vector' AND to_regclass('resume_vectors') IS NOT NULL"
+                ))
+                version = result.scalar()
+                self._available = version is not None
+                # hnsw.iterative_scan arrived in pgvector 0.8
+                if version is not None:
+                    major, minor = (int(part) for part in version.split(".")[:2])
+                    self._iterative_scan = (major, minor) >= (0, 8)
+            except Exception as e:
+                await db.rollback()
+                print(f"pgvector not available: {e}")
+                self._available = False
+            if not self._available:
+                print("pgvector backend unavailable, falling back to NumPy scan")
+        return self._available
+
+    @staticmethod
+    def _to_literal(vector: np.ndarray) -> str:
+        # repr() of a float32 value round-trips exactly through pgvector's float4
+        return "[" + ",".join(repr(float(x)) for x in np.asarray(vector, dtype=np.float32).reshape(-1)) + "]"
+
+    async def sync(self, db, recruiter_id, model_version):
+        rows = (await db.execute(
+            text(
+                "SELECT r.id, r.embedding FROM resumes r "
+                "LEFT JOIN resume_vectors v ON v.resume_id = r.id "
+                "WHERE r.uploader_id = :recruiter_id "
+                "AND r.embedding IS NOT NULL AND r.embedding_model = :model_version "
+                "AND (v.resume_id IS NULL OR v.embedding_model IS DISTINCT FROM :model_version)"
+            ),
+            {"recruiter_id": recruiter_id, "model_version": model_version}
+        )).all()
+        if not rows:
+            return
+
+        vectors = decode_embeddings((row.embedding for row in rows), len(rows[0].embedding) // 4)
+        await self.add(db, recruiter_id, [row.id for row in rows], vectors, model_version)
+        await db.commit()
+
+    async def search(self, db, recruiter_id, query, k, model_version, candidate_ids=None):
+        # SET LOCAL can't take bind parameters; the value is an int, capped at pgvector's maximum.
+        # Deeper k (recommendation snapshots) is served by the iterative scan or the exact fallback
+        ef_search = min(max(settings.PGVECTOR_EF_SEARCH, k), PGVECTOR_MAX_EF_SEARCH)
+        await db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+        if self._iterative_scan:
+            # Keep walking the graph until k rows pass the filters instead of stopping at ef_search
+            await db.execute(text("SET LOCAL hnsw.iterative_scan = relaxed_order"))
+
+        params = {
+            "query": self._to_literal(query),
+            "recruiter_id": recruiter_id,
+            "model_version": model_version,
+            "k": k,
+        }
+        where = "WHERE uploader_id = :recruiter_id AND embedding_model = :model_version "
+        if candidate_ids is not None:
+            where += "AND resume_id = ANY(:candidate_ids) "
+            params["candidate_ids"] = list(candidate_ids)
+
+        # relaxed_order can return hits slightly out of order; the outer ORDER BY restores it
+        rows = (await db.execute(text(
+            "WITH hits AS MATERIALIZED ("
+            "SELECT resume_id, embedding <=> CAST(:query AS vector) AS distance FROM resume_vectors "
+            + where +
+            "ORDER BY embedding <=> CAST(:query AS vector) LIMIT :k"
+            ") SELECT resume_id, 1 - distance AS similarity FROM hits ORDER BY distance, resume_id"
+        ), params)).all()
+
+        if len(rows) < k:
+            # Fewer than k passed the filters: a small pool, or the scan gave up. Scan exactly;
+            # ordering by an expression the index can't serve keeps the planner off HNSW
+            rows = (await db.execute(text(
+                "SELECT resume_id, 1 - (embedding <=> CAST(:query AS vector)) AS similarity FROM resume_vectors "
+                + where +
+                "ORDER BY (embedding <=> CAST(:query AS vector)) + 0, resume_id LIMIT :k"
+            ), params)).all()
+        return [(int(row.resume_id), float(row.similarity)) for row in rows]
+
+    async def add(self, db, recruiter_id, resume_ids, vectors, model_version, persist=True):
+        if not resume_ids:
+            return
+        await db.execute(
+            text(
+                "INSERT INTO resume_vectors (resume_id, uploader_id, embedding_model, embedding) "
+                "VALUES (:resume_id, :uploader_id, :embedding_model, CAST(:embedding AS vector)) "
+                "ON CONFLICT (resume_id) DO UPDATE SET "
+                "embedding = EXCLUDED.embedding, embedding_model = EXCLUDED.embedding_model"
+            ),
+            [
+                {
+                    "resume_id": resume_id,
+                    "uploader_id": recruiter_id,
+                    "embedding_model": model_version,
+                    "embedding": self._to_literal(vector),
+                }
+                for resume_id, vector in zip(resume_ids, vectors)
+            ]
+        )
+
+    async def remove(self, db, recruiter_id, resume_ids):
+        # Rows normally go away through ON DELETE CASCADE; this covers explicit removals
+        await db.execute(
+            text("DELETE FROM resume_vectors WHERE resume_id = ANY(:resume_ids)"),
+            {"resume_ids": list(resume_ids)}
+        )
+        await db.commit()
+
+
+numpy_backend = NumpyBackend()
+faiss_backend = FaissBackend(vector_index_store)
+pgvector_backend = PgVectorBackend()
+
+
+async def get_vector_backend(db: AsyncSession) -> VectorSearchBackend:
+    """Backend selected by VECTOR_SEARCH_BACKEND, with NumPy as the pgvector fallback"""
+    if settings.VECTOR_SEARCH_BACKEND == "pgvector":
+        if await pgvector_backend.is_available(db):
+            return pgvector_backend
+        return numpy_backend
+    if settings.VECTOR_SEARCH_BACKEND == "numpy":
+        return numpy_backend
+    return faiss_backend
@@ -0,0 +1,15 @@
+from typing import Iterable
+
+from sqlalchemy import Integer, any_, literal
+from sqlalchemy.dialects.postgresql import ARRAY
+
+
+def id_in(column, ids: Iterable[int]):
+    """
+    column = ANY(:ids) with the ids bound as a single integer[] parameter.
+
+    Use instead of column.in_() for id lists that grow with a recruiter's
+    collection: an IN list binds one parameter per id and asyncpg stops at
+    32767 of them.
+    """
+    return column == any_(literal(list(ids), ARRAY(Integer)))
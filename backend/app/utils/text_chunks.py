@@ -0,0 +1,33 @@
+import re
+from typing import List
+
+
+def chunk_text(text: str, chunk_chars: int, overlap: int) -> List[str]:
+    """
+    Split text into overlapping windows of at most chunk_chars characters.
+
+    Windows end and start on word boundaries where possible. Always returns
+    at least one chunk (possibly empty) so every document gets a vector.
+    """
+    text = re.sub(r"\s+", " ", text or "").strip()
+    if len(text) <= chunk_chars:
+        return [text]
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            # Cut at the last space, but far enough in that the overlap still moves forward
+            cut = text.rfind(" ", start + overlap + 1, end)
+            if cut != -1:
+                end = cut
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+
+        next_start = max(end - overlap, start + 1)
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+
+    return [chunk for chunk in chunks if chunk] or [text]
@@ -0,0 +1,61 @@
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+# Stored embeddings are raw little-endian float32, L2-normalized before storage
+EMBEDDING_DTYPE = np.dtype('<f4')
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize a vector or each row of a matrix (zero vectors are left as is)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def encode_embedding(vector: np.ndarray) -> bytes:
+    """Serialize an embedding into the compact binary column format"""
+    return normalize(np.asarray(vector).reshape(-1)).astype(EMBEDDING_DTYPE).tobytes()
+
+
+def decode_embedding(blob: Optional[bytes]) -> Optional[np.ndarray]:
+    """Zero-copy view of a stored embedding (read-only)"""
+    if not blob:
+        return None
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+
+
+def decode_embeddings(blobs: Iterable[bytes], dim: int) -> np.ndarray:
+    """Stack stored embeddings into a (n, dim) float32 matrix"""
+    data = b''.join(blobs)
+    return np.frombuffer(data, dtype=EMBEDDING_DTYPE).reshape(-1, dim)
+
+
+def encode_embeddings(vectors: np.ndarray) -> bytes:
+    """Serialize an (n, dim) matrix of embeddings, row-normalized, into one blob"""
+    return normalize(np.atleast_2d(vectors)).astype(EMBEDDING_DTYPE).tobytes()
+
+
+def pool_chunks(chunk_vectors: np.ndarray, weights: Optional[Sequence[float]] = None) -> np.ndarray:
+    """Document vector: (weighted) mean of normalized chunk vectors, re-normalized"""
+    chunk_vectors = normalize(np.atleast_2d(chunk_vectors))
+    pooled = np.average(chunk_vectors, axis=0, weights=weights)
+    return normalize(pooled)
+
+
+def max_sim(query_chunks: np.ndarray, doc_chunks: np.ndarray) -> float:
+    """Mean over query chunks of the best cosine match among the document's chunks"""
+    sims = np.atleast_2d(query_chunks).astype(np.float64) @ np.atleast_2d(doc_chunks).astype(np.float64).T
+    return float(sims.max(axis=1).mean())
+
+
+def max_sim_bulk(query_chunks: np.ndarray, doc_chunk_lists: List[np.ndarray]) -> np.ndarray:
+    """max_sim of one query against many documents with a single matrix product"""
+    counts = np.array([len(chunks) for chunks in doc_chunk_lists])
+    if not len(counts):
+        return np.empty(0)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    sims = np.atleast_2d(query_chunks).astype(np.float64) @ np.vstack(doc_chunk_lists).astype(np.float64).T
+    return np.maximum.reduceat(sims, offsets, axis=1).mean(axis=0)
@@ -0,0 +1,127 @@
+"""
+Broad structured candidate searches on a large tenant.
+
+Run from the backend directory against a migrated database:
+
+    python -m benchmarks.candidate_query_benchmark
+    python -m benchmarks.candidate_query_benchmark --resumes 100000
+
+Seeds a throwaway recruiter with --resumes resume rows (no files, no
+embeddings), runs filters-only queries that match nearly all of them and
+removes the recruiter again. Survivor sets this size used to be bound one
+parameter per id, past asyncpg's 32767 limit; the run fails (exit code 1)
+if a query errors or returns fewer than --top-k results.
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+
+from app.db.session import AsyncSessionLocal
+from app.models.resume import Resume, ResumeSkill
+from app.models.user import User
+from app.services.recommendation_service import recommendation_service
+
+
+SKILLS = ["python", "fastapi", "postgresql", "docker", "react", "aws", "go", "java"]
+
+# Each matches (nearly) every seeded resume
+QUERIES = [
+    "exp>=1",
+    "-exp<1",
+    "skill:python exp:1..40",
+    "exp>=1 -fraud<=0",
+    "exp>=1 -intern",
+]
+
+
+async def seed(db, recruiter_id: int, count: int, chunk_size: int = 5000) -> None:
+    rng = np.random.default_rng(0)
+    for start in range(0, count, chunk_size):
+        rows = []
+        for i in range(start, min(start + chunk_size, count)):
+            skills = ["python"] + list(rng.choice(SKILLS[1:], size=2, replace=False))
+            rows.append({
+                "uploader_id": recruiter_id,
+                "filename": f"candidate_{i}.pdf",
+                "file_path": "",
+                "file_size_kb": 1,
+                "raw_text": f"Candidate {i} built {skills[1]} and {skills[2]} services",
+                "candidate_name": f"Candidate {i}",
+                "skills": skills,
+                "experience_years": float(rng.integers(1, 30)),
+                "inflation_score": float(rng.random() * 0.5),
+                "processing_status": "completed",
+            })
+        ids = (await db.execute(
+            insert(Resume).returning(Resume.id, sort_by_parameter_order=True), rows
+        )).scalars().all()
+        await db.execute(insert(ResumeSkill), [
+            {"resume_id": resume_id, "uploader_id": recruiter_id, "skill": skill}
+            for resume_id, row in zip(ids, rows)
+            for skill in row["skills"]
+        ])
+        await db.commit()
+
+
+async def run(resumes: int, top_k: int) -> bool:
+    async with AsyncSessionLocal() as db:
+        recruiter_id = (await db.execute(
+            insert(User).returning(User.id),
+            [{
+                "email": f"benchmark-{uuid.uuid4().hex}@example.com",
+                "hashed_password": "!",
+                "full_name": "Candidate query benchmark",
+            }]
+        )).scalar_one()
+        await db.commit()
+
+        ok = True
+        try:
+            started = time.perf_counter()
+            await seed(db, recruiter_id, resumes)
+            print(f"seeded {resumes} resumes in {time.perf_counter() - started:.1f}s")
+
+            for query in QUERIES:
+                started = time.perf_counter()
+                try:
+                    search = await recommendation_service.query_candidates(
+                        db, recruiter_id, query, top_k=top_k, mode="lexical"
+                    )
+                except Exception as e:
+                    await db.rollback()
+                    print(f"FAIL {query!r}: {e}")
+                    ok = False
+                    continue
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                found = len(search["results"])
+                status = "ok" if found >= top_k else "FAIL"
+                ok = ok and found >= top_k
+                print(f"{status:<4} {query!r:<28} {found:>4} results {elapsed_ms:>9.1f} ms")
+                for stage in search["stages"]:
+                    print(f"       {stage}")
+        finally:
+            resume_ids = select(Resume.id).filter(Resume.uploader_id == recruiter_id).scalar_subquery()
+            await db.execute(delete(ResumeSkill).where(ResumeSkill.resume_id.in_(resume_ids)))
+            await db.execute(delete(Resume).where(Resume.uploader_id == recruiter_id))
+            await db.execute(delete(User).where(User.id == recruiter_id))
+            await db.commit()
+        return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=40000)
+    parser.add_argument("--top-k", type=int, default=20)
+    args = parser.parse_args()
+
+    if not asyncio.run(run(args.resumes, args.top_k)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
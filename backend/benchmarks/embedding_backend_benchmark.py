@@ -0,0 +1,101 @@
+"""
+Parity and throughput of the ONNX Runtime embedder against PyTorch.
+
+Run from the backend directory:
+
+    python -m benchmarks.embedding_backend_benchmark
+    python -m benchmarks.embedding_backend_benchmark --texts resumes.txt --no-quantize
+
+--texts takes a file with one document per line; without it a synthetic
+mix of short and long resume-like texts is used. Parity is the cosine
+between the two backends' vectors for the same text; the run fails (exit
+code 1) if the minimum falls below --min-cosine.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.embedding_backends import OnnxEmbedder, TorchEmbedder
+from app.utils.vectors import normalize
+
+
+SKILLS = [
+    "Python", "FastAPI", "PostgreSQL", "Docker", "Kubernetes", "React", "TypeScript",
+    "machine learning", "data pipelines", "AWS", "Terraform", "Go", "Java", "Spark",
+]
+
+
+def synthetic_texts(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    texts = []
+    for i in range(n):
+        skills = ", ".join(rng.choice(SKILLS, size=rng.integers(3, 8), replace=False))
+        years = int(rng.integers(1, 15))
+        sentences = rng.integers(1, 12)
+        body = " ".join(
+            f"Worked on {rng.choice(SKILLS)} services for {rng.integers(2, 50)} teams over {years} years."
+            for _ in range(sentences)
+        )
+        texts.append(f"Candidate {i}\n{body}\nSkills: {skills}\nExperience: {years} years")
+    return texts
+
+
+def throughput(embedder, texts, batch_size: int, repeats: int):
+    embedder.encode(texts[:batch_size], batch_size)  # load and warm up
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        vectors = embedder.encode(texts, batch_size)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return normalize(vectors), len(texts) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", help="file with one document per line")
+    parser.add_argument("--count", type=int, default=512, help="synthetic text count")
+    parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-quantize", action="store_true", help="benchmark the fp32 ONNX export")
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    args = parser.parse_args()
+
+    settings.ONNX_QUANTIZE = not args.no_quantize
+    if args.texts:
+        with open(args.texts) as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = synthetic_texts(args.count)
+
+    torch_vectors, torch_rate = throughput(TorchEmbedder(), texts, args.batch_size, args.repeats)
+    onnx_embedder = OnnxEmbedder()
+    onnx_vectors, onnx_rate = throughput(onnx_embedder, texts, args.batch_size, args.repeats)
+
+    cosines = np.einsum("ij,ij->i", torch_vectors, onnx_vectors)
+    print(f"{len(texts)} texts, batch size {args.batch_size}")
+    print(f"{'backend':<24} {'sentences/s':>12}")
+    print(f"{'torch':<24} {torch_rate:>12.1f}")
+    print(f"{onnx_embedder.version:<24} {onnx_rate:>12.1f}   ({onnx_rate / torch_rate:.2f}x)")
+    print(
+        f"cosine vs torch: min {cosines.min():.4f}, mean {cosines.mean():.4f}, "
+        f"p1 {np.percentile(cosines, 1):.4f}"
+    )
+
+    # Top-10 neighbour agreement, which is what recommendations depend on
+    k = min(10, len(texts) - 1)
+    torch_top = np.argsort(-(torch_vectors @ torch_vectors.T), axis=1)[:, 1:k + 1]
+    onnx_top = np.argsort(-(onnx_vectors @ onnx_vectors.T), axis=1)[:, 1:k + 1]
+    overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(torch_top, onnx_top)])
+    print(f"top-{k} neighbour overlap: {overlap:.3f}")
+
+    if cosines.min() < args.min_cosine:
+        print(f"FAIL: minimum cosine below {args.min_cosine}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
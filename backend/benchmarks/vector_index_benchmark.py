@@ -0,0 +1,128 @@
+"""
+Recall vs. memory of the compressed and PCA-projected FAISS indexes against IndexFlatIP.
+
+Run from the backend directory:
+
+    python -m benchmarks.vector_index_benchmark --vectors 200000
+    python -m benchmarks.vector_index_benchmark --embeddings resumes.npy
+    python -m benchmarks.vector_index_benchmark --pca-dims 64 128 192
+
+--embeddings takes an (n, dim) float32 .npy export of real resume vectors;
+without it, clustered synthetic vectors of the same dimension are used.
+Recall@k is measured against exact flat search on the same vectors, and
+re-ranking uses the original float32 vectors like FaissBackend does.
+PCA rows scan flat indexes of projected vectors (VECTOR_PCA_DIM) and
+re-rank at full dimension.
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from app.services.vector_index import INDEX_FLAT, INDEX_IVFPQ, INDEX_SQ8, build_index, fit_projection, ivf_nlist
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int = 200, seed: int = 0) -> np.ndarray:
+    """Normalized vectors around random centroids, roughly like topic-clustered resumes"""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dim)).astype('float32')
+    vectors = centroids[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype('float32')
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(f[:k]) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def rerank(vectors: np.ndarray, queries: np.ndarray, shortlist: np.ndarray, k: int) -> np.ndarray:
+    result = np.empty((len(queries), k), dtype='int64')
+    for i, candidates in enumerate(shortlist):
+        candidates = candidates[candidates != -1]
+        scores = vectors[candidates] @ queries[i]
+        result[i] = candidates[np.argsort(-scores, kind='stable')[:k]]
+    return result
+
+
+def run(vectors: np.ndarray, queries: np.ndarray, k: int, nprobes, rerank_factors, pca_dims) -> None:
+    n, dim = vectors.shape
+    ids = np.arange(n, dtype='int64')
+
+    flat = build_index(INDEX_FLAT, dim)
+    flat.add_with_ids(vectors, ids)
+    _, truth = flat.search(queries, k)
+
+    print(f"{n} vectors, dim {dim}, {len(queries)} queries, recall@{k}")
+    print(f"{'index':<8} {'nprobe':>6} {'rerank':>6} {'recall':>7} {'MB':>9} {'ms/query':>9}")
+
+    def report(name, index, nprobe="-", factor=0, projection=None):
+        params = faiss.SearchParametersIVF(nprobe=nprobe) if nprobe != "-" else None
+        started = time.perf_counter()
+        index_queries = queries if projection is None else np.ascontiguousarray(queries @ projection)
+        _, found = index.search(index_queries, k * max(factor, 1), params=params)
+        if factor:
+            found = rerank(vectors, queries, found, k)
+        elapsed_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        megabytes = len(faiss.serialize_index(index)) / (1024 * 1024)
+        print(
+            f"{name:<8} {nprobe:>6} {factor or '-':>6} {recall_at_k(found, truth):>7.3f} "
+            f"{megabytes:>9.1f} {elapsed_ms:>9.2f}"
+        )
+
+    report(INDEX_FLAT, flat)
+
+    sq8 = build_index(INDEX_SQ8, dim, vectors)
+    sq8.add_with_ids(vectors, ids)
+    for factor in rerank_factors:
+        report(INDEX_SQ8, sq8, factor=factor)
+
+    ivfpq = build_index(INDEX_IVFPQ, dim, vectors)
+    ivfpq.add_with_ids(vectors, ids)
+    print(f"(ivfpq: nlist={ivf_nlist(n)})")
+    for nprobe in nprobes:
+        for factor in rerank_factors:
+            report(INDEX_IVFPQ, ivfpq, nprobe=nprobe, factor=factor)
+
+    for pca_dim in pca_dims:
+        projection, energy = fit_projection(vectors, pca_dim)
+        projected = build_index(INDEX_FLAT, pca_dim)
+        projected.add_with_ids(np.ascontiguousarray(vectors @ projection), ids)
+        print(f"(pca{pca_dim}: {energy:.1%} of the energy retained)")
+        for factor in rerank_factors:
+            report(f"pca{pca_dim}", projected, factor=factor, projection=projection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--embeddings", help="(n, dim) float32 .npy file of real vectors")
+    parser.add_argument("--vectors", type=int, default=100000, help="synthetic collection size")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--rerank", type=int, nargs="+", default=[0, 4, 10])
+    parser.add_argument("--pca-dims", type=int, nargs="*", default=[96, 128, 192])
+    args = parser.parse_args()
+
+    if args.embeddings:
+        vectors = np.ascontiguousarray(np.load(args.embeddings), dtype='float32')
+        faiss.normalize_L2(vectors)
+    else:
+        vectors = synthetic_vectors(args.vectors, args.dim)
+
+    # Queries are held-out perturbations of collection vectors, like job/resume pairs
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, len(vectors), args.queries)] + 0.3 * rng.standard_normal(
+        (args.queries, vectors.shape[1])
+    ).astype('float32')
+    queries = np.ascontiguousarray(queries, dtype='float32')
+    faiss.normalize_L2(queries)
+
+    run(vectors, queries, args.k, args.nprobe, args.rerank, args.pca_dims)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("sentence_transformers")
+
+from app.services.embedding_backends import OnnxEmbedder, TorchEmbedder
+from app.utils.vectors import normalize
+
+
+# Same floor as benchmarks/embedding_backend_benchmark.py --min-cosine
+MIN_COSINE = 0.98
+
+SENTENCES = [
+    "Senior Python engineer with 8 years building FastAPI and PostgreSQL services.",
+    "Frontend developer: React, TypeScript, accessibility audits and design systems.",
+    "Data scientist experienced in machine learning pipelines on Spark and AWS.",
+    "Kubernetes, Terraform and Docker for multi-region deployments.",
+    "Registered nurse, ICU, 5 years",
+    "Java",
+    "Led a team of 12 engineers migrating a monolith to event-driven microservices; "
+    "owned on-call, capacity planning and the hiring loop for backend roles. " * 4,
+    "Ingénieure logiciel, développement Go et gestion de bases de données.",
+]
+
+
+def test_onnx_matches_torch():
+    torch_vectors = normalize(TorchEmbedder().encode(SENTENCES, batch_size=4))
+    onnx_vectors = normalize(OnnxEmbedder().encode(SENTENCES, batch_size=4))
+
+    cosines = np.einsum("ij,ij->i", torch_vectors, onnx_vectors)
+    worst = int(np.argmin(cosines))
+    assert cosines[worst] >= MIN_COSINE, f"cosine {cosines[worst]:.4f} for {SENTENCES[worst][:60]!r}"